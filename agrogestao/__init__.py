@@ -0,0 +1,12 @@
+"""AgroGestão - gestão agrícola.
+
+Camadas:
+
+- ``agrogestao.data``: acesso ao Supabase, outbox local e cache das tabelas
+- ``agrogestao.analytics``: cálculos financeiros e agregações
+- ``agrogestao.integrations``: serviços externos (clima)
+- ``agrogestao.ui``: páginas Streamlit
+
+Apenas ``agrogestao.ui`` depende do Streamlit; o restante pode ser
+importado e medido isoladamente.
+"""
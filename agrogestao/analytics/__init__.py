@@ -0,0 +1,56 @@
+"""Motor de análise: cálculos financeiros e agregações (sem Streamlit)"""
+from agrogestao.analytics.aggregations import (
+    boxes_by,
+    daily_production,
+    filter_by_date,
+    filter_productions,
+    prepare_dates,
+    quality_by_product,
+    revenue_by,
+    total_boxes,
+    with_revenue,
+)
+from agrogestao.analytics.climate import (
+    ClimateFeatureCache,
+    climate_correlations,
+    climate_regression,
+    rolling_features,
+    station_features,
+    with_station_features,
+)
+from agrogestao.analytics.costs import AllocationRules, CostAllocator, allocate_costs, profit_by
+from agrogestao.analytics.financials import calculate_financials
+from agrogestao.analytics.forecast import BackgroundForecaster, ForecastEngine, ForecastModel
+from agrogestao.analytics.index import FrameIndexCache, IndexedFrame
+from agrogestao.analytics.kpis import KpiSeries, latest_period, period_label
+
+__all__ = [
+    "AllocationRules",
+    "BackgroundForecaster",
+    "ClimateFeatureCache",
+    "CostAllocator",
+    "ForecastEngine",
+    "ForecastModel",
+    "FrameIndexCache",
+    "IndexedFrame",
+    "KpiSeries",
+    "allocate_costs",
+    "boxes_by",
+    "calculate_financials",
+    "climate_correlations",
+    "climate_regression",
+    "daily_production",
+    "filter_by_date",
+    "filter_productions",
+    "latest_period",
+    "period_label",
+    "prepare_dates",
+    "profit_by",
+    "quality_by_product",
+    "revenue_by",
+    "rolling_features",
+    "station_features",
+    "total_boxes",
+    "with_revenue",
+    "with_station_features",
+]
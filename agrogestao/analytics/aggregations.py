@@ -0,0 +1,75 @@
+"""Filtros e agregações usados pelo dashboard e pelos relatórios"""
+import pandas as pd
+
+
+def prepare_dates(df, column='date'):
+    """Converte a coluna de data para datetime e descarta linhas sem data válida"""
+    if df.empty or column not in df.columns:
+        return df
+    df = df.assign(**{column: pd.to_datetime(df[column], errors='coerce')})
+    return df.dropna(subset=[column])
+
+
+def filter_by_date(df, start_date, end_date, column='date'):
+    """Linhas com data entre ``start_date`` e ``end_date`` (inclusive)"""
+    # Comparação entre datetime64 (sem criar um ``date`` Python por linha)
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    dates = df[column]
+    return df[(dates >= start) & (dates < end)]
+
+
+def filter_productions(df, start_date, end_date, locations=None, products=None):
+    """Aplica os filtros de período, local e cultura das páginas"""
+    filtered = filter_by_date(df, start_date, end_date)
+    if locations:
+        filtered = filtered[filtered['local'].isin(locations)]
+    if products:
+        filtered = filtered[filtered['product'].isin(products)]
+    return filtered
+
+
+def total_boxes(df):
+    """Total de caixas (1ª + 2ª qualidade)"""
+    if df.empty or 'first_quality' not in df.columns or 'second_quality' not in df.columns:
+        return 0
+    return float(df['first_quality'].astype('float64').sum() + df['second_quality'].astype('float64').sum())
+
+
+def with_revenue(df):
+    """Acrescenta as colunas de receita por linha (sem alterar o frame original)"""
+    first_revenue = df['first_quality'].astype('float64') * df.get('first_price', 0)
+    second_revenue = df['second_quality'].astype('float64') * df.get('second_price', 0)
+    return df.assign(first_revenue=first_revenue,
+                     second_revenue=second_revenue,
+                     total_revenue_item=first_revenue + second_revenue)
+
+
+def boxes_by(df, key):
+    """Caixas de 1ª e 2ª qualidade e total, agrupados por ``key``"""
+    grouped = df.groupby(key, observed=True)[['first_quality', 'second_quality']].sum()
+    grouped = grouped.astype('float64').reset_index()
+    grouped['total'] = grouped['first_quality'] + grouped['second_quality']
+    return grouped
+
+
+def revenue_by(df, key):
+    """Receita total agrupada por ``key``"""
+    if 'total_revenue_item' not in df.columns:
+        df = with_revenue(df)
+    return df.groupby(key, observed=True)['total_revenue_item'].sum().reset_index()
+
+
+def quality_by_product(df):
+    """Participação de 1ª e 2ª qualidade por cultura (culturas sem produção são omitidas)"""
+    grouped = boxes_by(df, 'product')
+    grouped = grouped[grouped['total'] > 0]
+    return grouped.assign(
+        first_percent=grouped['first_quality'] / grouped['total'] * 100,
+        second_percent=grouped['second_quality'] / grouped['total'] * 100,
+    )
+
+
+def daily_production(df):
+    """Caixas de 1ª e 2ª qualidade somadas por data"""
+    return df.groupby('date')[['first_quality', 'second_quality']].sum().astype('float64').reset_index()
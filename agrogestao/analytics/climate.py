@@ -0,0 +1,253 @@
+"""Correlação entre clima e produção.
+
+As produções são agregadas por (local, cultura, dia) e, para cada série,
+calculam-se janelas móveis de clima (média de temperatura e umidade,
+chuva acumulada) com somas acumuladas e busca binária em NumPy, sem
+laços em Python por linha. As features resultantes são correlacionadas
+e regredidas contra a participação de 1ª qualidade e o total de caixas.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (7, 14, 30)
+GROUP_KEYS = ['local', 'product']
+TARGETS = ['first_share', 'total_boxes']
+
+# Somas diárias: aditivas, então novas linhas podem ser incorporadas sem recalcular o histórico
+_DAILY_SUMS = ['temperature_sum', 'temperature_n', 'humidity_sum', 'humidity_n',
+               'rain_sum', 'rain_n', 'first_quality', 'second_quality']
+
+
+def daily_sums(df):
+    """Somas por (local, cultura, dia) das colunas de clima e produção"""
+    day = pd.to_datetime(df['date'], errors='coerce').dt.normalize()
+    frame = pd.DataFrame({
+        'local': df['local'].astype(str),
+        'product': df['product'].astype(str),
+        'day': day,
+        'first_quality': df['first_quality'].astype(np.float64).fillna(0),
+        'second_quality': df['second_quality'].astype(np.float64).fillna(0),
+    })
+    for col in ['temperature', 'humidity', 'rain']:
+        values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+        frame[f'{col}_sum'] = values.astype(np.float64).fillna(0)
+        frame[f'{col}_n'] = values.notna().astype(np.int64)
+    frame = frame.dropna(subset=['day'])
+    return frame.groupby(GROUP_KEYS + ['day'], sort=False)[_DAILY_SUMS].sum().reset_index()
+
+
+def _window_sum(keys, cumsum, window):
+    """Soma de ``cumsum`` na janela [dia - window + 1, dia] de cada linha (mesma série)"""
+    left = np.searchsorted(keys, keys - (window - 1), side='left')
+    padded = np.concatenate(([0.0], cumsum))
+    return padded[1:] - padded[left]
+
+
+def rolling_features(daily, windows=DEFAULT_WINDOWS):
+    """Features de clima em janelas móveis de ``windows`` dias por série.
+
+    As janelas são por calendário: dias sem registro não contam, mas
+    também não deslocam a janela.
+    """
+    if daily.empty:
+        return pd.DataFrame()
+    daily = daily.sort_values(GROUP_KEYS + ['day'], ignore_index=True)
+
+    # Chave única ordenada: série * espaçamento + número do dia, para que a
+    # busca binária nunca atravesse a fronteira entre duas séries
+    group_code = daily.groupby(GROUP_KEYS, sort=False).ngroup().to_numpy(np.int64)
+    day_number = (daily['day'].to_numpy('datetime64[D]').astype(np.int64))
+    day_number -= day_number.min()
+    spacing = day_number.max() + max(windows) + 1
+    keys = group_code * spacing + day_number
+
+    features = daily[GROUP_KEYS + ['day']].copy()
+    total = daily['first_quality'] + daily['second_quality']
+    features['total_boxes'] = total
+    features['first_share'] = (daily['first_quality'] / total.where(total > 0)) * 100
+
+    cumsums = {col: np.cumsum(daily[col].to_numpy(np.float64)) for col in _DAILY_SUMS[:6]}
+    for window in windows:
+        for col, how in [('temperature', 'mean'), ('humidity', 'mean'), ('rain', 'sum')]:
+            total_sum = _window_sum(keys, cumsums[f'{col}_sum'], window)
+            count = _window_sum(keys, cumsums[f'{col}_n'], window)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                value = total_sum / count if how == 'mean' else np.where(count > 0, total_sum, np.nan)
+            features[f'{col}_{how}_{window}d'] = value
+    return features
+
+
+def station_features(daily_weather, windows=DEFAULT_WINDOWS):
+    """Janelas móveis sobre o clima diário da estação de cada cidade.
+
+    ``daily_weather`` tem ``city``, ``day``, ``temperature``, ``humidity``
+    e ``rain`` (ver ``WeatherStore.daily``); as colunas geradas têm os
+    mesmos nomes de ``rolling_features``.
+    """
+    if daily_weather.empty:
+        return pd.DataFrame()
+    daily = daily_weather.sort_values(['city', 'day'], ignore_index=True)
+    city_code = daily.groupby('city', sort=False).ngroup().to_numpy(np.int64)
+    day_number = daily['day'].to_numpy('datetime64[D]').astype(np.int64)
+    day_number -= day_number.min()
+    keys = city_code * (day_number.max() + max(windows) + 1) + day_number
+
+    features = daily[['city', 'day']].copy()
+    for col, how in [('temperature', 'mean'), ('humidity', 'mean'), ('rain', 'sum')]:
+        values = daily[col].to_numpy(np.float64)
+        value_sum = np.cumsum(np.nan_to_num(values))
+        value_n = np.cumsum(~np.isnan(values))
+        for window in windows:
+            total_sum = _window_sum(keys, value_sum, window)
+            count = _window_sum(keys, value_n, window)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                value = total_sum / count if how == 'mean' else np.where(count > 0, total_sum, np.nan)
+            features[f'{col}_{how}_{window}d'] = value
+    return features
+
+
+def with_station_features(features, station, city_of_local):
+    """Troca as features de clima das produções pelas da estação da cidade de cada local"""
+    targets = features.drop(columns=feature_columns(features))
+    targets = targets.assign(city=targets['local'].map(city_of_local))
+    merged = targets.merge(station, on=['city', 'day'], how='left')
+    return merged.drop(columns='city')
+
+
+_FEATURE_PATTERN = re.compile(r'_(mean|sum)_\d+d$')
+
+
+def feature_columns(features):
+    """Colunas de clima geradas por ``rolling_features``"""
+    return [c for c in features.columns if _FEATURE_PATTERN.search(c)]
+
+
+def climate_correlations(features, by=None, targets=TARGETS):
+    """Correlação de Pearson entre cada feature de clima e cada alvo.
+
+    Calculada a partir de somas agrupadas (uma passada por coluna), com
+    ``by`` opcional para obter uma tabela por série.
+    """
+    x_cols = feature_columns(features)
+    rows = []
+    for target in targets:
+        for col in x_cols:
+            valid = features[[col, target]].notna().all(axis=1)
+            frame = features.loc[valid]
+            x = frame[col].to_numpy(np.float64)
+            y = frame[target].to_numpy(np.float64)
+            parts = pd.DataFrame({'n': 1.0, 'x': x, 'y': y, 'xx': x * x, 'yy': y * y, 'xy': x * y})
+            if by:
+                for key in by:
+                    parts[key] = frame[key].to_numpy()
+                sums = parts.groupby(by, sort=True).sum()
+            else:
+                sums = parts.sum().to_frame().T
+            n = sums['n']
+            cov = sums['xy'] - sums['x'] * sums['y'] / n
+            var_x = sums['xx'] - sums['x'] ** 2 / n
+            var_y = sums['yy'] - sums['y'] ** 2 / n
+            with np.errstate(invalid='ignore', divide='ignore'):
+                corr = cov / np.sqrt(var_x * var_y)
+            result = pd.DataFrame({'feature': col, 'target': target, 'n': n.astype(int),
+                                   'correlation': corr.where(n >= 3)})
+            rows.append(result.reset_index(drop=not by))
+    if not rows:
+        return pd.DataFrame(columns=(by or []) + ['feature', 'target', 'n', 'correlation'])
+    return pd.concat(rows, ignore_index=True)
+
+
+def climate_regression(features, target, feature_cols=None):
+    """Regressão linear (mínimos quadrados) do alvo contra as features de clima.
+
+    Devolve um dicionário com os coeficientes (em unidades originais),
+    o intercepto, o R² e o número de observações usadas.
+    """
+    feature_cols = feature_cols or feature_columns(features)
+    frame = features[feature_cols + [target]].dropna()
+    n = len(frame)
+    if n <= len(feature_cols) + 1:
+        return {"coefficients": {}, "intercept": np.nan, "r2": np.nan, "n": n}
+
+    X = np.column_stack([np.ones(n), frame[feature_cols].to_numpy(np.float64)])
+    y = frame[target].to_numpy(np.float64)
+    beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+    residual = y - X @ beta
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    r2 = 1 - (residual ** 2).sum() / ss_tot if ss_tot > 0 else np.nan
+    return {
+        "coefficients": dict(zip(feature_cols, beta[1:])),
+        "intercept": beta[0],
+        "r2": r2,
+        "n": n,
+    }
+
+
+class ClimateFeatureCache:
+    """Features de clima mantidas entre execuções e atualizadas de forma incremental.
+
+    Linhas novas (``created_at`` posterior à última vista) são somadas às
+    agregações diárias e apenas as séries (local, cultura) afetadas têm
+    as janelas recalculadas. Exclusões ou edições forçam uma
+    reconstrução completa.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        self._lock = threading.Lock()
+        self._daily = None
+        self._features = None
+        self._rows = 0
+        self._last_created = None
+
+    def update(self, productions_df):
+        """Devolve as features atualizadas para o frame de produções informado"""
+        with self._lock:
+            if productions_df.empty or 'date' not in productions_df.columns:
+                return pd.DataFrame()
+            if 'created_at' not in productions_df.columns:
+                # Sem carimbo de criação não há como detectar linhas novas
+                self._daily = daily_sums(productions_df)
+                self._features = rolling_features(self._daily, self.windows)
+                return self._features
+            created = productions_df['created_at']
+            if not pd.api.types.is_datetime64_any_dtype(created):
+                created = pd.to_datetime(created, errors='coerce', format='ISO8601', utc=True)
+            last_created = created.max()
+            if self._features is not None and last_created == self._last_created \
+                    and len(productions_df) == self._rows:
+                return self._features
+
+            new_rows = None
+            if self._features is not None and not self._features.empty \
+                    and self._last_created is not None:
+                is_new = created > self._last_created
+                if len(productions_df) - int(is_new.sum()) == self._rows:
+                    new_rows = productions_df[is_new]
+
+            if new_rows is None:
+                self._daily = daily_sums(productions_df)
+                self._features = rolling_features(self._daily, self.windows)
+            else:
+                self._apply_new_rows(new_rows)
+
+            self._rows = len(productions_df)
+            self._last_created = last_created
+            return self._features
+
+    def _apply_new_rows(self, new_rows):
+        new_daily = daily_sums(new_rows)
+        affected = pd.MultiIndex.from_frame(new_daily[GROUP_KEYS].drop_duplicates())
+
+        # Só as séries afetadas são reagregadas e têm as janelas recalculadas
+        in_daily = pd.MultiIndex.from_frame(self._daily[GROUP_KEYS]).isin(affected)
+        series = pd.concat([self._daily[in_daily], new_daily], ignore_index=True)
+        series = series.groupby(GROUP_KEYS + ['day'], sort=False)[_DAILY_SUMS].sum().reset_index()
+        self._daily = pd.concat([self._daily[~in_daily], series], ignore_index=True)
+
+        in_features = pd.MultiIndex.from_frame(self._features[GROUP_KEYS]).isin(affected)
+        refreshed = rolling_features(series, self.windows)
+        self._features = pd.concat([self._features[~in_features], refreshed], ignore_index=True)
@@ -0,0 +1,197 @@
+"""Rateio de custos de insumos entre as produções.
+
+Cada insumo é associado às produções do mesmo local no mesmo período
+(semana ou mês): um join por intervalo feito com ``to_period`` e merges
+vetorizados. Insumos sem local (ou com local marcado como compartilhado)
+são rateados entre todas as produções do período. Dentro de cada grupo
+o custo é distribuído proporcionalmente à base escolhida (receita,
+caixas ou número de lançamentos).
+
+O ``CostAllocator`` guarda o rateio por versão dos dados e regras, de
+modo que mudar os filtros de uma página não refaz o cálculo.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+BASES = ("revenue", "boxes", "rows")
+
+
+@dataclass(frozen=True)
+class AllocationRules:
+    """Regras de rateio.
+
+    ``period``: frequência do pandas que define a janela de associação
+    (``"M"`` mês, ``"W"`` semana). ``basis``: ``"revenue"``, ``"boxes"``
+    ou ``"rows"``. ``shared_locations``: nomes de local (sem diferenciar
+    maiúsculas) tratados como custo geral da propriedade.
+    ``unmatched_as_shared``: se o local do insumo não teve produção no
+    período, o custo vira compartilhado em vez de ficar sem rateio.
+    """
+    period: str = "M"
+    basis: str = "revenue"
+    shared_locations: tuple = ("", "geral", "todos", "todas", "propriedade")
+    unmatched_as_shared: bool = True
+
+    def __post_init__(self):
+        if self.basis not in BASES:
+            raise ValueError(f"Base de rateio inválida: {self.basis!r} (use {', '.join(BASES)})")
+
+
+def _location_key(values):
+    # astype(object) antes do fillna: colunas categóricas não aceitam "" como valor novo
+    return values.astype(object).fillna("").astype(str).str.strip().str.casefold()
+
+
+def _basis(productions, basis):
+    if basis == "rows":
+        return pd.Series(1.0, index=productions.index)
+    first = productions['first_quality'].astype(np.float64).fillna(0)
+    second = productions['second_quality'].astype(np.float64).fillna(0)
+    if basis == "boxes":
+        return first + second
+    return (first * productions.get('first_price', 0).fillna(0)
+            + second * productions.get('second_price', 0).fillna(0))
+
+
+def _prepare(productions, inputs, rules):
+    """Frames mínimos com local normalizado, período e base/custo"""
+    prod = pd.DataFrame({
+        'loc': _location_key(productions['local']),
+        'period': pd.to_datetime(productions['date'], errors='coerce').dt.to_period(rules.period),
+        'basis': _basis(productions, rules.basis).astype(np.float64),
+    }, index=productions.index)
+    if inputs.empty or 'cost' not in inputs.columns:
+        inp = pd.DataFrame({'loc': pd.Series(dtype=str),
+                            'period': pd.Series(dtype=prod['period'].dtype),
+                            'cost': pd.Series(dtype=np.float64)})
+    else:
+        location = inputs['location'] if 'location' in inputs.columns else pd.Series("", index=inputs.index)
+        inp = pd.DataFrame({
+            'loc': _location_key(location),
+            'period': pd.to_datetime(inputs['date'], errors='coerce').dt.to_period(rules.period),
+            'cost': pd.to_numeric(inputs['cost'], errors='coerce').fillna(0).astype(np.float64),
+        })
+    return prod.dropna(subset=['period']), inp.dropna(subset=['period'])
+
+
+def allocation_rates(prod, inp, rules):
+    """Taxas de rateio por período.
+
+    Devolve ``(direct, shared, unallocated)``: ``direct`` indexado por
+    (local, período) e ``shared`` por período, ambos com custo por
+    unidade de base (``per_unit``) e, quando a base soma zero, por
+    lançamento (``per_row``); ``unallocated`` é o custo por período sem
+    nenhuma produção para absorvê-lo.
+    """
+    groups = prod.groupby(['loc', 'period'], observed=True)['basis'].agg(['sum', 'count'])
+    periods = prod.groupby('period', observed=True)['basis'].agg(['sum', 'count'])
+
+    shared_names = {name.casefold() for name in rules.shared_locations}
+    is_shared = inp['loc'].isin(shared_names)
+    if rules.unmatched_as_shared:
+        has_production = pd.MultiIndex.from_frame(inp[['loc', 'period']]).isin(groups.index)
+        is_shared |= ~has_production
+
+    direct_cost = inp[~is_shared].groupby(['loc', 'period'], observed=True)['cost'].sum()
+    shared_cost = inp[is_shared].groupby('period', observed=True)['cost'].sum()
+
+    # Custo direto de um local sem produção no período (quando não vira compartilhado)
+    orphan = direct_cost[~direct_cost.index.isin(groups.index)]
+    orphan_by_period = orphan.groupby(level='period', observed=True).sum()
+    unallocated = shared_cost[~shared_cost.index.isin(periods.index)].add(orphan_by_period, fill_value=0)
+
+    def rates(cost, totals):
+        cost = cost.reindex(totals.index, fill_value=0.0)
+        has_basis = totals['sum'] > 0
+        return pd.DataFrame({
+            'per_unit': (cost / totals['sum']).where(has_basis, 0.0),
+            'per_row': (cost / totals['count']).where(~has_basis, 0.0),
+        })
+
+    return rates(direct_cost, groups), rates(shared_cost, periods), unallocated
+
+
+def apply_rates(prod, direct, shared):
+    """Custo rateado por linha de produção a partir das taxas"""
+    direct_rows = direct.reindex(pd.MultiIndex.from_frame(prod[['loc', 'period']])).to_numpy()
+    shared_rows = shared.reindex(pd.Index(prod['period'])).to_numpy()
+    basis = prod['basis'].to_numpy()
+    allocated = (np.nan_to_num(direct_rows[:, 0]) * basis + np.nan_to_num(direct_rows[:, 1])
+                 + np.nan_to_num(shared_rows[:, 0]) * basis + np.nan_to_num(shared_rows[:, 1]))
+    return pd.Series(allocated, index=prod.index, name='allocated_cost')
+
+
+def allocate_costs(productions, inputs, rules=AllocationRules()):
+    """Custo rateado por linha de produção (sem cache).
+
+    Devolve ``(allocated, unallocated)``: uma série alinhada ao índice de
+    ``productions`` e o custo total que não pôde ser rateado.
+    """
+    if productions.empty:
+        total = inputs['cost'].sum() if not inputs.empty and 'cost' in inputs.columns else 0.0
+        return pd.Series(dtype=np.float64, name='allocated_cost'), float(total)
+    prod, inp = _prepare(productions, inputs, rules)
+    direct, shared, unallocated = allocation_rates(prod, inp, rules)
+    allocated = apply_rates(prod, direct, shared).reindex(productions.index, fill_value=0.0)
+    return allocated, float(unallocated.sum())
+
+
+def profit_by(productions, allocated, keys):
+    """Receita, custo rateado, lucro e margem agrupados por ``keys``"""
+    revenue = _basis(productions, "revenue")
+    frame = productions[keys].assign(revenue=revenue, cost=allocated.reindex(productions.index, fill_value=0.0))
+    grouped = frame.groupby(keys, observed=True)[['revenue', 'cost']].sum()
+    grouped['profit'] = grouped['revenue'] - grouped['cost']
+    grouped['margin'] = (grouped['profit'] / grouped['revenue'].where(grouped['revenue'] > 0)) * 100
+    return grouped.reset_index()
+
+
+class CostAllocator:
+    """Rateio com cache pela versão dos dados.
+
+    A chave do cache é (versão das tabelas, regras): enquanto os dados
+    não mudam, trocar filtros no dashboard só reindexa a série já
+    calculada. Mantém as ``max_entries`` combinações mais recentes, de
+    modo que regras por mês e por semana convivem no cache.
+
+    ``backend``, opcional, é um armazenamento entre processos com
+    ``load_result``/``save_result`` (ex.: ``SnapshotStore``): o primeiro
+    worker a calcular um rateio o publica para os demais.
+    """
+
+    def __init__(self, rules=AllocationRules(), max_entries=8, backend=None):
+        self.rules = rules
+        self.max_entries = max_entries
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+
+    def allocate(self, productions, inputs, version, rules=None):
+        """Como ``allocate_costs``; ``productions`` deve ser a tabela completa da ``version``"""
+        key = (version, rules or self.rules)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+        if result is None:
+            result = self._shared_allocate(productions, inputs, key)
+            with self._lock:
+                self._results[key] = result
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        return result
+
+    def _shared_allocate(self, productions, inputs, key):
+        if self.backend is None:
+            return allocate_costs(productions, inputs, key[1])
+        stored = self.backend.load_result("allocation", key)
+        if stored is not None:
+            frame, metadata = stored
+            return frame['allocated_cost'], metadata['unallocated']
+        allocated, unallocated = allocate_costs(productions, inputs, key[1])
+        self.backend.save_result("allocation", key, allocated.to_frame(), {"unallocated": unallocated})
+        return allocated, unallocated
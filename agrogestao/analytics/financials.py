@@ -0,0 +1,66 @@
+"""Cálculos financeiros sobre produção e insumos"""
+import pandas as pd
+
+
+def calculate_financials(productions_df, inputs_df, allocated_costs=None):
+    """Calcula métricas financeiras com base nos dados de produção e insumos.
+
+    Com ``allocated_costs`` (custo rateado por linha de produção, ver
+    ``agrogestao.analytics.costs``), o custo considerado é o rateado para
+    as linhas de ``productions_df``; sem ele, soma todos os insumos.
+    """
+    
+    if productions_df.empty:
+        return {
+            "total_revenue": 0,
+            "first_quality_revenue": 0,
+            "second_quality_revenue": 0,
+            "total_costs": 0,
+            "profit": 0,
+            "profit_margin": 0,
+            "avg_first_price": 0,
+            "avg_second_price": 0
+        }
+    
+    # Calcular receita com os preços registrados na produção, sem copiar o
+    # frame (ele pode ser o frame compartilhado entre as sessões)
+    def price(column):
+        if column not in productions_df.columns:
+            return pd.Series(0.0, index=productions_df.index)
+        return pd.to_numeric(productions_df[column], errors='coerce').fillna(0)
+    
+    first_price = price('first_price')
+    second_price = price('second_price')
+    
+    # Calcular receitas (float64 para não acumular erro nas somas)
+    first_revenue = productions_df['first_quality'].astype('float64') * first_price
+    second_revenue = productions_df['second_quality'].astype('float64') * second_price
+    
+    total_revenue = (first_revenue + second_revenue).sum()
+    first_quality_revenue = first_revenue.sum()
+    second_quality_revenue = second_revenue.sum()
+    
+    # Calcular preços médios
+    avg_first_price = first_price.mean() if not first_price.empty else 0
+    avg_second_price = second_price.mean() if not second_price.empty else 0
+    
+    # Calcular custos
+    if allocated_costs is not None:
+        total_costs = allocated_costs.reindex(productions_df.index, fill_value=0).sum()
+    else:
+        total_costs = inputs_df['cost'].sum() if not inputs_df.empty and 'cost' in inputs_df.columns else 0
+    
+    # Calcular lucro e margem
+    profit = total_revenue - total_costs
+    profit_margin = (profit / total_revenue * 100) if total_revenue > 0 else 0
+    
+    return {
+        "total_revenue": total_revenue,
+        "first_quality_revenue": first_quality_revenue,
+        "second_quality_revenue": second_quality_revenue,
+        "total_costs": total_costs,
+        "profit": profit,
+        "profit_margin": profit_margin,
+        "avg_first_price": avg_first_price,
+        "avg_second_price": avg_second_price
+    }
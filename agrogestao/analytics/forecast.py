@@ -0,0 +1,293 @@
+"""Previsão semanal de caixas e receita por (cultura, local).
+
+Cada série é ajustada por uma regressão linear (ridge) sobre semanas:
+intercepto, tendência, sazonalidade anual (seno/cosseno) e o clima
+médio da semana. O ajuste usa só as estatísticas suficientes XᵀX e Xᵀy
+de cada série, empilhadas em arrays 3D e resolvidas de uma vez com
+``np.linalg.solve``; linhas novas atualizam essas somas (subtraindo a
+contribuição antiga das semanas afetadas e somando a nova) sem refazer
+o histórico.
+
+Para as semanas futuras o clima é desconhecido: ele é estimado pela
+componente sazonal do próprio clima da série, que sai das mesmas
+estatísticas (as colunas de clima estão em XᵀX).
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+SERIES_KEYS = ['product', 'local']
+CLIMATE = ['temperature', 'humidity', 'rain']
+FEATURES = ['intercept', 'trend', 'season_sin', 'season_cos'] + CLIMATE
+TARGETS = ['boxes', 'revenue']
+SEASONAL = [0, 2, 3]   # intercepto + seno/cosseno: base da climatologia
+WEEKS_PER_YEAR = 52.1775
+MAX_HORIZON = 12
+MIN_WEEKS = 4
+RIDGE = 1e-3
+Z_90 = 1.645
+
+# Somas semanais: aditivas, então linhas novas entram sem recalcular o histórico
+_WEEKLY_SUMS = ['boxes', 'revenue', 'temperature_sum', 'temperature_n',
+                'humidity_sum', 'humidity_n', 'rain_sum', 'rain_n']
+
+
+def weekly_sums(df):
+    """Somas por (cultura, local, semana) de caixas, receita e clima"""
+    week = pd.to_datetime(df['date'], errors='coerce').dt.to_period('W-SUN').dt.start_time
+    first = df['first_quality'].astype(np.float64).fillna(0)
+    second = df['second_quality'].astype(np.float64).fillna(0)
+    frame = pd.DataFrame({
+        'product': df['product'].astype(str),
+        'local': df['local'].astype(str),
+        'week': week,
+        'boxes': first + second,
+        'revenue': (first * df.get('first_price', 0).astype(np.float64).fillna(0)
+                    + second * df.get('second_price', 0).astype(np.float64).fillna(0)),
+    })
+    for col in CLIMATE:
+        values = df[col].astype(np.float64) if col in df.columns else pd.Series(np.nan, index=df.index)
+        frame[f'{col}_sum'] = values.fillna(0)
+        frame[f'{col}_n'] = values.notna().astype(np.int64)
+    frame = frame.dropna(subset=['week'])
+    return frame.groupby(SERIES_KEYS + ['week'], sort=False)[_WEEKLY_SUMS].sum().reset_index()
+
+
+class ForecastModel:
+    """Estatísticas suficientes e coeficientes por série.
+
+    ``origin`` (primeira semana) e ``climate_fill`` (clima usado em
+    semanas sem medição) são fixados na construção para que as
+    atualizações incrementais somem linhas comparáveis às antigas.
+    """
+
+    def __init__(self, weekly):
+        self.origin = weekly['week'].min()
+        fill = {}
+        for col in CLIMATE:
+            n = weekly[f'{col}_n'].sum()
+            fill[col] = weekly[f'{col}_sum'].sum() / n if n else 0.0
+        self.climate_fill = fill
+        self.weekly = weekly
+        self.series = pd.MultiIndex.from_arrays([[], []], names=SERIES_KEYS)
+        k, t = len(FEATURES), len(TARGETS)
+        self.xtx = np.zeros((0, k, k))
+        self.xty = np.zeros((0, k, t))
+        self.yy = np.zeros((0, t))
+        self.n = np.zeros(0)
+        self._accumulate(weekly, sign=1.0)
+
+    def design(self, weeks, climate):
+        """Matriz de features para semanas (``DatetimeIndex``/série) e clima (n x 3)"""
+        weeks = pd.to_datetime(pd.Series(weeks)).to_numpy('datetime64[D]')
+        offset = (weeks - self.origin.to_datetime64().astype('datetime64[D]')).astype(np.int64) / 7.0
+        angle = 2 * np.pi * offset / WEEKS_PER_YEAR
+        return np.column_stack([np.ones(len(offset)), offset / WEEKS_PER_YEAR,
+                                np.sin(angle), np.cos(angle), climate])
+
+    def _rows(self, weekly):
+        climate = np.column_stack([
+            np.where(weekly[f'{col}_n'] > 0,
+                     weekly[f'{col}_sum'] / weekly[f'{col}_n'].where(weekly[f'{col}_n'] > 0, 1),
+                     self.climate_fill[col])
+            for col in CLIMATE
+        ])
+        X = self.design(weekly['week'], climate)
+        y = weekly[TARGETS].to_numpy(np.float64)
+        return X, y
+
+    def _series_codes(self, weekly):
+        """Código de série de cada linha, criando séries novas quando preciso"""
+        keys = pd.MultiIndex.from_frame(weekly[SERIES_KEYS])
+        new = keys.unique().difference(self.series)
+        if len(new):
+            self.series = self.series.append(new)
+            k, t = len(FEATURES), len(TARGETS)
+            self.xtx = np.concatenate([self.xtx, np.zeros((len(new), k, k))])
+            self.xty = np.concatenate([self.xty, np.zeros((len(new), k, t))])
+            self.yy = np.concatenate([self.yy, np.zeros((len(new), t))])
+            self.n = np.concatenate([self.n, np.zeros(len(new))])
+        return self.series.get_indexer(keys)
+
+    def _accumulate(self, weekly, sign):
+        if weekly.empty:
+            return
+        codes = self._series_codes(weekly)
+        X, y = self._rows(weekly)
+        np.add.at(self.xtx, codes, sign * np.einsum('ni,nj->nij', X, X))
+        np.add.at(self.xty, codes, sign * np.einsum('ni,nt->nit', X, y))
+        np.add.at(self.yy, codes, sign * y * y)
+        np.add.at(self.n, codes, sign)
+
+    def add_rows(self, new_rows):
+        """Incorpora linhas de produção novas (atualização incremental)"""
+        new_weekly = weekly_sums(new_rows)
+        if new_weekly.empty:
+            return
+        keys = SERIES_KEYS + ['week']
+        affected = pd.MultiIndex.from_frame(new_weekly[keys])
+        in_old = pd.MultiIndex.from_frame(self.weekly[keys]).isin(affected)
+        old = self.weekly[in_old]
+        merged = (pd.concat([old, new_weekly], ignore_index=True)
+                  .groupby(keys, sort=False)[_WEEKLY_SUMS].sum().reset_index())
+        # Semanas afetadas: sai a contribuição antiga, entra a recalculada
+        self._accumulate(old, sign=-1.0)
+        self._accumulate(merged, sign=1.0)
+        self.weekly = pd.concat([self.weekly[~in_old], merged], ignore_index=True)
+
+    def coefficients(self):
+        """Coeficientes por série (s x k x alvos) e variância residual (s x alvos)"""
+        k = len(FEATURES)
+        penalty = RIDGE * np.eye(k)
+        penalty[0, 0] = 0.0
+        # Escala do ridge proporcional ao número de semanas da série
+        A = self.xtx + penalty[None] * np.maximum(self.n, 1)[:, None, None]
+        beta = np.linalg.solve(A, self.xty)
+        fitted = np.einsum('skt,skt->st', beta, self.xty)
+        quad = np.einsum('skt,skj,sjt->st', beta, self.xtx, beta)
+        sse = np.maximum(self.yy - 2 * fitted + quad, 0)
+        dof = np.maximum(self.n - k, 1)
+        return beta, sse / dof[:, None]
+
+    def seasonal_climate(self):
+        """Clima sazonal por série (s x 3 x 3): base [1, seno, cosseno] -> clima"""
+        S = np.array(SEASONAL)
+        climate_cols = np.arange(len(FEATURES) - len(CLIMATE), len(FEATURES))
+        A = self.xtx[:, S[:, None], S] + RIDGE * np.eye(len(S))[None]
+        b = self.xtx[:, S[:, None], climate_cols]
+        return np.linalg.solve(A, b)
+
+    def forecast(self, start_week, horizon=MAX_HORIZON):
+        """Previsão das ``horizon`` semanas a partir de ``start_week`` para cada série"""
+        usable = self.n >= MIN_WEEKS
+        if not usable.any():
+            return pd.DataFrame(columns=SERIES_KEYS + ['week', 'weeks_observed']
+                                + [f'{t}{s}' for t in TARGETS for s in ('', '_low', '_high')])
+        beta, variance = self.coefficients()
+        seasonal = self.seasonal_climate()
+        weeks = pd.date_range(start_week, periods=horizon, freq='7D')
+        base = self.design(weeks, np.zeros((horizon, len(CLIMATE))))
+
+        series = np.flatnonzero(usable)
+        # Clima previsto: componente sazonal de cada série (s x h x 3)
+        climate = np.einsum('hk,skc->shc', base[:, SEASONAL], seasonal[series])
+        X = np.repeat(base[None], len(series), axis=0)
+        X[:, :, -len(CLIMATE):] = climate
+        prediction = np.einsum('shk,skt->sht', X, beta[series])
+        spread = Z_90 * np.sqrt(variance[series])[:, None, :]
+
+        keys = self.series[series]
+        frame = pd.DataFrame({
+            'product': np.repeat(keys.get_level_values('product'), horizon),
+            'local': np.repeat(keys.get_level_values('local'), horizon),
+            'week': np.tile(weeks, len(series)),
+            'weeks_observed': np.repeat(self.n[series].astype(int), horizon),
+        })
+        for i, target in enumerate(TARGETS):
+            value = prediction[:, :, i].ravel()
+            band = np.repeat(spread[:, 0, i], horizon)
+            frame[target] = np.maximum(value, 0)
+            frame[f'{target}_low'] = np.maximum(value - band, 0)
+            frame[f'{target}_high'] = np.maximum(value + band, 0)
+        return frame
+
+
+class ForecastEngine:
+    """Modelos mantidos entre execuções e atualizados de forma incremental.
+
+    Como o ``ClimateFeatureCache``: linhas com ``created_at`` posterior à
+    última vista entram por ``add_rows``; exclusões ou edições forçam a
+    reconstrução.
+    """
+
+    def __init__(self, horizon=MAX_HORIZON):
+        self.horizon = horizon
+        self._lock = threading.Lock()
+        self.model = None
+        self._rows = 0
+        self._last_created = None
+
+    def update(self, productions_df):
+        """Atualiza os modelos e devolve a previsão a partir da semana seguinte à última registrada"""
+        with self._lock:
+            if productions_df.empty or 'date' not in productions_df.columns:
+                return pd.DataFrame()
+            created = productions_df['created_at'] if 'created_at' in productions_df.columns else None
+            if created is not None and not pd.api.types.is_datetime64_any_dtype(created):
+                created = pd.to_datetime(created, errors='coerce', format='ISO8601', utc=True)
+            last_created = created.max() if created is not None else None
+
+            new_rows = None
+            if self.model is not None and created is not None and self._last_created is not None:
+                is_new = created > self._last_created
+                if len(productions_df) - int(is_new.sum()) == self._rows:
+                    new_rows = productions_df[is_new]
+
+            if new_rows is None:
+                self.model = ForecastModel(weekly_sums(productions_df))
+            elif not new_rows.empty:
+                self.model.add_rows(new_rows)
+            self._rows = len(productions_df)
+            self._last_created = last_created
+
+            if self.model.weekly.empty:
+                return pd.DataFrame()
+            start = self.model.weekly['week'].max() + pd.Timedelta(days=7)
+            return self.model.forecast(start, self.horizon)
+
+
+class BackgroundForecaster(threading.Thread):
+    """Executa o ``ForecastEngine`` fora da renderização das páginas.
+
+    ``submit(df, version)`` agenda o cálculo (só o pedido mais recente é
+    atendido); ``result()`` devolve a última previsão pronta, que pode
+    ser de uma versão anterior enquanto a nova é calculada.
+    """
+
+    def __init__(self, engine=None):
+        super().__init__(name="forecast", daemon=True)
+        self.engine = engine or ForecastEngine()
+        self.last_error = None
+        self._condition = threading.Condition()
+        self._request = None
+        self._result = (pd.DataFrame(), None, None)
+        self._busy = False
+
+    def submit(self, productions_df, version):
+        with self._condition:
+            if version is not None and version in (self._result[1], self._request and self._request[1]):
+                return
+            self._request = (productions_df, version)
+            self._condition.notify()
+
+    @property
+    def pending(self):
+        """Há cálculo agendado ou em andamento"""
+        with self._condition:
+            return self._busy or self._request is not None
+
+    def result(self):
+        """``(previsão, versão, instante do cálculo)`` mais recentes"""
+        with self._condition:
+            return self._result
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._request is None:
+                    self._condition.wait()
+                productions_df, version = self._request
+                self._request = None
+                self._busy = True
+            try:
+                forecast = self.engine.update(productions_df)
+                self.last_error = None
+                with self._condition:
+                    self._result = (forecast, version, time.time())
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                with self._condition:
+                    self._busy = False
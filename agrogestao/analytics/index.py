@@ -0,0 +1,117 @@
+"""Índices em memória para os filtros de período, local e cultura.
+
+O ``IndexedFrame`` guarda as linhas ordenadas por data, o array de dias
+(inteiros) para busca binária e, para cada coluna indexada, um índice
+invertido valor -> posições (ordenadas). Um filtro vira duas buscas
+binárias no array de dias, um recorte das listas de posições de cada
+valor escolhido e a interseção entre colunas — sem comparar todas as
+linhas a cada rerun.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+INDEX_KEYS = ('local', 'product')
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _day_number(value):
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def _postings(values):
+    """Índice invertido: valor -> posições (crescentes) em que aparece"""
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # Códigos -1 (valores ausentes) ficam no início da ordenação
+    splits = np.split(order[(codes < 0).sum():], np.cumsum(counts)[:-1])
+    return dict(zip(list(uniques), splits))
+
+
+class IndexedFrame:
+    """Frame ordenado por data com índice de intervalo e índices invertidos.
+
+    Linhas sem data válida são descartadas; os rótulos do índice original
+    são preservados (o rateio de custos continua alinhando por eles).
+    """
+
+    def __init__(self, df, date_column='date', keys=INDEX_KEYS):
+        dates = pd.to_datetime(df[date_column], errors='coerce')
+        valid = dates.notna().to_numpy()
+        days = dates[valid].to_numpy('datetime64[D]').astype(np.int64)
+        order = np.argsort(days, kind='stable')
+        self.frame = df[valid].iloc[order]
+        self.days = days[order]
+        self.postings = {key: _postings(self.frame[key]) for key in keys if key in df.columns}
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def min_date(self):
+        return pd.Timestamp(np.datetime64(int(self.days[0]), 'D')).date() if len(self) else None
+
+    @property
+    def max_date(self):
+        return pd.Timestamp(np.datetime64(int(self.days[-1]), 'D')).date() if len(self) else None
+
+    def positions(self, start_date=None, end_date=None, **filters):
+        """Posições (em ``frame``) das linhas no período e com os valores escolhidos.
+
+        Cada filtro é ``coluna=[valores]``; lista vazia ou ``None`` não filtra.
+        Devolve um ``slice`` quando só o período restringe.
+        """
+        lo = 0 if start_date is None else int(np.searchsorted(self.days, _day_number(start_date), 'left'))
+        hi = len(self) if end_date is None else int(np.searchsorted(self.days, _day_number(end_date), 'right'))
+        result = None
+        for key, values in filters.items():
+            if values is None or len(values) == 0:
+                continue
+            postings = self.postings[key]
+            # As posições seguem a ordem das datas: o período é um recorte de cada lista
+            parts = []
+            for value in values:
+                positions = postings.get(value, _EMPTY)
+                parts.append(positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)])
+            matched = np.sort(np.concatenate(parts)) if parts else _EMPTY
+            result = matched if result is None else np.intersect1d(result, matched, assume_unique=True)
+        return slice(lo, hi) if result is None else result
+
+    def select(self, start_date=None, end_date=None, **filters):
+        """Linhas do período com os filtros por coluna (ver ``positions``)"""
+        return self.frame.iloc[self.positions(start_date, end_date, **filters)]
+
+    def filter(self, start_date, end_date, locations=None, products=None):
+        """Equivalente indexado de ``filter_productions``"""
+        return self.select(start_date, end_date, local=locations, product=products)
+
+
+class FrameIndexCache:
+    """``IndexedFrame`` por versão dos dados, compartilhado entre as sessões.
+
+    Como o ``CostAllocator``, a chave é a versão da tabela: o índice é
+    construído uma vez por carga/gravação e reutilizado a cada rerun.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+
+    def get(self, df, version, **kwargs):
+        """Índice de ``df``; ``df`` deve ser a tabela completa da ``version``"""
+        key = (version, tuple(sorted(kwargs.items())))
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = IndexedFrame(df, **kwargs)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
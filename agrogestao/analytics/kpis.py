@@ -0,0 +1,196 @@
+"""Séries de KPI por período (mês ou semana), local e cultura.
+
+Guarda somas aditivas por (local, cultura, período) — receita, custo
+rateado, caixas e caixas de 1ª — e deriva lucro, margem e participação
+da 1ª qualidade, com variação sobre o período anterior (``_pop``) e sobre
+o mesmo período do ano anterior (``_yoy``). Comparações nas páginas
+viram consultas a essas séries em vez de novas passagens pelas linhas.
+
+O rateio de custos de um período só depende das produções e insumos
+daquele período (ver ``costs``), então linhas novas recalculam apenas
+os períodos que elas tocam.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from agrogestao.analytics.costs import AllocationRules, allocate_costs
+
+KEYS = ['local', 'product']
+SUMS = ['revenue', 'cost', 'boxes', 'first_boxes', 'rows']
+# Métricas em valor (variação em %) e em percentual (variação em pontos)
+VALUE_METRICS = ['revenue', 'cost', 'profit', 'boxes']
+RATE_METRICS = ['margin', 'first_share']
+PERIODS_PER_YEAR = {"M": 12, "W": 52}
+
+
+def _dates(df):
+    # to_datetime em coluna já convertida (compact_frame) ainda percorre os valores
+    if pd.api.types.is_datetime64_any_dtype(df['date']):
+        return df['date']
+    return pd.to_datetime(df['date'], errors='coerce')
+
+
+def period_sums(productions, inputs, rules=AllocationRules()):
+    """Somas por (local, cultura, período) com o custo rateado pelas ``rules``"""
+    if productions.empty:
+        return pd.DataFrame(columns=KEYS + ['period'] + SUMS)
+    allocated, _ = allocate_costs(productions, inputs, rules)
+    first = productions['first_quality'].astype(np.float64).fillna(0)
+    second = productions['second_quality'].astype(np.float64).fillna(0)
+    frame = pd.DataFrame({
+        'local': productions['local'].astype(str),
+        'product': productions['product'].astype(str),
+        'period': _dates(productions).dt.to_period(rules.period),
+        'revenue': (first * productions.get('first_price', 0).astype(np.float64).fillna(0)
+                    + second * productions.get('second_price', 0).astype(np.float64).fillna(0)),
+        'cost': allocated.reindex(productions.index, fill_value=0.0).astype(np.float64),
+        'boxes': first + second,
+        'first_boxes': first,
+        'rows': 1,
+    })
+    frame = frame.dropna(subset=['period'])
+    return frame.groupby(KEYS + ['period'], sort=False)[SUMS].sum().reset_index()
+
+
+def with_deltas(sums, keys, freq):
+    """Métricas derivadas e variações ``_pop``/``_yoy`` das somas agrupadas por ``keys``"""
+    frame = sums.sort_values(keys + ['period']).reset_index(drop=True)
+    frame['profit'] = frame['revenue'] - frame['cost']
+    revenue = frame['revenue'].where(frame['revenue'] > 0)
+    frame['margin'] = frame['profit'] / revenue * 100
+    frame['first_share'] = frame['first_boxes'] / frame['boxes'].where(frame['boxes'] > 0) * 100
+
+    # Período anterior por aritmética de Period (lacunas não viram vizinhos)
+    current = pd.MultiIndex.from_frame(frame[keys + ['period']])
+    for suffix, lag in (('pop', 1), ('yoy', PERIODS_PER_YEAR[freq])):
+        previous = pd.MultiIndex.from_frame(frame[keys].assign(period=frame['period'] - lag))
+        positions = current.get_indexer(previous)
+        found = positions >= 0
+        for metric in VALUE_METRICS + RATE_METRICS:
+            values = frame[metric].to_numpy(np.float64)
+            before = np.where(found, values[positions], np.nan)
+            if metric in RATE_METRICS:
+                delta = values - before
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    delta = np.where(before != 0, (values - before) / np.abs(before) * 100, np.nan)
+            frame[f'{metric}_{suffix}'] = delta
+    return frame
+
+
+def _new_rows(df, seen):
+    """Linhas criadas depois das já vistas; ``None`` se houve exclusão ou edição"""
+    if seen is None or 'created_at' not in df.columns:
+        return None, None
+    created = df['created_at']
+    if not pd.api.types.is_datetime64_any_dtype(created):
+        created = pd.to_datetime(created, errors='coerce', format='ISO8601', utc=True)
+    rows, last_created = seen
+    state = (len(df), created.max())
+    if state == seen:
+        return df.iloc[:0], state
+    if last_created is None or pd.isna(last_created):
+        return None, state
+    is_new = created > last_created
+    if len(df) - int(is_new.sum()) != rows:
+        return None, state
+    return df[is_new], state
+
+
+def _seen(df):
+    if 'created_at' not in df.columns or df.empty:
+        return (len(df), None)
+    created = df['created_at']
+    if not pd.api.types.is_datetime64_any_dtype(created):
+        created = pd.to_datetime(created, errors='coerce', format='ISO8601', utc=True)
+    return (len(df), created.max())
+
+
+class KpiSeries:
+    """Séries de KPI mantidas entre execuções e atualizadas de forma incremental.
+
+    Como o ``ClimateFeatureCache``: linhas com ``created_at`` posterior à
+    última vista (em produções ou insumos) recalculam só os seus
+    períodos; exclusões ou edições forçam a reconstrução.
+    """
+
+    def __init__(self, rules=AllocationRules()):
+        self.rules = rules
+        self.freq = rules.period
+        self._lock = threading.Lock()
+        self._sums = None
+        self._series = pd.DataFrame()
+        self._productions_seen = None
+        self._inputs_seen = None
+
+    @property
+    def sums(self):
+        return self._sums if self._sums is not None else pd.DataFrame(columns=KEYS + ['period'] + SUMS)
+
+    def update(self, productions, inputs):
+        """Atualiza as séries para as tabelas completas informadas e as devolve"""
+        with self._lock:
+            new_productions, productions_seen = _new_rows(productions, self._productions_seen)
+            new_inputs, inputs_seen = _new_rows(inputs, self._inputs_seen)
+            if self._sums is None or new_productions is None or new_inputs is None:
+                self._sums = period_sums(productions, inputs, self.rules)
+            elif not new_productions.empty or not new_inputs.empty:
+                self._sums = self._refresh(productions, inputs, new_productions, new_inputs)
+            else:
+                return self._series
+            self._productions_seen = productions_seen or _seen(productions)
+            self._inputs_seen = inputs_seen or _seen(inputs)
+            self._series = with_deltas(self._sums, KEYS, self.freq)
+            return self._series
+
+    def _periods(self, df):
+        if df.empty or 'date' not in df.columns:
+            return pd.Series(dtype=object)
+        return _dates(df).dt.to_period(self.freq)
+
+    @staticmethod
+    def _within(df, periods):
+        """Linhas de ``df`` nos ``periods`` (comparando datas, sem converter a coluna inteira)"""
+        if df.empty or 'date' not in df.columns:
+            return df
+        dates = _dates(df)
+        mask = np.zeros(len(df), dtype=bool)
+        for period in periods:
+            mask |= ((dates >= period.start_time) & (dates <= period.end_time)).to_numpy()
+        return df[mask]
+
+    def _refresh(self, productions, inputs, new_productions, new_inputs):
+        touched = pd.concat([self._periods(new_productions), self._periods(new_inputs)]).dropna().unique()
+        refreshed = period_sums(self._within(productions, touched), self._within(inputs, touched), self.rules)
+        kept = self._sums[~self._sums['period'].isin(touched)]
+        return pd.concat([kept, refreshed], ignore_index=True)
+
+    def totals(self, locations=None, products=None, by=()):
+        """Série agregada para os locais/culturas selecionados (todos, se vazio)"""
+        sums = self.sums
+        if locations:
+            sums = sums[sums['local'].isin([str(x) for x in locations])]
+        if products:
+            sums = sums[sums['product'].isin([str(x) for x in products])]
+        keys = list(by)
+        grouped = sums.groupby(keys + ['period'], sort=False)[SUMS].sum().reset_index()
+        return with_deltas(grouped, keys, self.freq)
+
+
+def latest_period(series, start_date, end_date):
+    """Última linha da série dentro do intervalo de datas, ou ``None``"""
+    if series.empty:
+        return None
+    starts = series['period'].dt.start_time
+    in_range = series[(starts <= pd.Timestamp(end_date))
+                      & (series['period'].dt.end_time >= pd.Timestamp(start_date))]
+    return None if in_range.empty else in_range.iloc[-1]
+
+
+def period_label(period):
+    """Rótulo do período para exibição: ``03/2024`` ou ``sem. 04/03/2024``"""
+    if period.freqstr.startswith("W"):
+        return f"sem. {period.start_time:%d/%m/%Y}"
+    return f"{period.start_time:%m/%Y}"
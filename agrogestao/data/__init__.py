@@ -0,0 +1,29 @@
+"""Camada de dados: Supabase, outbox local e cache das tabelas"""
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN, Outbox, OutboxFlusher, PermanentError
+from agrogestao.data.result_cache import ResultCache, canonical_key
+from agrogestao.data.service import DataService
+from agrogestao.data.table_cache import (
+    SYNC_COLUMN,
+    SYNC_CONFIRMED,
+    SYNC_PENDING,
+    VERSION_ATTR,
+    TableCache,
+)
+from agrogestao.data.weather_store import WeatherBackfill, WeatherStore
+
+__all__ = [
+    "DataService",
+    "IDEMPOTENCY_COLUMN",
+    "Outbox",
+    "OutboxFlusher",
+    "PermanentError",
+    "ResultCache",
+    "SYNC_COLUMN",
+    "SYNC_CONFIRMED",
+    "SYNC_PENDING",
+    "TableCache",
+    "VERSION_ATTR",
+    "WeatherBackfill",
+    "WeatherStore",
+    "canonical_key",
+]
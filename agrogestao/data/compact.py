@@ -0,0 +1,99 @@
+"""Representação compacta das tabelas em memória.
+
+Os frames ficam em cache uma vez por processo e são compartilhados por
+todas as sessões; aqui eles são reduzidos antes de entrar no cache:
+textos repetidos viram categorias (dicionário + códigos inteiros),
+números são reduzidos ao menor tipo sem perda relevante, datas são
+convertidas uma única vez e o blob ``weather_data`` é descartado.
+"""
+import pandas as pd
+
+CATEGORY_COLUMNS = {
+    "productions": ['local', 'product'],
+    "inputs": ['type', 'description', 'unit', 'location'],
+    "weather_observations": ['city', 'description', 'country', 'icon'],
+}
+# Quantidades e clima toleram float32; valores monetários continuam float64
+FLOAT32_COLUMNS = {
+    "productions": ['first_quality', 'second_quality', 'temperature', 'humidity', 'rain'],
+    "inputs": ['quantity'],
+    "weather_observations": ['temperature', 'humidity', 'rain'],
+}
+FLOAT64_COLUMNS = {
+    "productions": ['first_price', 'second_price'],
+    "inputs": ['cost'],
+}
+# ``created_at`` mistura carimbos do servidor (com fuso) e locais (sem fuso)
+DATETIME_COLUMNS = {'date': False, 'created_at': True, 'observed_at': True}
+# Colunas que nenhuma página lê e que ocupam muito espaço por linha
+# (``weather_data`` só existe em bancos ainda sem a migração 0002)
+DROPPED_COLUMNS = {
+    "productions": ['weather_data'],
+}
+
+
+def compact_frame(table, df):
+    """Devolve o frame com tipos compactos (não altera o original)"""
+    if df.empty:
+        return df
+    df = df.drop(columns=DROPPED_COLUMNS.get(table, []), errors='ignore')
+    columns = {}
+    for col in CATEGORY_COLUMNS.get(table, []):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = df[col].astype('category')
+    for col in FLOAT32_COLUMNS.get(table, []):
+        if col in df.columns:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in FLOAT64_COLUMNS.get(table, []):
+        if col in df.columns:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col, utc in DATETIME_COLUMNS.items():
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            columns[col] = pd.to_datetime(df[col], errors='coerce', format='ISO8601', utc=utc)
+    if 'id' in df.columns and pd.api.types.is_numeric_dtype(df['id']) and df['id'].notna().all():
+        columns['id'] = pd.to_numeric(df['id'], downcast='integer')
+    return df.assign(**columns)
+
+
+def concat_compact(frames):
+    """Concatena frames compactos preservando as colunas categóricas.
+
+    ``pd.concat`` só mantém uma categoria se os dicionários forem
+    idênticos; aqui eles são unificados antes, evitando que uma linha
+    nova transforme a coluna inteira de volta em ``object``.
+    """
+    frames = [f for f in frames if not f.empty]
+    if len(frames) <= 1:
+        return frames[0] if frames else pd.DataFrame()
+    all_columns = frames[0].columns
+    for f in frames[1:]:
+        all_columns = all_columns.union(f.columns, sort=False)
+    for col in all_columns:
+        dtypes = [f[col].dtype for f in frames if col in f.columns]
+        if not any(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            continue
+        categories = pd.Index([])
+        for f in frames:
+            if col in f.columns:
+                values = f[col].cat.categories if isinstance(f[col].dtype, pd.CategoricalDtype) \
+                    else pd.Index(f[col].dropna().unique())
+                categories = categories.append(values.difference(categories))
+        dtype = pd.CategoricalDtype(categories)
+        frames = [f.assign(**{col: f[col].astype(dtype)}) if col in f.columns else f for f in frames]
+    return pd.concat(frames, ignore_index=True)[all_columns]
+
+
+def memory_report(frames):
+    """Uso de memória por tabela e coluna (bytes, incluindo objetos Python)"""
+    rows = []
+    for table, df in frames.items():
+        usage = df.memory_usage(deep=True, index=True)
+        for col, size in usage.items():
+            rows.append({
+                'table': table,
+                'column': col,
+                'dtype': str(df[col].dtype) if col in df.columns else 'index',
+                'bytes': int(size),
+                'rows': len(df),
+            })
+    return pd.DataFrame(rows, columns=['table', 'column', 'dtype', 'bytes', 'rows'])
@@ -0,0 +1,292 @@
+"""Outbox local (write-ahead) para gravações offline-first.
+
+Cada registro digitado é anexado imediatamente a um journal em disco
+(JSON Lines, somente-anexo) e um flusher em background drena o journal
+para o Supabase em lotes, com backoff exponencial e chave de
+idempotência, para que nada seja inserido duas vezes.
+
+Lotes recusados de forma definitiva pelo servidor (``PermanentError``,
+ex.: linha inválida ou migração faltando) não são reenviados: as linhas
+recusadas vão para um journal de rejeitados (``*.dead.jsonl``) com o
+erro, e as demais seguem normalmente.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from agrogestao.config import DATA_DIR, WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+# Um journal por worker: cada arquivo tem um único processo escrevendo
+DEFAULT_OUTBOX_PATH = os.path.join(DATA_DIR, f"outbox-{WORKER_ID}.jsonl" if WORKER_ID else "outbox.jsonl")
+IDEMPOTENCY_COLUMN = "idempotency_key"
+
+
+class PermanentError(Exception):
+    """Envio recusado pelo servidor; repetir o mesmo lote não adianta"""
+
+
+def dead_letter_path(path):
+    """Journal de rejeitados que acompanha o outbox em ``path``"""
+    root, _ = os.path.splitext(path)
+    return f"{root}.dead.jsonl"
+
+
+class Outbox:
+    """Journal somente-anexo de registros pendentes de envio.
+
+    O journal guarda três tipos de linha: ``put`` (registro novo),
+    ``ack`` (registro confirmado no banco) e ``dead`` (registro recusado,
+    já copiado para o journal de rejeitados). Ao abrir, o journal é
+    reproduzido para reconstruir a fila de pendentes; quando a fila
+    esvazia, o arquivo é compactado (truncado).
+    """
+
+    def __init__(self, path=DEFAULT_OUTBOX_PATH, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._dead = OrderedDict()
+        self.dead_path = dead_letter_path(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._dead_file = open(self.dead_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _read_lines(path):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Última linha truncada por queda de energia/processo
+                    continue
+
+    def _replay(self):
+        for entry in self._read_lines(self.dead_path):
+            self._dead[entry["key"]] = entry
+        for entry in self._read_lines(self.path):
+            if entry.get("op") == "put":
+                self._pending[entry["key"]] = entry
+            elif entry.get("op") in ("ack", "dead"):
+                self._pending.pop(entry["key"], None)
+        # Queda entre gravar o rejeitado e marcá-lo no journal: vale o rejeitado
+        for key in self._dead:
+            self._pending.pop(key, None)
+
+    def _write(self, file, entries):
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+
+    def _append(self, entries):
+        self._write(self._file, entries)
+
+    def put(self, table, row, key=None):
+        """Grava um registro no journal e devolve sua chave de idempotência.
+
+        ``key`` permite uma chave natural (ex.: id determinístico da
+        observação climática); registrar a mesma chave duas vezes mantém
+        um único pendente.
+        """
+        key = key or uuid.uuid4().hex
+        row = dict(row, **{IDEMPOTENCY_COLUMN: key})
+        entry = {
+            "op": "put",
+            "key": key,
+            "table": table,
+            "row": row,
+            "queued_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self._append([entry])
+            self._pending[key] = entry
+        return key
+
+    def ack(self, keys):
+        """Marca registros como confirmados no banco"""
+        with self._lock:
+            acked = [{"op": "ack", "key": k} for k in keys if k in self._pending]
+            if not acked:
+                return
+            self._append(acked)
+            for entry in acked:
+                del self._pending[entry["key"]]
+            if not self._pending:
+                self._compact()
+
+    def reject(self, errors):
+        """Move para o journal de rejeitados os registros recusados (``{chave: erro}``)"""
+        with self._lock:
+            entries = [dict(self._pending[k], error=str(error), rejected_at=datetime.now().isoformat())
+                       for k, error in errors.items() if k in self._pending]
+            if not entries:
+                return
+            # Primeiro a cópia com o erro, depois a marca no journal
+            self._write(self._dead_file, entries)
+            self._append([{"op": "dead", "key": e["key"]} for e in entries])
+            for entry in entries:
+                del self._pending[entry["key"]]
+                self._dead[entry["key"]] = entry
+            if not self._pending:
+                self._compact()
+
+    def dead_letters(self, table=None):
+        """Registros recusados pelo servidor, com ``error`` e ``rejected_at``"""
+        with self._lock:
+            entries = list(self._dead.values())
+        if table is not None:
+            entries = [e for e in entries if e["table"] == table]
+        return entries
+
+    def requeue_dead(self):
+        """Devolve os rejeitados à fila (ex.: depois de aplicar a migração que faltava)"""
+        with self._lock:
+            entries = [{k: v for k, v in e.items() if k not in ("error", "rejected_at")}
+                       for e in self._dead.values()]
+            if not entries:
+                return 0
+            self._append(entries)
+            for entry in entries:
+                self._pending[entry["key"]] = entry
+            self._dead.clear()
+            self._dead_file.truncate(0)
+            self._dead_file.seek(0)
+            return len(entries)
+
+    def _compact(self):
+        # Nada pendente: o histórico do journal pode ser descartado
+        self._file.truncate(0)
+        self._file.seek(0)
+
+    def pending(self, table=None):
+        """Lista os registros ainda não confirmados, em ordem de gravação"""
+        with self._lock:
+            entries = list(self._pending.values())
+        if table is not None:
+            entries = [e for e in entries if e["table"] == table]
+        return entries
+
+    def __contains__(self, key):
+        return key in self._pending
+
+    def __len__(self):
+        return len(self._pending)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._dead_file.close()
+
+
+class OutboxFlusher(threading.Thread):
+    """Thread que drena o outbox para o backend em lotes.
+
+    ``send_batch(table, rows)`` deve gravar os registros de forma
+    idempotente (upsert pela chave de idempotência) e levantar exceção
+    em caso de falha; o lote é então reenviado com backoff exponencial.
+    ``PermanentError`` indica recusa definitiva: o lote é dividido ao
+    meio até isolar as linhas recusadas, que vão para os rejeitados do
+    outbox (``on_rejected(table, keys)`` é chamado), e o resto é enviado.
+
+    ``table_order`` lista tabelas enviadas antes das demais, para que
+    linhas referenciadas por chave estrangeira cheguem primeiro.
+    """
+
+    def __init__(self, outbox, send_batch, batch_size=50, base_delay=1.0,
+                 max_delay=60.0, on_flushed=None, on_rejected=None, table_order=()):
+        super().__init__(name="outbox-flusher", daemon=True)
+        self.outbox = outbox
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_flushed = on_flushed
+        self.on_rejected = on_rejected
+        self.table_order = tuple(table_order)
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        """Solicita um flush imediato (chamado após cada gravação local)"""
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def flush_once(self):
+        """Envia um lote por tabela; devolve o número de registros confirmados"""
+        pending = self.outbox.pending()
+        by_table = OrderedDict((table, []) for table in self.table_order)
+        for entry in pending:
+            batch = by_table.setdefault(entry["table"], [])
+            if len(batch) < self.batch_size:
+                batch.append(entry)
+
+        flushed = 0
+        for table, entries in by_table.items():
+            if not entries:
+                continue
+            sent, rejected = self._send(table, entries)
+            if rejected:
+                logger.error("%d registro(s) de %s recusados pelo servidor: %s",
+                             len(rejected), table, next(iter(rejected.values())))
+                self.outbox.reject(rejected)
+                if self.on_rejected is not None:
+                    self.on_rejected(table, list(rejected))
+            keys = [e["key"] for e in sent]
+            if keys:
+                self.outbox.ack(keys)
+                flushed += len(keys)
+                if self.on_flushed is not None:
+                    self.on_flushed(table, keys)
+        return flushed
+
+    def _send(self, table, entries):
+        """Envia ``entries``; devolve ``(enviadas, {chave: erro} das recusadas)``.
+
+        Falhas transitórias propagam (o lote inteiro é repetido depois).
+        """
+        try:
+            self.send_batch(table, [e["row"] for e in entries])
+            return entries, {}
+        except PermanentError as e:
+            if len(entries) == 1:
+                return [], {entries[0]["key"]: e}
+        middle = len(entries) // 2
+        sent_first, rejected_first = self._send(table, entries[:middle])
+        sent_second, rejected_second = self._send(table, entries[middle:])
+        return sent_first + sent_second, {**rejected_first, **rejected_second}
+
+    def run(self):
+        delay = self.base_delay
+        while not self._stopping.is_set():
+            if not len(self.outbox):
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                self.flush_once()
+                self.last_error = None
+                delay = self.base_delay
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Falha ao enviar outbox, nova tentativa em %.0fs: %s", delay, e)
+                self._wake.wait(delay)
+                self._wake.clear()
+                delay = min(delay * 2, self.max_delay)
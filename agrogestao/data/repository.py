@@ -0,0 +1,244 @@
+"""Acesso ao Supabase (sem dependência do Streamlit).
+
+As funções levantam exceção em caso de falha; cabe à camada de
+interface decidir como exibir o erro.
+"""
+import functools
+import hashlib
+import uuid
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from agrogestao.config import SUPABASE_KEY, SUPABASE_URL
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN, PermanentError
+
+NUMERIC_COLUMNS = {
+    "productions": ['first_quality', 'second_quality', 'first_price', 'second_price',
+                    'temperature', 'humidity', 'rain'],
+    "inputs": ['quantity', 'cost'],
+    "weather_observations": ['temperature', 'humidity', 'rain'],
+}
+WEATHER_TABLE = "weather_observations"
+# Colunas pesquisáveis (ilike) e ordenáveis no navegador de registros;
+# cada ordenação tem índice (coluna, id) na migração 0003
+SEARCH_COLUMNS = {
+    "productions": ['local', 'product'],
+    "inputs": ['type', 'description', 'location'],
+}
+SORT_COLUMNS = {
+    "productions": ['created_at', 'date', 'local', 'product'],
+    "inputs": ['created_at', 'date', 'type', 'cost'],
+}
+DELETE_BATCH_SIZE = 100
+# Status HTTP que o PostgREST devolve por código de erro (SQLSTATE ou PGRST);
+# prefixos mais longos primeiro, o resto é 400
+ERROR_STATUS = [
+    ("23503", 409), ("23505", 409), ("25006", 405), ("42883", 404), ("42P01", 404),
+    ("42P17", 500), ("42501", 403), ("P0001", 400), ("PGRST0", 503), ("PGRST3", 401),
+    ("08", 503), ("09", 500), ("0L", 403), ("0P", 403), ("25", 500), ("28", 403),
+    ("2D", 500), ("38", 500), ("39", 500), ("3B", 500), ("40", 500), ("53", 503),
+    ("54", 503), ("55", 500), ("57", 500), ("58", 500), ("F0", 500), ("HV", 500),
+    ("P0", 500), ("XX", 500),
+]
+# Erros do cliente que podem passar se repetidos (timeout, limite de taxa)
+RETRYABLE_STATUS = {408, 429}
+
+
+@functools.lru_cache(maxsize=None)
+def create_supabase_client(url=SUPABASE_URL, key=SUPABASE_KEY):
+    """Cria o cliente do Supabase uma vez por processo"""
+    # Import tardio: o SDK do Supabase é pesado e só é necessário com rede
+    from supabase import create_client
+    return create_client(url, key)
+
+
+def check_connection(client):
+    """Testa a conexão buscando uma linha da tabela de produções"""
+    client.table("productions").select("id").limit(1).execute()
+
+
+def fetch_table(client, table):
+    """Busca a tabela completa, mais recentes primeiro, com colunas numéricas convertidas"""
+    result = client.table(table).select("*").order("created_at", desc=True).execute()
+    df = pd.DataFrame(result.data if hasattr(result, 'data') else [])
+    if not df.empty:
+        for col in NUMERIC_COLUMNS.get(table, []):
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def _quote(value):
+    """Valor entre aspas para filtros do PostgREST (vírgulas, parênteses, pontos)"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def fetch_page(client, table, sort="created_at", desc=True, search=None, cursor=None, limit=50):
+    """Uma página da tabela, com paginação por cursor (keyset) em vez de offset.
+
+    ``cursor`` é o ``(valor da coluna de ordenação, id)`` da última linha
+    da página anterior; a consulta continua a partir dele pelo índice
+    (coluna, id), sem contar as linhas já vistas. Valores nulos da
+    coluna vêm no fim. Devolve ``(frame, próximo cursor ou None)``.
+    """
+    if sort not in SORT_COLUMNS[table]:
+        raise ValueError(f"Ordenação inválida para {table}: {sort!r}")
+    query = client.table(table).select("*")
+    if search:
+        pattern = _quote(f"*{search.strip()}*")
+        query = query.or_(",".join(f"{col}.ilike.{pattern}" for col in SEARCH_COLUMNS[table]))
+    if cursor is not None:
+        value, last_id = cursor
+        after, id_after = ("lt", "lt") if desc else ("gt", "gt")
+        if value is None:
+            query = query.is_(sort, "null").filter("id", id_after, last_id)
+        else:
+            value = _quote(value)
+            query = query.or_(f"{sort}.{after}.{value},"
+                              f"and({sort}.eq.{value},id.{id_after}.{last_id}),"
+                              f"{sort}.is.null")
+    result = (query.order(sort, desc=desc, nullsfirst=False).order("id", desc=desc)
+              .limit(limit + 1).execute())
+    rows = result.data if hasattr(result, 'data') else []
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1].get(sort), rows[-1]["id"])
+    df = pd.DataFrame(rows)
+    for col in NUMERIC_COLUMNS.get(table, []):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df, next_cursor
+
+
+def fetch_weather_observations(client, city, start=None, end=None):
+    """Observações de uma cidade no intervalo [start, end], em ordem cronológica.
+
+    A consulta usa o índice único (city, observed_at) da tabela.
+    """
+    query = client.table(WEATHER_TABLE).select("*").eq("city", city)
+    if start is not None:
+        query = query.gte("observed_at", pd.Timestamp(start).isoformat())
+    if end is not None:
+        query = query.lte("observed_at", pd.Timestamp(end).isoformat())
+    result = query.order("observed_at").execute()
+    df = pd.DataFrame(result.data if hasattr(result, 'data') else [])
+    for col in NUMERIC_COLUMNS[WEATHER_TABLE]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def error_status(error):
+    """Status HTTP de um erro do PostgREST (``None`` se não veio do servidor)"""
+    from postgrest.exceptions import APIError
+    if not isinstance(error, APIError):
+        return None
+    code = error.code
+    if isinstance(code, int) or (isinstance(code, str) and code.isdigit() and len(code) == 3):
+        # Resposta sem JSON: o cliente guarda o próprio status HTTP
+        return int(code)
+    code = str(code or "")
+    return next((status for prefix, status in ERROR_STATUS if code.startswith(prefix)), 400)
+
+
+def is_permanent_error(error):
+    """Recusa definitiva (4xx exceto 408/429); rede e 5xx são transitórios"""
+    status = error_status(error)
+    return status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUS
+
+
+def upsert_batch(client, table, rows):
+    """Grava um lote de forma idempotente (reenvios são ignorados).
+
+    Levanta ``PermanentError`` quando o servidor recusa o lote em
+    definitivo (ex.: coluna inexistente, violação de chave estrangeira).
+    """
+    try:
+        client.table(table).upsert(rows, on_conflict=IDEMPOTENCY_COLUMN,
+                                   ignore_duplicates=True).execute()
+    except Exception as e:
+        if is_permanent_error(e):
+            raise PermanentError(str(e)) from e
+        raise
+
+
+def delete_rows(client, table, ids, batch_size=DELETE_BATCH_SIZE):
+    """Exclui registros pelo id, em lotes (a URL do ``in`` tem tamanho limitado)"""
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        client.table(table).delete().in_("id", ids[start:start + batch_size]).execute()
+
+
+def weather_observation_id(city, observed_at):
+    """Id determinístico da observação (cidade, instante em UTC).
+
+    Calculado no cliente para que a produção possa referenciar a
+    observação ainda offline; deve coincidir com a função SQL
+    ``weather_observation_id`` da migração 0002.
+    """
+    observed_at = pd.Timestamp(observed_at)
+    observed_at = observed_at.tz_localize("UTC") if observed_at.tzinfo is None else observed_at.tz_convert("UTC")
+    # trim() do Postgres remove só espaços; tabulações e quebras de linha ficam na chave
+    key = f"{city.strip(' ').lower()}|{observed_at.strftime('%Y-%m-%dT%H:%M:%S+00:00')}"
+    return str(uuid.UUID(hashlib.md5(key.encode("utf-8")).hexdigest()))
+
+
+def weather_row(weather_data):
+    """Monta o registro da tabela ``weather_observations`` (``None`` sem cidade)"""
+    if not weather_data or not weather_data.get("city"):
+        return None
+    observed_at = weather_data.get("observed_at")
+    if not observed_at:
+        # Sem carimbo da estação: agrupa as leituras pela hora da consulta
+        observed_at = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0).isoformat()
+    observation_id = weather_observation_id(weather_data["city"], observed_at)
+    return {
+        "id": observation_id,
+        "city": weather_data["city"],
+        "observed_at": observed_at,
+        "temperature": weather_data.get("temperature"),
+        "humidity": weather_data.get("humidity"),
+        "rain": weather_data.get("rain"),
+        "description": weather_data.get("description"),
+        "country": weather_data.get("country"),
+        "icon": weather_data.get("icon"),
+        # A mesma observação pode ser enfileirada por várias produções
+        IDEMPOTENCY_COLUMN: observation_id,
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def production_row(date, local, product, first_quality, second_quality,
+                   first_price, second_price, temperature, humidity, rain, weather_id=None):
+    """Monta o registro de produção no formato da tabela ``productions``"""
+    return {
+        "date": date,
+        "local": local,
+        "product": product,
+        "first_quality": float(first_quality),
+        "second_quality": float(second_quality),
+        "first_price": float(first_price),
+        "second_price": float(second_price),
+        "temperature": float(temperature) if temperature else None,
+        "humidity": float(humidity) if humidity else None,
+        "rain": float(rain) if rain else None,
+        "weather_id": weather_id,
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def input_row(date, input_type, description, quantity, unit, cost, location):
+    """Monta o registro de insumo no formato da tabela ``inputs``"""
+    return {
+        "date": date,
+        "type": input_type,
+        "description": description,
+        "quantity": float(quantity),
+        "unit": unit,
+        "cost": float(cost),
+        "location": location,
+        "created_at": datetime.now().isoformat()
+    }
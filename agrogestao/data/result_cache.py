@@ -0,0 +1,179 @@
+"""Cache de resultados de relatórios compartilhado entre as sessões.
+
+A chave é o hash SHA-256 de uma forma canônica dos parâmetros: datas em
+ISO, conjuntos (``set``/``frozenset``) ordenados — filtros de seleção
+devem ser passados assim, já que a ordem de seleção dos locais não
+importa — listas e tuplas na ordem dada, dataclasses como dicionários. Cada entrada guarda as versões
+das tabelas de que depende (``df.attrs[VERSION_ATTR]``); uma versão
+mais nova de uma tabela descarta as entradas calculadas sobre a
+anterior, e o caminho de escrita (``DataService.queue``/``delete``)
+invalida as da tabela gravada na hora.
+
+A memória é limitada por ``max_bytes``: o tamanho de cada resultado é
+estimado (``memory_usage(deep=True)`` nos frames) e as entradas menos
+usadas recentemente saem primeiro. Com ``backend`` (``SnapshotStore``),
+resultados em frame são publicados para os demais workers.
+"""
+import dataclasses
+import datetime
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _canonical(dataclasses.asdict(value))
+    if isinstance(value, (set, frozenset)):
+        # Filtros passados como conjunto: a ordem de seleção não muda o resultado
+        return {"set": sorted((_canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))}
+    if isinstance(value, (list, tuple, pd.Index, np.ndarray)):
+        # Sequências são posicionais (intervalos, colunas, top-N): a ordem faz parte da chave
+        return [_canonical(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        # Meia-noite sem fuso é a mesma data de um ``date`` (ex.: st.date_input)
+        if value.tzinfo is None and value == value.replace(hour=0, minute=0, second=0, microsecond=0):
+            return value.date().isoformat()
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def canonical_key(name, params):
+    """Hash estável de ``name`` e dos parâmetros; só conjuntos ignoram a ordem"""
+    payload = json.dumps([name, _canonical(params)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_size(value):
+    """Bytes aproximados de um resultado (frames, séries, dicionários e tuplas)"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _plain(metadata):
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in metadata.items()}
+
+
+class ResultCache:
+    """LRU por bytes de resultados calculados, chaveado por parâmetros e versões"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, backend=None):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # chave -> (versões, valor, bytes)
+        self._latest = {}  # tabela -> versão mais nova vista
+        self._size = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, name, params, versions, compute):
+        """Resultado de ``compute()`` para os parâmetros e versões; calculado uma vez por combinação.
+
+        ``versions`` são os pares (tabela, versão) dos frames usados. O
+        valor devolvido é compartilhado entre as sessões e não deve ser
+        alterado no lugar.
+        """
+        key = canonical_key(name, params)
+        versions = tuple(sorted(versions))
+        with self._lock:
+            self._observe(versions)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = self._shared_compute(name, key, versions, compute)
+        self._store(key, versions, value)
+        return value
+
+    def _observe(self, versions):
+        """Versões mais novas descartam as entradas calculadas sobre as antigas"""
+        for table, version in versions:
+            if version > self._latest.get(table, -1):
+                self._latest[table] = version
+                self._drop(lambda entry_versions: any(
+                    t == table and v < version for t, v in entry_versions))
+
+    def _drop(self, predicate):
+        for key in [k for k, entry in self._entries.items() if predicate(entry[0])]:
+            self._size -= self._entries.pop(key)[2]
+
+    def _store(self, key, versions, value):
+        size = estimate_size(value)
+        if size > self.max_bytes // 4:
+            # Resultado grande demais expulsaria o cache inteiro
+            return
+        with self._lock:
+            if any(v < self._latest.get(t, -1) for t, v in versions):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            self._entries[key] = (versions, value, size)
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                self._size -= self._entries.popitem(last=False)[1][2]
+
+    def _shared_compute(self, name, key, versions, compute):
+        """Com ``backend``, frames (ou ``(frame, dict)``) calculados em um worker servem aos demais"""
+        if self.backend is None:
+            return compute()
+        stored = self.backend.load_result(f"report-{name}", (key, versions))
+        if stored is not None:
+            frame, metadata = stored
+            return frame if metadata is None or "value" not in metadata else (frame, metadata["value"])
+        value = compute()
+        if isinstance(value, pd.DataFrame):
+            frame, metadata = value, None
+        elif isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], pd.DataFrame) \
+                and isinstance(value[1], dict):
+            frame, metadata = value[0], {"value": _plain(value[1])}
+        else:
+            return value
+        try:
+            self.backend.save_result(f"report-{name}", (key, versions), frame, metadata)
+        except (TypeError, ValueError):
+            # Colunas ou metadados sem representação em Arrow/JSON: fica só no cache do processo
+            pass
+        return value
+
+    def invalidate(self, table=None):
+        """Descarta as entradas que dependem de ``table`` (ou todas)"""
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                self._drop(lambda entry_versions: any(t == table for t, _ in entry_versions))
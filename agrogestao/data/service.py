@@ -0,0 +1,122 @@
+"""Serviço de dados: outbox, flusher e cache das tabelas de um processo"""
+from agrogestao.config import SHARED_CACHE_DIR
+from agrogestao.data import repository
+from agrogestao.data.compact import compact_frame, memory_report
+from agrogestao.data.outbox import DEFAULT_OUTBOX_PATH, IDEMPOTENCY_COLUMN, Outbox, OutboxFlusher
+from agrogestao.data.result_cache import ResultCache
+from agrogestao.data.shared_cache import SharedTableCache, SnapshotStore
+from agrogestao.data.table_cache import TableCache
+
+
+class DataService:
+    """Ponto único de leitura e escrita das tabelas.
+
+    Leituras vêm do ``TableCache``; escritas vão para o outbox local e
+    entram no cache de forma otimista até o flusher confirmá-las.
+    Com ``shared_dir``, o cache é o ``SharedTableCache`` comum a todos os
+    workers (``snapshots`` fica disponível para resultados derivados).
+    ``results`` guarda resultados de relatórios para todas as sessões e
+    é invalidado a cada gravação.
+    """
+
+    def __init__(self, client_factory=repository.create_supabase_client,
+                 outbox_path=DEFAULT_OUTBOX_PATH, ttl=60, shared_dir=SHARED_CACHE_DIR):
+        self.client_factory = client_factory
+        self.outbox = Outbox(outbox_path)
+        if shared_dir:
+            self.snapshots = SnapshotStore(shared_dir)
+            self.tables = SharedTableCache(self.fetch_table, self.snapshots, outbox=self.outbox,
+                                           ttl=ttl, prepare=compact_frame)
+        else:
+            self.snapshots = None
+            self.tables = TableCache(self.fetch_table, outbox=self.outbox, ttl=ttl,
+                                     prepare=compact_frame)
+        self.results = ResultCache(backend=self.snapshots)
+        # Observações climáticas antes das produções que as referenciam
+        self.flusher = OutboxFlusher(self.outbox, self.send_batch,
+                                     on_flushed=self.tables.confirm,
+                                     on_rejected=self._rejected,
+                                     table_order=(repository.WEATHER_TABLE,))
+        self._connection_checked = False
+
+    def start(self):
+        """Inicia o flusher em background e devolve o próprio serviço"""
+        self.flusher.start()
+        self.flusher.wake()
+        return self
+
+    @property
+    def client(self):
+        return self.client_factory()
+
+    def check_connection(self):
+        """Testa a conexão uma vez; falhas são repetidas na próxima chamada"""
+        if not self._connection_checked:
+            repository.check_connection(self.client)
+            self._connection_checked = True
+        return True
+
+    def fetch_table(self, table):
+        return repository.fetch_table(self.client, table)
+
+    def send_batch(self, table, rows):
+        repository.upsert_batch(self.client, table, rows)
+
+    def _rejected(self, table, keys):
+        # Linhas recusadas saem das tabelas em cache (ficam nos rejeitados do outbox)
+        self.tables.discard(table, keys)
+        self.results.invalidate(table)
+
+    def retry_rejected(self):
+        """Devolve os registros recusados à fila de envio; devolve quantos"""
+        count = self.outbox.requeue_dead()
+        for entry in self.outbox.pending():
+            self.tables.apply_local(entry["table"], entry["row"])
+            self.results.invalidate(entry["table"])
+        self.flusher.wake()
+        return count
+
+    def memory_report(self):
+        """Uso de memória das tabelas em cache (ver ``compact.memory_report``)"""
+        return memory_report(self.tables.frames())
+
+    def load(self, table):
+        """Frame da tabela (cópia rasa do cache compartilhado)"""
+        return self.tables.get(table)
+
+    def page(self, table, sort="created_at", desc=True, search=None, cursor=None, limit=50):
+        """Página da tabela direto do banco (ver ``repository.fetch_page``)"""
+        df, next_cursor = repository.fetch_page(self.client, table, sort, desc, search, cursor, limit)
+        return compact_frame(table, df), next_cursor
+
+    def weather_observations(self, city, start=None, end=None):
+        """Observações climáticas de uma cidade no intervalo, direto do banco"""
+        return compact_frame(repository.WEATHER_TABLE,
+                             repository.fetch_weather_observations(self.client, city, start, end))
+
+    def queue(self, table, row, key=None):
+        """Grava no outbox, atualiza o cache de forma otimista e acorda o flusher"""
+        key = self.outbox.put(table, row, key)
+        self.tables.apply_local(table, dict(row, **{IDEMPOTENCY_COLUMN: key}))
+        self.results.invalidate(table)
+        self.flusher.wake()
+        return key
+
+    def save_production(self, date, local, product, first_quality, second_quality,
+                        first_price, second_price, temperature, humidity, rain, weather_data=None):
+        """Enfileira a observação climática (uma vez por cidade e instante) e a produção"""
+        observation = repository.weather_row(weather_data)
+        if observation is not None:
+            self.queue(repository.WEATHER_TABLE, observation, key=observation["id"])
+        row = repository.production_row(date, local, product, first_quality, second_quality,
+                                        first_price, second_price, temperature, humidity, rain,
+                                        observation["id"] if observation else None)
+        return self.queue("productions", row)
+
+    def save_input(self, *args, **kwargs):
+        return self.queue("inputs", repository.input_row(*args, **kwargs))
+
+    def delete(self, table, ids):
+        repository.delete_rows(self.client, table, ids)
+        self.tables.invalidate(table)
+        self.results.invalidate(table)
@@ -0,0 +1,347 @@
+"""Cache de tabelas compartilhado entre processos (vários workers do app).
+
+Cada tabela é publicada como um snapshot Arrow IPC (sem compressão) em
+um diretório comum, descrito por um manifesto JSON com a versão dos
+dados. Os workers abrem o snapshot por ``memory_map``: as páginas do
+arquivo ficam uma única vez no cache do sistema operacional e as colunas
+numéricas sem nulos viram views sobre elas, sem cópia.
+
+Toda alteração é feita sob um lock de arquivo por tabela, partindo do
+estado mais recente: uma gravação em um worker aparece nos demais no
+próximo rerun e nenhuma se perde por concorrência. A recarga do banco
+(uma vez por ``ttl`` para todos os workers juntos) publica um snapshot
+novo; gravações locais, confirmações e recusas do outbox só anexam uma
+linha ao delta do snapshot (``<tabela>-<revisão>.delta.jsonl``), e cada
+worker aplica as linhas que ainda não viu sobre o snapshot em memória.
+O delta é incorporado a um snapshot novo a cada ``COMPACT_EVERY``
+operações.
+
+Resultados derivados (ex.: rateio de custos) podem ser guardados com
+``save_result``/``load_result``, indexados pela versão dos dados.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from agrogestao.data.compact import concat_compact
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN
+from agrogestao.data.table_cache import SYNC_COLUMN, SYNC_CONFIRMED, SYNC_PENDING, VERSION_ATTR, TableCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos (um worker por máquina)
+    fcntl = None
+
+MAX_RESULTS = 64
+# Operações no delta antes de incorporá-lo a um snapshot novo
+COMPACT_EVERY = 256
+
+
+class SnapshotStore:
+    """Diretório de snapshots Arrow e manifestos, seguro entre processos"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.results_dir = os.path.join(directory, "results")
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    def _manifest_path(self, table):
+        return os.path.join(self.directory, f"{table}.json")
+
+    @contextmanager
+    def lock(self, table):
+        """Lock exclusivo da tabela entre processos (e threads)"""
+        with open(os.path.join(self.directory, f"{table}.lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def manifest(self, table):
+        """Manifesto atual da tabela (``None`` se nunca publicada)"""
+        try:
+            with open(self._manifest_path(table), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # Manifestos anteriores ao delta: delta vazio
+        manifest.setdefault("delta", f"{table}-{manifest['revision']}.delta.jsonl")
+        return manifest
+
+    def _write_json(self, path, data):
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _write_arrow(self, path, df, metadata=None):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        if metadata:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                   b"agrogestao": json.dumps(metadata).encode()})
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+
+    def _read_arrow(self, path):
+        import pyarrow as pa
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        metadata = (table.schema.metadata or {}).get(b"agrogestao")
+        # split_blocks: colunas numéricas sem nulos ficam como views do arquivo mapeado
+        return table.to_pandas(split_blocks=True), json.loads(metadata) if metadata else None
+
+    def publish(self, table, df, version, loaded_at, previous=None):
+        """Grava um novo snapshot (delta vazio) e aponta o manifesto para ele (chamar sob ``lock``)"""
+        revision = (previous or {}).get("revision", 0) + 1
+        name = f"{table}-{revision}.arrow"
+        self._write_arrow(os.path.join(self.directory, name), df)
+        manifest = {"version": version, "revision": revision, "file": name,
+                    "delta": f"{table}-{revision}.delta.jsonl", "delta_bytes": 0, "delta_ops": 0,
+                    "loaded_at": loaded_at, "stale": False}
+        self._write_json(self._manifest_path(table), manifest)
+        if previous and previous.get("file"):
+            # Mantém o snapshot anterior para leitores que acabaram de abri-lo
+            for stale_name in (f"{table}-{revision - 2}.arrow", f"{table}-{revision - 2}.delta.jsonl"):
+                try:
+                    os.remove(os.path.join(self.directory, stale_name))
+                except FileNotFoundError:
+                    pass
+        return manifest
+
+    def append_delta(self, table, manifest, ops, version):
+        """Anexa operações ao delta do snapshot atual e devolve o manifesto novo (chamar sob ``lock``)"""
+        data = "".join(json.dumps(op, ensure_ascii=False, default=str) + "\n" for op in ops).encode("utf-8")
+        size = manifest.get("delta_bytes", 0)
+        with open(os.path.join(self.directory, manifest["delta"]), "ab") as f:
+            # Descarta o que uma gravação interrompida deixou além do manifesto
+            f.truncate(size)
+            f.write(data)
+        manifest = dict(manifest, version=version, delta_bytes=size + len(data),
+                        delta_ops=manifest.get("delta_ops", 0) + len(ops))
+        self._write_json(self._manifest_path(table), manifest)
+        return manifest
+
+    def read_delta(self, manifest, offset=0):
+        """Operações do delta de ``offset`` até o tamanho do manifesto, e o novo offset"""
+        end = manifest.get("delta_bytes", 0)
+        if end <= offset:
+            return [], offset
+        with open(os.path.join(self.directory, manifest["delta"]), "rb") as f:
+            f.seek(offset)
+            data = f.read(end - offset)
+        return [json.loads(line) for line in data.splitlines() if line], end
+
+    def read(self, manifest):
+        df, _ = self._read_arrow(os.path.join(self.directory, manifest["file"]))
+        return df
+
+    def mark_stale(self, table):
+        """Força a próxima leitura (de qualquer worker) a recarregar do banco"""
+        with self.lock(table):
+            manifest = self.manifest(table)
+            if manifest is not None:
+                self._write_json(self._manifest_path(table), dict(manifest, stale=True))
+
+    def tables(self):
+        """Tabelas com snapshot publicado"""
+        return sorted(os.path.basename(path)[:-len(".json")]
+                      for path in glob.glob(os.path.join(self.directory, "*.json")))
+
+    def next_version(self, table):
+        """Próxima versão dos dados da tabela, única entre os workers (chamar sob ``lock``)"""
+        manifest = self.manifest(table)
+        return (manifest or {}).get("version", 0) + 1
+
+    # Resultados derivados -------------------------------------------------
+
+    def _result_path(self, name, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.results_dir, f"{name}-{digest}.arrow")
+
+    def load_result(self, name, key):
+        """``(frame, metadados)`` guardados para ``key``, ou ``None``"""
+        path = self._result_path(name, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return self._read_arrow(path)
+        except (OSError, ValueError):
+            return None
+
+    def save_result(self, name, key, df, metadata=None):
+        """Guarda um resultado derivado; os mais antigos além de ``MAX_RESULTS`` são removidos"""
+        self._write_arrow(self._result_path(name, key), df, metadata)
+        entries = sorted(os.scandir(self.results_dir), key=lambda e: e.stat().st_mtime)
+        for entry in entries[:-MAX_RESULTS]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+class SharedTableCache(TableCache):
+    """``TableCache`` cujos frames e versões vêm do ``SnapshotStore``.
+
+    A versão de cada tabela é a do manifesto, igual em todos os workers,
+    de modo que caches derivados indexados por versão também coincidem.
+    """
+
+    def __init__(self, loader, snapshots, outbox=None, ttl=60, prepare=None, compact_every=COMPACT_EVERY):
+        super().__init__(loader, outbox=outbox, ttl=ttl, prepare=prepare)
+        self.snapshots = snapshots
+        self.compact_every = compact_every
+        self._positions = {}  # tabela -> (revisão, offset no delta) do frame local
+
+    def _expired(self, manifest):
+        return manifest is None or manifest.get("stale") or time.time() - manifest["loaded_at"] > self.ttl
+
+    def _adopt(self, table, manifest):
+        """Frame do snapshot de ``manifest`` com o delta aplicado (só o que falta, se for o mesmo)"""
+        with self._lock:
+            df = self._frames.get(table)
+            revision, offset = self._positions.get(table, (None, 0))
+        if df is None or revision != manifest["revision"]:
+            df, offset = self.snapshots.read(manifest), 0
+        elif offset == manifest.get("delta_bytes", 0):
+            return df
+        ops, offset = self.snapshots.read_delta(manifest, offset)
+        df = self._apply_ops(table, df, ops)
+        with self._lock:
+            self._frames[table] = df
+            self._versions[table] = manifest["version"]
+            self._positions[table] = (manifest["revision"], offset)
+        return df
+
+    def _apply_ops(self, table, df, ops):
+        """Aplica as operações do delta, na ordem, sobre ``df``"""
+        puts = []
+        for op in ops + [None]:
+            if op is not None and op["op"] == "put":
+                puts.append(op)
+                continue
+            if puts:
+                # Inserções seguidas entram de uma vez, mais recentes no topo
+                rows = [p["row"] for p in reversed(puts)]
+                statuses = [p["status"] for p in reversed(puts)]
+                df = self._prepend(table, df, rows, statuses)
+                puts = []
+            if op is None:
+                break
+            changed = (self._with_confirmed(df, op["keys"]) if op["op"] == "confirm"
+                       else self._without(df, op["keys"]))
+            if changed is not None:
+                df = changed
+        return df
+
+    def _publish(self, table, df, manifest, new_version=True, loaded_at=None):
+        version = self.snapshots.next_version(table) if new_version else manifest["version"]
+        loaded_at = loaded_at if loaded_at is not None else manifest["loaded_at"]
+        manifest = self.snapshots.publish(table, df, version, loaded_at, previous=manifest)
+        with self._lock:
+            self._frames[table] = df
+            self._versions[table] = manifest["version"]
+            self._positions[table] = (manifest["revision"], 0)
+        return df, manifest["version"]
+
+    def _append(self, table, manifest, ops, new_version):
+        """Registra ``ops`` no delta e compacta quando ele cresce (chamar sob ``lock``)"""
+        version = self.snapshots.next_version(table) if new_version else manifest["version"]
+        manifest = self.snapshots.append_delta(table, manifest, ops, version)
+        df = self._adopt(table, manifest)
+        if manifest["delta_ops"] >= self.compact_every:
+            self._publish(table, df, manifest, new_version=False)
+
+    def get(self, table):
+        for _ in range(3):
+            manifest = self.snapshots.manifest(table)
+            if self._expired(manifest):
+                df, version = self._reload(table)
+                break
+            try:
+                df, version = self._adopt(table, manifest), manifest["version"]
+                break
+            except FileNotFoundError:
+                # Snapshot substituído duas vezes entre ler o manifesto e abri-lo
+                continue
+        else:
+            df, version = self._reload(table)
+        df = df.copy(deep=False)
+        df.attrs[VERSION_ATTR] = (table, version)
+        return df
+
+    def version(self, table):
+        manifest = self.snapshots.manifest(table)
+        return manifest["version"] if manifest else 0
+
+    def _reload(self, table):
+        with self.snapshots.lock(table):
+            manifest = self.snapshots.manifest(table)
+            if not self._expired(manifest):
+                # Outro worker recarregou enquanto esperávamos o lock
+                return self._adopt(table, manifest), manifest["version"]
+            df = self._load_fresh(table)
+            if manifest is not None:
+                df = self._carry_pending(self._adopt(table, manifest), df)
+            return self._publish(table, df, manifest, loaded_at=time.time())
+
+    @staticmethod
+    def _carry_pending(previous, fresh):
+        """Mantém linhas pendentes de outros workers que o banco ainda não tem"""
+        if SYNC_COLUMN not in previous.columns or IDEMPOTENCY_COLUMN not in previous.columns:
+            return fresh
+        known = fresh[IDEMPOTENCY_COLUMN] if IDEMPOTENCY_COLUMN in fresh.columns else pd.Series(dtype=object)
+        carried = previous[(previous[SYNC_COLUMN] == SYNC_PENDING)
+                           & ~previous[IDEMPOTENCY_COLUMN].isin(known)]
+        if carried.empty:
+            return fresh
+        return concat_compact([carried, fresh])[fresh.columns.union(carried.columns, sort=False)]
+
+    @staticmethod
+    def _has_keys(df, keys):
+        return IDEMPOTENCY_COLUMN in df.columns and df[IDEMPOTENCY_COLUMN].isin(keys).any()
+
+    def apply_local(self, table, row):
+        with self.snapshots.lock(table):
+            manifest = self.snapshots.manifest(table)
+            if manifest is None:
+                # Ainda não carregada: a linha virá do outbox no primeiro get()
+                return
+            key = row.get(IDEMPOTENCY_COLUMN)
+            if key is not None and self._has_keys(self._adopt(table, manifest), [key]):
+                # Linha com chave natural já presente (ex.: mesma observação climática)
+                return
+            # O status vai no delta: o outbox dos outros workers não conhece a linha
+            status = SYNC_PENDING if self.outbox is None or key in self.outbox else SYNC_CONFIRMED
+            self._append(table, manifest, [{"op": "put", "row": row, "status": status}], new_version=True)
+
+    def confirm(self, table, keys):
+        with self.snapshots.lock(table):
+            manifest = self.snapshots.manifest(table)
+            if manifest is None or not self._has_keys(self._adopt(table, manifest), keys):
+                return
+            # Só o status muda: mesma versão dos dados
+            self._append(table, manifest, [{"op": "confirm", "keys": list(keys)}], new_version=False)
+
+    def discard(self, table, keys):
+        with self.snapshots.lock(table):
+            manifest = self.snapshots.manifest(table)
+            if manifest is None or not self._has_keys(self._adopt(table, manifest), keys):
+                return
+            self._append(table, manifest, [{"op": "discard", "keys": list(keys)}], new_version=True)
+
+    def invalidate(self, table=None):
+        tables = [table] if table is not None else self.snapshots.tables()
+        for name in tables:
+            self.snapshots.mark_stale(name)
+        super().invalidate(table)
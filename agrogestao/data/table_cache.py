@@ -0,0 +1,179 @@
+"""Cache em memória das tabelas com atualização otimista.
+
+As tabelas são carregadas do banco uma vez e mantidas por processo;
+gravações novas entram no frame imediatamente como ``pendente`` e são
+marcadas como ``sincronizado`` quando o outbox confirma o envio, ou
+retiradas se o servidor as recusar.
+"""
+import threading
+import time
+
+import pandas as pd
+
+from agrogestao.data.compact import concat_compact
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN
+
+SYNC_COLUMN = "sync_status"
+SYNC_PENDING = "pendente"
+SYNC_CONFIRMED = "sincronizado"
+SYNC_DTYPE = pd.CategoricalDtype([SYNC_PENDING, SYNC_CONFIRMED])
+# Chave em ``DataFrame.attrs`` com (tabela, versão) do frame entregue
+VERSION_ATTR = "table_version"
+
+
+class TableCache:
+    """Frames por tabela, recarregados do backend após ``ttl`` segundos.
+
+    ``loader(table)`` busca a tabela completa (ordenada por ``created_at``
+    decrescente) e levanta exceção em caso de falha, para que um erro
+    transitório não fique em cache.
+
+    Cada tabela tem uma versão que aumenta a cada recarga ou gravação
+    local; ela acompanha o frame em ``df.attrs[VERSION_ATTR]`` para que
+    caches derivados (rateio, relatórios) saibam quando invalidar.
+
+    ``prepare(table, df)``, se informado, é aplicado a todo frame antes
+    de entrar no cache (ex.: ``compact_frame``). Os frames em cache são
+    compartilhados por todas as sessões e não devem ser alterados no
+    lugar; ``get`` devolve uma cópia rasa, na qual é seguro criar ou
+    substituir colunas.
+    """
+
+    def __init__(self, loader, outbox=None, ttl=60, prepare=None):
+        self.loader = loader
+        self.outbox = outbox
+        self.ttl = ttl
+        self.prepare = prepare or (lambda table, df: df)
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._loaded_at = {}
+        self._versions = {}
+
+    def get(self, table):
+        """Devolve o frame da tabela (cópia rasa, segura para novas colunas)"""
+        with self._lock:
+            df = self._frames.get(table)
+            version = self._versions.get(table)
+            expired = time.monotonic() - self._loaded_at.get(table, 0) > self.ttl
+        if df is None or expired:
+            df, version = self._reload(table)
+        df = df.copy(deep=False)
+        df.attrs[VERSION_ATTR] = (table, version)
+        return df
+
+    def frames(self):
+        """Frames atualmente em cache, por tabela (somente leitura)"""
+        with self._lock:
+            return dict(self._frames)
+
+    def version(self, table):
+        """Versão atual da tabela (0 se ainda não carregada)"""
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def _bump(self, table):
+        self._versions[table] = self._versions.get(table, 0) + 1
+        return self._versions[table]
+
+    def _reload(self, table):
+        df = self._load_fresh(table)
+        with self._lock:
+            self._frames[table] = df
+            self._loaded_at[table] = time.monotonic()
+            version = self._bump(table)
+        return df, version
+
+    def _load_fresh(self, table):
+        """Tabela do backend, preparada e com os registros ainda no outbox"""
+        df = self.prepare(table, self.loader(table))
+        df = df.assign(**{SYNC_COLUMN: pd.Categorical([SYNC_CONFIRMED] * len(df), dtype=SYNC_DTYPE)})
+        if self.outbox is not None:
+            # Registros ainda no outbox não existem no servidor: reaplica
+            known = set(df[IDEMPOTENCY_COLUMN].dropna()) if IDEMPOTENCY_COLUMN in df.columns else set()
+            rows = [e["row"] for e in self.outbox.pending(table) if e["key"] not in known]
+            if rows:
+                df = self._prepend(table, df, list(reversed(rows)), SYNC_PENDING)
+        return df
+
+    def _prepend(self, table, df, rows, status):
+        """``rows`` no topo de ``df``; ``status`` é um só ou um por linha"""
+        statuses = [status] * len(rows) if isinstance(status, str) else list(status)
+        new_rows = self.prepare(table, pd.DataFrame(rows))
+        new_rows = new_rows.assign(**{SYNC_COLUMN: pd.Categorical(statuses, dtype=SYNC_DTYPE)})
+        if df.empty:
+            return new_rows
+        columns = df.columns.union(new_rows.columns, sort=False)
+        return concat_compact([new_rows, df])[columns]
+
+    def apply_local(self, table, row):
+        """Insere a linha recém-gravada no frame em cache (atualização otimista)"""
+        with self._lock:
+            df = self._frames.get(table)
+            if df is None:
+                # Ainda não carregada: a linha virá do outbox no primeiro get()
+                return
+            df = self._with_row(table, df, row)
+            if df is not None:
+                self._frames[table] = df
+                self._bump(table)
+
+    def _with_row(self, table, df, row):
+        """Frame com a linha nova no topo (``None`` se ela já estiver presente)"""
+        key = row.get(IDEMPOTENCY_COLUMN)
+        if key is not None and IDEMPOTENCY_COLUMN in df.columns \
+                and (df[IDEMPOTENCY_COLUMN] == key).any():
+            # Linha com chave natural já presente (ex.: mesma observação climática)
+            return None
+        # O flusher pode ter confirmado o envio antes desta chamada
+        pending = self.outbox is None or key in self.outbox
+        status = SYNC_PENDING if pending else SYNC_CONFIRMED
+        return self._prepend(table, df, [row], status)
+
+    def confirm(self, table, keys):
+        """Marca como sincronizadas as linhas confirmadas pelo outbox"""
+        with self._lock:
+            df = self._frames.get(table)
+            if df is not None:
+                df = self._with_confirmed(df, keys)
+            if df is not None:
+                self._frames[table] = df
+
+    @staticmethod
+    def _with_confirmed(df, keys):
+        """Frame com as linhas de ``keys`` sincronizadas (``None`` se nada mudou)"""
+        if IDEMPOTENCY_COLUMN not in df.columns:
+            return None
+        confirmed = df[IDEMPOTENCY_COLUMN].isin(keys)
+        if not confirmed.any():
+            return None
+        return df.assign(**{SYNC_COLUMN: df[SYNC_COLUMN].mask(confirmed, SYNC_CONFIRMED)})
+
+    def discard(self, table, keys):
+        """Retira do frame as linhas locais recusadas pelo servidor"""
+        with self._lock:
+            df = self._frames.get(table)
+            if df is not None:
+                df = self._without(df, keys)
+            if df is not None:
+                self._frames[table] = df
+                self._bump(table)
+
+    @staticmethod
+    def _without(df, keys):
+        """Frame sem as linhas de ``keys`` (``None`` se nenhuma estava lá)"""
+        if IDEMPOTENCY_COLUMN not in df.columns:
+            return None
+        rejected = df[IDEMPOTENCY_COLUMN].isin(keys)
+        if not rejected.any():
+            return None
+        return df[~rejected].reset_index(drop=True)
+
+    def invalidate(self, table=None):
+        """Força o recarregamento de uma tabela (ou de todas) no próximo get()"""
+        with self._lock:
+            if table is None:
+                self._frames.clear()
+                self._loaded_at.clear()
+            else:
+                self._frames.pop(table, None)
+                self._loaded_at.pop(table, None)
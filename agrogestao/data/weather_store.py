@@ -0,0 +1,250 @@
+"""Armazenamento local do histórico climático horário.
+
+Cada cidade é um arquivo ``.npz`` com arrays ordenados: horas desde a
+época (int32) e temperatura, umidade e chuva (float32) — cerca de 16
+bytes por hora, ~140 KB por ano. Consultas por intervalo são duas buscas
+binárias (``searchsorted``) sobre o array de horas, sem varrer o arquivo.
+
+O ``WeatherBackfill`` preenche apenas as horas ausentes usando um
+``WeatherProvider``; as análises leem só do armazenamento.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from agrogestao.config import DATA_DIR, TIMEZONE
+from agrogestao.integrations.weather_history import empty_hourly
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos (um worker por máquina)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEATHER_DIR = os.path.join(DATA_DIR, "weather")
+VALUE_COLUMNS = ['temperature', 'humidity', 'rain']
+_HOUR = np.int64(3600)
+
+
+def _to_hour(value):
+    """Hora (inteira, desde a época, UTC) de um instante; instantes sem fuso são UTC"""
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return int(ts.value // 10 ** 9 // _HOUR)
+
+
+def _hours_to_time(hours):
+    return pd.to_datetime(hours.astype(np.int64) * _HOUR, unit='s', utc=True)
+
+
+class WeatherStore:
+    """Séries horárias por cidade em arquivos ``.npz`` compactos.
+
+    Os arrays carregados ficam em memória e são relidos só quando o
+    arquivo muda (outro processo pode ter gravado). Gravações de uma
+    cidade são serializadas entre processos por um lock de arquivo.
+    """
+
+    def __init__(self, directory=DEFAULT_WEATHER_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    def _path(self, city):
+        key = city.strip().lower()
+        slug = re.sub(r'[^a-z0-9]+', '_', key).strip('_') or 'cidade'
+        digest = hashlib.md5(key.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{slug}-{digest}.npz")
+
+    @contextmanager
+    def _file_lock(self, path):
+        with open(f"{path}.lock", "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _arrays(self, city):
+        path = self._path(city)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._loaded.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in ['hours'] + VALUE_COLUMNS}
+        self._loaded[path] = (mtime, arrays)
+        return arrays
+
+    def cities(self):
+        """Cidades com histórico armazenado"""
+        names = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".npz"):
+                with np.load(os.path.join(self.directory, name)) as data:
+                    names.append(str(data['city']))
+        return names
+
+    def write(self, city, frame):
+        """Incorpora observações horárias (``time`` + valores); horas repetidas são substituídas"""
+        if frame.empty:
+            return 0
+        elapsed = pd.to_datetime(frame['time'], utc=True) - pd.Timestamp(0, tz="UTC")
+        hours = (elapsed // pd.Timedelta(hours=1)).to_numpy()
+        new = {'hours': hours.astype(np.int32)}
+        for col in VALUE_COLUMNS:
+            new[col] = frame[col].to_numpy(np.float32)
+        path = self._path(city)
+        with self._lock, self._file_lock(path):
+            current = self._arrays(city)
+            if current is not None:
+                # Valores novos vêm primeiro para vencer o ``np.unique`` (primeira ocorrência)
+                new = {name: np.concatenate([new[name], current[name]]) for name in new}
+            _, first = np.unique(new['hours'], return_index=True)
+            merged = {name: values[first] for name, values in new.items()}
+            # Temporário exclusivo (sem extensão .npz, fora de ``cities``) e troca atômica
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".weather-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, city=np.array(city), **merged)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return len(hours)
+
+    def range(self, city, start, end):
+        """Observações horárias de ``city`` em [start, end] (frame com ``time`` em UTC)"""
+        arrays = self._arrays(city)
+        if arrays is None:
+            return empty_hourly()
+        lo = np.searchsorted(arrays['hours'], _to_hour(start), side='left')
+        hi = np.searchsorted(arrays['hours'], _to_hour(end), side='right')
+        frame = pd.DataFrame({col: arrays[col][lo:hi] for col in VALUE_COLUMNS})
+        frame.insert(0, 'time', _hours_to_time(arrays['hours'][lo:hi]))
+        return frame
+
+    def coverage(self, city):
+        """(primeira, última) hora armazenada, ou ``None``"""
+        arrays = self._arrays(city)
+        if arrays is None or not len(arrays['hours']):
+            return None
+        return tuple(_hours_to_time(arrays['hours'][[0, -1]]))
+
+    def missing_ranges(self, city, start, end):
+        """Intervalos [início, fim] de horas ausentes em [start, end]"""
+        first, last = _to_hour(start), _to_hour(end)
+        if last < first:
+            return []
+        expected = np.arange(first, last + 1, dtype=np.int64)
+        arrays = self._arrays(city)
+        if arrays is not None:
+            expected = np.setdiff1d(expected, arrays['hours'], assume_unique=True)
+        if not len(expected):
+            return []
+        breaks = np.flatnonzero(np.diff(expected) > 1)
+        starts = np.concatenate(([expected[0]], expected[breaks + 1]))
+        ends = np.concatenate((expected[breaks], [expected[-1]]))
+        return list(zip(_hours_to_time(starts), _hours_to_time(ends)))
+
+    def daily(self, cities, start_day, end_day, tz=TIMEZONE):
+        """Clima diário por cidade, dos dias ``start_day`` a ``end_day`` (inclusive) no fuso ``tz``.
+
+        Colunas: ``city``, ``day``, ``temperature`` e ``humidity`` (médias),
+        ``rain`` (soma) e ``hours`` (horas com observação).
+        """
+        start = pd.Timestamp(start_day).normalize().tz_localize(tz)
+        end = (pd.Timestamp(end_day).normalize() + pd.Timedelta(days=1)).tz_localize(tz) - pd.Timedelta(hours=1)
+        frames = []
+        for city in cities:
+            hourly = self.range(city, start, end)
+            if hourly.empty:
+                continue
+            hourly['day'] = hourly['time'].dt.tz_convert(tz).dt.tz_localize(None).dt.normalize()
+            grouped = hourly.groupby('day').agg(
+                temperature=('temperature', 'mean'),
+                humidity=('humidity', 'mean'),
+                rain=('rain', 'sum'),
+                hours=('temperature', 'count'),
+            ).reset_index()
+            grouped.insert(0, 'city', city)
+            frames.append(grouped)
+        if not frames:
+            return pd.DataFrame(columns=['city', 'day'] + VALUE_COLUMNS + ['hours'])
+        return pd.concat(frames, ignore_index=True)
+
+
+class WeatherBackfill:
+    """Preenche o ``WeatherStore`` a partir de um ``WeatherProvider``.
+
+    Só as horas ausentes são pedidas, em blocos de até
+    ``provider.max_span``. Horas pedidas e não devolvidas pelo provedor
+    são gravadas como ``NaN`` para não serem pedidas de novo.
+    ``start(...)`` executa o preenchimento em uma thread em background.
+    """
+
+    def __init__(self, store, provider):
+        self.store = store
+        self.provider = provider
+        self.last_error = None
+        self.hours_written = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def backfill(self, city, start, end):
+        """Completa o histórico de ``city`` até a última hora já encerrada; devolve as horas gravadas"""
+        now = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta(hours=1)
+        end = min(pd.Timestamp(end).tz_localize("UTC") if pd.Timestamp(end).tzinfo is None
+                  else pd.Timestamp(end), now)
+        written = 0
+        span = pd.Timedelta(self.provider.max_span) - pd.Timedelta(hours=1)
+        for gap_start, gap_end in self.store.missing_ranges(city, start, end):
+            chunk_start = gap_start
+            while chunk_start <= gap_end:
+                chunk_end = min(chunk_start + span, gap_end)
+                frame = self.provider.hourly(city, chunk_start, chunk_end)
+                expected = pd.date_range(chunk_start, chunk_end, freq="h")
+                frame = (frame.drop_duplicates('time', keep='last').set_index('time')
+                         .reindex(expected).rename_axis('time').reset_index())
+                written += self.store.write(city, frame)
+                chunk_start = chunk_end + pd.Timedelta(hours=1)
+        self.hours_written += written
+        return written
+
+    def run(self, cities, start, end):
+        """Preenche várias cidades; falhas são registradas em ``last_error``"""
+        self.last_error = None
+        for city in cities:
+            try:
+                self.backfill(city, start, end)
+            except Exception as e:
+                self.last_error = f"{city}: {e}"
+                logger.warning("Falha no histórico climático de %s: %s", city, e)
+
+    def start(self, cities, start, end):
+        """Dispara ``run`` em background; devolve ``False`` se já houver um em andamento"""
+        with self._lock:
+            if self.running:
+                return False
+            self._thread = threading.Thread(target=self.run, args=(list(cities), start, end),
+                                            name="weather-backfill", daemon=True)
+            self._thread.start()
+            return True
@@ -0,0 +1,15 @@
+"""Integrações com serviços externos"""
+from agrogestao.integrations.weather import WeatherError, get_weather_data
+from agrogestao.integrations.weather_history import (
+    OpenWeatherHistoryProvider,
+    WeatherProvider,
+    city_for_location,
+)
+
+__all__ = [
+    "OpenWeatherHistoryProvider",
+    "WeatherError",
+    "WeatherProvider",
+    "city_for_location",
+    "get_weather_data",
+]
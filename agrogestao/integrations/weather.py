@@ -0,0 +1,43 @@
+"""Integração com a API climática OpenWeather"""
+from datetime import datetime, timezone
+
+from agrogestao.config import API_KEY, WEATHER_API_URL
+
+WEATHER_URL = f"{WEATHER_API_URL}/data/2.5/weather"
+
+
+class WeatherError(Exception):
+    """Falha ao obter dados climáticos (mensagem pronta para o usuário)"""
+
+
+def parse_current_weather(data):
+    """Converte a resposta de ``/weather`` no dicionário usado pelo app"""
+    return {
+        "temperature": float(data["main"]["temp"]),
+        "humidity": float(data["main"]["humidity"]),
+        "rain": float(data.get("rain", {}).get("1h", 0)) if "rain" in data else 0.0,
+        "description": data["weather"][0]["description"],
+        "city": data["name"],
+        "country": data["sys"]["country"],
+        "icon": data["weather"][0]["icon"],
+        # Momento da medição na estação (não da consulta): leituras iguais têm o mesmo carimbo
+        "observed_at": datetime.fromtimestamp(data["dt"], tz=timezone.utc).isoformat() if "dt" in data else None,
+    }
+
+
+def get_weather_data(city, api_key=API_KEY, timeout=10):
+    """Busca dados climáticos atuais da API OpenWeather"""
+    import requests
+    try:
+        response = requests.get(WEATHER_URL, timeout=timeout, params={
+            "q": city, "appid": api_key, "units": "metric", "lang": "pt_br",
+        })
+    except Exception as e:
+        raise WeatherError(f"Erro de conexão com a API climática: {str(e)}") from e
+    
+    if response.status_code != 200:
+        raise WeatherError(f"Erro ao buscar dados climáticos: {response.status_code}")
+    try:
+        return parse_current_weather(response.json())
+    except Exception as e:
+        raise WeatherError(f"Resposta inválida da API climática: {str(e)}") from e
@@ -0,0 +1,86 @@
+"""Histórico climático horário: interface de provedores e OpenWeather History.
+
+Um provedor devolve observações horárias de uma cidade em um intervalo;
+o ``WeatherBackfill`` (``agrogestao.data.weather_store``) usa o provedor
+apenas para preencher lacunas do armazenamento local, de modo que as
+análises nunca chamam a API diretamente.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from agrogestao.config import API_KEY, DEFAULT_CITY, LOCATION_CITIES, WEATHER_HISTORY_URL
+from agrogestao.integrations.weather import WeatherError
+
+HOURLY_COLUMNS = ['time', 'temperature', 'humidity', 'rain']
+
+
+def city_for_location(location, mapping=None, default=DEFAULT_CITY):
+    """Cidade da estação climática usada para um local/estufa"""
+    mapping = LOCATION_CITIES if mapping is None else mapping
+    return mapping.get(str(location).strip(), default)
+
+
+def empty_hourly():
+    return pd.DataFrame({
+        'time': pd.Series(dtype='datetime64[ns, UTC]'),
+        'temperature': pd.Series(dtype=np.float32),
+        'humidity': pd.Series(dtype=np.float32),
+        'rain': pd.Series(dtype=np.float32),
+    })
+
+
+class WeatherProvider:
+    """Fonte de observações horárias.
+
+    ``hourly(city, start, end)`` devolve um frame com ``HOURLY_COLUMNS``
+    (``time`` em UTC, uma linha por hora disponível) e levanta
+    ``WeatherError`` em caso de falha. ``max_span`` é o maior intervalo
+    aceito por chamada; intervalos maiores são divididos pelo chamador.
+    """
+    max_span = timedelta(days=7)
+
+    def hourly(self, city, start, end):
+        raise NotImplementedError
+
+
+def parse_history(data):
+    """Converte a resposta de ``/history/city`` em frame horário"""
+    items = data.get("list", [])
+    if not items:
+        return empty_hourly()
+    frame = pd.DataFrame({
+        'time': pd.to_datetime([item["dt"] for item in items], unit='s', utc=True),
+        'temperature': [item.get("main", {}).get("temp") for item in items],
+        'humidity': [item.get("main", {}).get("humidity") for item in items],
+        'rain': [item.get("rain", {}).get("1h", 0.0) for item in items],
+    })
+    return frame.astype({col: np.float32 for col in HOURLY_COLUMNS[1:]})
+
+
+class OpenWeatherHistoryProvider(WeatherProvider):
+    """Histórico horário da OpenWeather (até uma semana por chamada)"""
+
+    def __init__(self, api_key=API_KEY, base_url=WEATHER_HISTORY_URL, timeout=30):
+        self.api_key = api_key
+        self.url = f"{base_url}/data/2.5/history/city"
+        self.timeout = timeout
+
+    def hourly(self, city, start, end):
+        import requests
+        try:
+            response = requests.get(self.url, timeout=self.timeout, params={
+                "q": city, "type": "hour", "units": "metric", "appid": self.api_key,
+                "start": int(pd.Timestamp(start).timestamp()),
+                "end": int(pd.Timestamp(end).timestamp()),
+            })
+        except Exception as e:
+            raise WeatherError(f"Erro de conexão com a API de histórico climático: {str(e)}") from e
+
+        if response.status_code != 200:
+            raise WeatherError(f"Erro ao buscar histórico climático: {response.status_code}")
+        try:
+            return parse_history(response.json())
+        except Exception as e:
+            raise WeatherError(f"Resposta inválida da API de histórico climático: {str(e)}") from e
@@ -0,0 +1,16 @@
+"""Relatórios agendados por fazenda: conteúdo, renderização XLSX/PDF e armazenamento"""
+from agrogestao.reports.builders import REPORT_TYPES, ReportContent, ReportData, build_reports
+from agrogestao.reports.render import FORMATS, render
+from agrogestao.reports.scheduler import ReportScheduler
+from agrogestao.reports.store import ArtifactStore
+
+__all__ = [
+    "ArtifactStore",
+    "FORMATS",
+    "REPORT_TYPES",
+    "ReportContent",
+    "ReportData",
+    "ReportScheduler",
+    "build_reports",
+    "render",
+]
@@ -0,0 +1,195 @@
+"""Conteúdo dos relatórios agendados por fazenda (local), sem Streamlit.
+
+Cada builder recebe o ``ReportData`` de uma execução (tabelas completas,
+rateio e séries de KPI calculados uma única vez) e devolve um
+``ReportContent``: indicadores de resumo, tabelas (uma aba no XLSX, uma
+seção no PDF) e um gráfico de barras. O hash do conteúdo identifica o
+arquivo gerado: se os dados de uma fazenda não mudaram, o arquivo da
+execução anterior é reaproveitado sem nova renderização.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from agrogestao.analytics import (
+    AllocationRules,
+    KpiSeries,
+    allocate_costs,
+    boxes_by,
+    calculate_financials,
+    period_label,
+    prepare_dates,
+    profit_by,
+    quality_by_product,
+)
+
+REPORT_TYPES = {
+    "producao": "Produção Detalhada",
+    "financeiro": "Resumo Financeiro",
+    "qualidade": "Análise de Qualidade",
+    "custos": "Custos e Insumos",
+}
+
+
+@dataclass
+class ReportContent:
+    """Relatório pronto para renderizar (XLSX ou PDF)"""
+    report: str
+    farm: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+    metrics: dict = field(default_factory=dict)
+    tables: dict = field(default_factory=dict)
+    chart: tuple = None  # (título, série com rótulos no índice)
+
+    @property
+    def title(self):
+        return f"{REPORT_TYPES[self.report]} — {self.farm}"
+
+    @property
+    def period(self):
+        return f"{self.start:%d/%m/%Y} a {self.end:%d/%m/%Y}"
+
+    def content_hash(self):
+        """SHA-256 dos parâmetros e dos dados do relatório"""
+        digest = hashlib.sha256(repr((self.report, self.farm, self.period,
+                                      sorted(self.metrics.items()))).encode("utf-8"))
+        tables = dict(self.tables)
+        if self.chart is not None:
+            tables[self.chart[0]] = self.chart[1].reset_index()
+        for name, table in tables.items():
+            digest.update(f"{name}|{'|'.join(map(str, table.columns))}".encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+
+class ReportData:
+    """Tabelas e cálculos compartilhados pelos relatórios de uma execução"""
+
+    def __init__(self, productions, inputs, start, end, rules=AllocationRules()):
+        self.productions = prepare_dates(productions) if not productions.empty else productions
+        self.inputs = prepare_dates(inputs) if not inputs.empty else inputs
+        self.start = pd.Timestamp(start).normalize()
+        self.end = pd.Timestamp(end).normalize()
+        self.allocated, _ = allocate_costs(self.productions, self.inputs, rules)
+        self.kpis = KpiSeries(rules)
+        self.kpis.update(self.productions, self.inputs)
+
+    def farms(self):
+        """Fazendas (locais) com produção no período"""
+        rows = self._in_range(self.productions)
+        return sorted(rows['local'].dropna().astype(str).unique()) if not rows.empty else []
+
+    def _in_range(self, df):
+        if df.empty or 'date' not in df.columns:
+            return df
+        return df[(df['date'] >= self.start) & (df['date'] <= self.end)]
+
+    def productions_of(self, farm):
+        rows = self._in_range(self.productions)
+        return rows[rows['local'].astype(str) == farm]
+
+    def inputs_of(self, farm):
+        rows = self._in_range(self.inputs)
+        if rows.empty or 'location' not in rows.columns:
+            return rows
+        location = rows['location'].astype(object).fillna("").astype(str).str.strip().str.casefold()
+        return rows[location == farm.strip().casefold()]
+
+
+def _money(value):
+    return f"R$ {value:,.2f}"
+
+
+def build_production(data, farm):
+    rows = data.productions_of(farm)
+    first = rows['first_quality'].astype(np.float64)
+    second = rows['second_quality'].astype(np.float64)
+    revenue = (first * rows['first_price'].astype(np.float64).fillna(0)
+               + second * rows['second_price'].astype(np.float64).fillna(0))
+    table = pd.DataFrame({
+        'Data': rows['date'], 'Cultura': rows['product'].astype(str),
+        '1ª Qualidade': first, '2ª Qualidade': second,
+        'Preço 1ª (R$)': rows['first_price'].astype(np.float64),
+        'Preço 2ª (R$)': rows['second_price'].astype(np.float64),
+        'Receita (R$)': revenue,
+    }).sort_values('Data').reset_index(drop=True)
+    by_product = boxes_by(rows, 'product').set_index('product')['total']
+    return ReportContent("producao", farm, data.start, data.end, metrics={
+        "Total de Caixas": f"{(first + second).sum():,.0f}",
+        "Receita Total": _money(revenue.sum()),
+        "Culturas": f"{rows['product'].nunique()}",
+    }, tables={"Produção": table}, chart=("Caixas por Cultura", by_product))
+
+
+def build_financial(data, farm):
+    rows = data.productions_of(farm)
+    financials = calculate_financials(rows, data.inputs_of(farm), data.allocated)
+    profit = profit_by(rows, data.allocated, ['product']).rename(columns={
+        'product': 'Cultura', 'revenue': 'Receita (R$)', 'cost': 'Custo Rateado (R$)',
+        'profit': 'Lucro (R$)', 'margin': 'Margem (%)'})
+    monthly = data.kpis.totals([farm])
+    monthly = monthly[(monthly['period'].dt.end_time >= data.start)
+                      & (monthly['period'].dt.start_time <= data.end)]
+    evolution = pd.DataFrame({
+        'Mês': monthly['period'].map(period_label), 'Receita (R$)': monthly['revenue'],
+        'Custo Rateado (R$)': monthly['cost'], 'Lucro (R$)': monthly['profit'],
+        'Margem (%)': monthly['margin'], 'Receita Δ% mês ant.': monthly['revenue_pop'],
+        'Receita Δ% ano ant.': monthly['revenue_yoy'],
+    }).reset_index(drop=True)
+    return ReportContent("financeiro", farm, data.start, data.end, metrics={
+        "Receita Total": _money(financials['total_revenue']),
+        "Custos Rateados": _money(financials['total_costs']),
+        "Lucro Líquido": _money(financials['profit']),
+        "Margem de Lucro": f"{financials['profit_margin']:.1f}%",
+    }, tables={"Lucro por Cultura": profit, "Evolução Mensal": evolution},
+        chart=("Lucro por Cultura (R$)", profit.set_index('Cultura')['Lucro (R$)']))
+
+
+def build_quality(data, farm):
+    quality = quality_by_product(data.productions_of(farm))
+    table = pd.DataFrame({
+        'Cultura': quality['product'].astype(str), 'Total Caixas': quality['total'],
+        '1ª Qualidade': quality['first_quality'], '2ª Qualidade': quality['second_quality'],
+        '1ª Qualidade (%)': quality['first_percent'], '2ª Qualidade (%)': quality['second_percent'],
+    }).reset_index(drop=True)
+    total = quality['total'].sum()
+    share = quality['first_quality'].sum() / total * 100 if total > 0 else 0
+    return ReportContent("qualidade", farm, data.start, data.end, metrics={
+        "Total de Caixas": f"{total:,.0f}",
+        "1ª Qualidade": f"{share:.1f}%",
+    }, tables={"Qualidade": table},
+        chart=("1ª Qualidade por Cultura (%)", table.set_index('Cultura')['1ª Qualidade (%)']))
+
+
+def build_costs(data, farm):
+    inputs = data.inputs_of(farm)
+    columns = [c for c in ['date', 'type', 'description', 'quantity', 'unit', 'cost'] if c in inputs.columns]
+    table = inputs[columns].rename(columns={
+        'date': 'Data', 'type': 'Tipo', 'description': 'Descrição', 'quantity': 'Quantidade',
+        'unit': 'Unidade', 'cost': 'Custo (R$)'}).sort_values('Data').reset_index(drop=True) \
+        if columns else pd.DataFrame()
+    by_type = (inputs.groupby(inputs['type'].astype(str))['cost'].sum().astype(np.float64)
+               if not inputs.empty else pd.Series(dtype=np.float64))
+    allocated = data.allocated.reindex(data.productions_of(farm).index, fill_value=0).sum()
+    return ReportContent("custos", farm, data.start, data.end, metrics={
+        "Insumos da Fazenda": _money(by_type.sum()),
+        "Lançamentos": f"{len(inputs)}",
+        "Custo Rateado às Produções": _money(allocated),
+    }, tables={"Insumos": table, "Custo por Tipo": by_type.rename('Custo (R$)').rename_axis('Tipo').reset_index()},
+        chart=("Custo por Tipo (R$)", by_type))
+
+
+BUILDERS = {
+    "producao": build_production,
+    "financeiro": build_financial,
+    "qualidade": build_quality,
+    "custos": build_costs,
+}
+
+
+def build_reports(data, farms=None, reports=tuple(REPORT_TYPES)):
+    """Conteúdo de cada tipo de relatório para cada fazenda"""
+    return [BUILDERS[report](data, farm) for farm in (farms or data.farms()) for report in reports]
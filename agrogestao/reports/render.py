@@ -0,0 +1,108 @@
+"""Renderização dos relatórios em XLSX (xlsxwriter) e PDF (matplotlib).
+
+As funções recebem um ``ReportContent`` e devolvem os bytes do arquivo;
+são chamadas nos processos do pool do agendador, então não dependem de
+estado global (o PDF usa ``Figure`` direto, sem ``pyplot``). O matplotlib
+só é importado ao renderizar, fora da inicialização do app.
+"""
+import io
+
+import pandas as pd
+
+FORMATS = ("xlsx", "pdf")
+PDF_ROWS_PER_PAGE = 32
+PDF_MAX_ROWS = 320
+A4_LANDSCAPE = (11.69, 8.27)
+
+
+def _naive(table):
+    # Excel não aceita datas com fuso
+    table = table.copy()
+    for col in table.columns:
+        if isinstance(table[col].dtype, pd.DatetimeTZDtype):
+            table[col] = table[col].dt.tz_localize(None)
+    return table
+
+
+def render_xlsx(content):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        summary = pd.DataFrame({
+            'Indicador': ["Relatório", "Fazenda", "Período"] + list(content.metrics),
+            'Valor': [content.title, content.farm, content.period] + list(content.metrics.values()),
+        })
+        summary.to_excel(writer, sheet_name="Resumo", index=False)
+        writer.sheets["Resumo"].set_column(0, 1, 32)
+        for name, table in content.tables.items():
+            sheet = name[:31]
+            _naive(table).to_excel(writer, sheet_name=sheet, index=False)
+            writer.sheets[sheet].set_column(0, max(len(table.columns) - 1, 0), 16)
+    return output.getvalue()
+
+
+def _cell(value):
+    if isinstance(value, float):
+        return "-" if pd.isna(value) else f"{value:,.2f}"
+    if isinstance(value, pd.Timestamp):
+        return f"{value:%d/%m/%Y}"
+    return str(value)
+
+
+def _summary_page(content):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=A4_LANDSCAPE)
+    fig.suptitle(content.title, fontsize=16, x=0.05, ha='left')
+    fig.text(0.05, 0.9, f"Período: {content.period}", fontsize=11)
+    for i, (label, value) in enumerate(content.metrics.items()):
+        fig.text(0.05, 0.82 - i * 0.05, f"{label}: {value}", fontsize=12)
+    if content.chart is not None and not content.chart[1].empty:
+        title, series = content.chart
+        ax = fig.add_axes([0.45, 0.12, 0.5, 0.72])
+        series = series.astype('float64').sort_values()
+        ax.barh([str(label) for label in series.index], series.to_numpy(), color='#2ecc71')
+        ax.set_title(title)
+        ax.grid(axis='x', alpha=0.3)
+    return fig
+
+
+def _table_pages(name, table):
+    from matplotlib.figure import Figure
+
+    rows = table.head(PDF_MAX_ROWS)
+    for start in range(0, max(len(rows), 1), PDF_ROWS_PER_PAGE):
+        chunk = rows.iloc[start:start + PDF_ROWS_PER_PAGE]
+        fig = Figure(figsize=A4_LANDSCAPE)
+        ax = fig.add_axes([0.03, 0.03, 0.94, 0.87])
+        ax.axis('off')
+        fig.suptitle(name if start == 0 else f"{name} (cont.)", fontsize=13, x=0.03, ha='left')
+        if chunk.empty:
+            ax.text(0, 1, "Sem registros no período.", va='top')
+        else:
+            # Texto monoespaçado: bem mais rápido que ``ax.table`` em tabelas longas
+            text = chunk.to_string(index=False, formatters={c: _cell for c in chunk.columns})
+            ax.text(0, 1, text, va='top', family='monospace', fontsize=9)
+        if start + PDF_ROWS_PER_PAGE >= len(rows) and len(table) > PDF_MAX_ROWS:
+            fig.text(0.03, 0.01, f"Exibindo {PDF_MAX_ROWS} de {len(table)} linhas; a lista completa está no XLSX.",
+                     fontsize=8)
+        yield fig
+
+
+def render_pdf(content):
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    output = io.BytesIO()
+    with PdfPages(output, metadata={'Title': content.title}) as pdf:
+        pdf.savefig(_summary_page(content))
+        for name, table in content.tables.items():
+            for fig in _table_pages(name, table):
+                pdf.savefig(fig)
+    return output.getvalue()
+
+
+RENDERERS = {"xlsx": render_xlsx, "pdf": render_pdf}
+
+
+def render(content, fmt):
+    """Bytes do relatório no formato ``fmt`` (``"xlsx"`` ou ``"pdf"``)"""
+    return RENDERERS[fmt](content)
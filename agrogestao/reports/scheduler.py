@@ -0,0 +1,224 @@
+"""Geração agendada dos relatórios por fazenda.
+
+Uma execução carrega as tabelas uma vez, monta o conteúdo dos quatro
+tipos de relatório para cada fazenda (local) com produção na janela e
+renderiza XLSX e PDF em um pool de processos. Relatórios cujo hash de
+conteúdo já tem arquivo no ``ArtifactStore`` não são renderizados de
+novo. Cada horário agendado (``slot``) roda uma única vez, mesmo com
+vários processos agendando: o primeiro a pegar o lock de execução gera
+e registra o slot no manifesto.
+
+A agenda roda fora do app por padrão (cron ou o processo abaixo); com
+``AGRO_REPORT_IN_APP=1`` cada processo do Streamlit também a dispara.
+
+Uso (ex.: pelo cron, fora do horário de uso):
+    python -m agrogestao.reports.scheduler --once
+ou, como processo contínuo que espera cada horário agendado:
+    python -m agrogestao.reports.scheduler
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from agrogestao.config import REPORT_HOUR, REPORT_SCHEDULE, TIMEZONE
+from agrogestao.reports.builders import REPORT_TYPES, ReportData, build_reports
+from agrogestao.reports.render import FORMATS, render
+from agrogestao.reports.store import ArtifactStore
+
+logger = logging.getLogger("agrogestao.reports")
+
+# Intervalo entre execuções e janela coberta pelos relatórios (dias)
+SCHEDULES = {"nightly": (1, 30), "weekly": (7, 90)}
+
+
+def _render_job(job):
+    content, fmt = job
+    return render(content, fmt)
+
+
+class ReportScheduler:
+    """Execuções agendadas (``start``) ou avulsas (``run_once``) dos relatórios.
+
+    ``load_tables`` devolve ``(produções, insumos)`` completos. ``workers``
+    é o tamanho do pool de renderização (0 renderiza no próprio processo).
+    """
+
+    def __init__(self, load_tables, store=None, schedule=REPORT_SCHEDULE, hour=REPORT_HOUR,
+                 days=None, workers=None, formats=FORMATS, reports=tuple(REPORT_TYPES)):
+        if schedule not in SCHEDULES and schedule != "off":
+            raise ValueError(f"Agenda inválida: {schedule!r} (use {', '.join(SCHEDULES)} ou off)")
+        self.load_tables = load_tables
+        self.store = store or ArtifactStore()
+        self.schedule = schedule
+        self.hour = hour
+        self.days = days or SCHEDULES.get(schedule, SCHEDULES["nightly"])[1]
+        self.workers = min(4, os.cpu_count() or 1) if workers is None else workers
+        self.formats = tuple(formats)
+        self.reports = tuple(reports)
+        self.last_error = None
+        self._thread = None
+        self._manual = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def slot(self, now=None):
+        """Horário agendado mais recente já alcançado (chave da execução)"""
+        now = pd.Timestamp.now(tz=TIMEZONE) if now is None else pd.Timestamp(now).tz_convert(TIMEZONE)
+        every = SCHEDULES[self.schedule][0] if self.schedule in SCHEDULES else 1
+        slot = now.normalize() + pd.Timedelta(hours=self.hour)
+        if slot > now:
+            slot -= pd.Timedelta(days=1)
+        if every == 7:
+            # Semanal: segunda-feira
+            slot -= pd.Timedelta(days=slot.dayofweek)
+        return slot
+
+    def next_run(self, now=None):
+        every = SCHEDULES[self.schedule][0] if self.schedule in SCHEDULES else 1
+        return self.slot(now) + pd.Timedelta(days=every)
+
+    def run_once(self, end=None, run=None):
+        """Gera os relatórios da janela que termina em ``end`` (padrão: ontem); devolve as entradas"""
+        started = time.perf_counter()
+        if end is None:
+            end = pd.Timestamp.now(tz=TIMEZONE).tz_localize(None).normalize() - pd.Timedelta(days=1)
+        end = pd.Timestamp(end)
+        days = self.days
+        productions, inputs = self.load_tables()
+        if productions.empty:
+            return []
+        data = ReportData(productions, inputs, end - pd.Timedelta(days=days - 1), end)
+        contents = build_reports(data, reports=self.reports)
+
+        # Só renderiza o que não tem arquivo com o mesmo hash de conteúdo
+        jobs, reused = [], []
+        for content in contents:
+            content_hash = content.content_hash()
+            for fmt in self.formats:
+                if self.store.exists(self.store.file_name(content, content_hash, fmt)):
+                    reused.append((content, content_hash, fmt))
+                else:
+                    jobs.append((content, content_hash, fmt))
+
+        rendered = self._render([(content, fmt) for content, _, fmt in jobs])
+        entries = [self.store.add(content, content_hash, fmt, data, run=run)
+                   for (content, content_hash, fmt), data in zip(jobs, rendered)]
+        entries += [self.store.add(content, content_hash, fmt, run=run) for content, content_hash, fmt in reused]
+        removed = self.store.prune()
+        logger.info("Relatórios: %d gerados, %d reaproveitados, %d removidos em %.1f s",
+                    len(jobs), len(reused), len(removed), time.perf_counter() - started)
+        return entries
+
+    def _render(self, jobs):
+        if self.workers <= 1 or len(jobs) <= 1:
+            return [_render_job(job) for job in jobs]
+        # spawn: processos limpos, sem herdar threads do Streamlit
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            return list(pool.map(_render_job, jobs))
+
+    def run_pending(self, now=None):
+        """Executa o slot atual se nenhum processo o executou ainda; devolve se executou"""
+        slot = f"{self.slot(now):%Y-%m-%dT%H:%M}"
+        with self.store.lock("run"):
+            if slot in self.store.manifest()["runs"]:
+                return False
+            entries = self.run_once(run=slot)
+            self.store.record_run(slot, {"finished_at": time.time(), "entries": len(entries)})
+            return True
+
+    def run_forever(self):
+        # Nunca gera ao iniciar: espera o próximo horário agendado (geração avulsa: generate_now)
+        while True:
+            now = pd.Timestamp.now(tz=TIMEZONE)
+            time.sleep(max((self.next_run(now) - now).total_seconds(), 60))
+            try:
+                self.run_pending()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Falha ao gerar relatórios agendados: %s", e)
+
+    @property
+    def generating(self):
+        return self._manual is not None and self._manual.is_alive()
+
+    def generate_now(self):
+        """Gera os relatórios agora, em background; devolve ``False`` se já houver geração avulsa"""
+        def run():
+            try:
+                with self.store.lock("run"):
+                    self.run_once(run=f"{pd.Timestamp.now(tz=TIMEZONE):%Y-%m-%dT%H:%M}")
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Falha ao gerar relatórios: %s", e)
+
+        with self._lock:
+            if self.generating:
+                return False
+            self._manual = threading.Thread(target=run, name="report-generate", daemon=True)
+            self._manual.start()
+            return True
+
+    def start(self):
+        """Dispara a agenda em background (nada se ``schedule`` for ``off``)"""
+        with self._lock:
+            if self.schedule == "off" or self.running:
+                return False
+            self._thread = threading.Thread(target=self.run_forever, name="report-scheduler", daemon=True)
+            self._thread.start()
+            return True
+
+
+def server_tables(client_factory=None):
+    """Loader de ``(produções, insumos)`` lidos direto do banco, sem outbox.
+
+    O processo agendado não grava nada: um ``DataService`` reaplicaria o
+    outbox local do app e levaria linhas ainda não confirmadas aos
+    relatórios.
+    """
+    from agrogestao.data import TableCache, repository
+    from agrogestao.data.compact import compact_frame
+
+    client_factory = client_factory or repository.create_supabase_client
+    tables = TableCache(lambda table: repository.fetch_table(client_factory(), table), prepare=compact_frame)
+    return lambda: (tables.get("productions"), tables.get("inputs"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Geração dos relatórios por fazenda (XLSX/PDF)")
+    parser.add_argument("--once", action="store_true", help="gera agora, sem esperar o horário agendado")
+    parser.add_argument("--schedule", choices=list(SCHEDULES), default=REPORT_SCHEDULE
+                        if REPORT_SCHEDULE in SCHEDULES else "nightly")
+    parser.add_argument("--hour", type=int, default=REPORT_HOUR)
+    parser.add_argument("--days", type=int, help="janela coberta pelos relatórios (padrão da agenda)")
+    parser.add_argument("--workers", type=int, default=None, help="processos de renderização")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    scheduler = ReportScheduler(server_tables(), schedule=args.schedule, hour=args.hour, days=args.days,
+                                workers=args.workers, formats=args.formats)
+    if args.once:
+        # Mesmo lock das execuções dos workers: o prune de uma não apaga arquivos da outra
+        with scheduler.store.lock("run"):
+            scheduler.run_once(run=f"{pd.Timestamp.now(tz=TIMEZONE):%Y-%m-%dT%H:%M}")
+        return
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
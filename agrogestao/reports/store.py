@@ -0,0 +1,143 @@
+"""Arquivos de relatório gerados, nomeados pelo hash do conteúdo.
+
+O diretório guarda os arquivos e um ``manifest.json`` com uma entrada
+por relatório gerado (tipo, fazenda, período, formato, hash, arquivo e
+horário). Execuções com o mesmo conteúdo apontam para o mesmo arquivo.
+A retenção mantém as ``keep`` entradas mais recentes de cada (tipo,
+fazenda, formato) e descarta as mais antigas que ``max_age_days``;
+arquivos sem entrada são apagados.
+"""
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from agrogestao.config import REPORTS_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+MANIFEST = "manifest.json"
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.strip().lower()).strip('-') or 'fazenda'
+
+
+class ArtifactStore:
+    """Relatórios prontos para download, com retenção"""
+
+    def __init__(self, directory=REPORTS_DIR, keep=7, max_age_days=90):
+        self.directory = directory
+        self.keep = keep
+        self.max_age_days = max_age_days
+        os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def lock(self, name="manifest"):
+        """Lock exclusivo entre processos (e threads): ``manifest`` ou ``run`` (uma execução por vez)"""
+        with open(os.path.join(self.directory, f".{name}.lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"entries": [], "runs": {}}
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        mode = "wb" if isinstance(data, bytes) else "w"
+        with open(tmp, mode, **({} if mode == "wb" else {"encoding": "utf-8"})) as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _save_manifest(self, manifest):
+        self._write(MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=1))
+
+    @staticmethod
+    def file_name(content, content_hash, fmt):
+        return f"{content.report}-{_slug(content.farm)}-{content_hash[:16]}.{fmt}"
+
+    def exists(self, file_name):
+        return os.path.exists(os.path.join(self.directory, file_name))
+
+    def path(self, entry):
+        return os.path.join(self.directory, entry["file"])
+
+    def read(self, entry):
+        with open(self.path(entry), "rb") as f:
+            return f.read()
+
+    def add(self, content, content_hash, fmt, data=None, run=None):
+        """Registra o relatório; ``data`` (bytes) só é preciso se o arquivo ainda não existe"""
+        name = self.file_name(content, content_hash, fmt)
+        if data is not None and not self.exists(name):
+            self._write(name, data)
+        entry = {
+            "report": content.report, "farm": content.farm, "format": fmt,
+            "start": f"{content.start:%Y-%m-%d}", "end": f"{content.end:%Y-%m-%d}",
+            "hash": content_hash, "file": name, "size": os.path.getsize(os.path.join(self.directory, name)),
+            "built_at": time.time(), "run": run,
+        }
+        with self.lock():
+            manifest = self.manifest()
+            manifest["entries"].append(entry)
+            self._save_manifest(manifest)
+        return entry
+
+    def record_run(self, slot, summary):
+        with self.lock():
+            manifest = self.manifest()
+            manifest["runs"][slot] = summary
+            self._save_manifest(manifest)
+
+    def latest(self, farms=None):
+        """Entrada mais recente de cada (tipo, fazenda, formato)"""
+        latest = {}
+        for entry in self.manifest()["entries"]:
+            if farms and entry["farm"] not in farms:
+                continue
+            key = (entry["report"], entry["farm"], entry["format"])
+            if key not in latest or entry["built_at"] >= latest[key]["built_at"]:
+                latest[key] = entry
+        return sorted(latest.values(), key=lambda e: (e["farm"], e["report"], e["format"]))
+
+    def prune(self, now=None):
+        """Aplica a retenção; devolve os arquivos apagados"""
+        now = now or time.time()
+        with self.lock():
+            manifest = self.manifest()
+            groups = {}
+            for entry in manifest["entries"]:
+                groups.setdefault((entry["report"], entry["farm"], entry["format"]), []).append(entry)
+            kept = []
+            for entries in groups.values():
+                entries.sort(key=lambda e: e["built_at"], reverse=True)
+                # A mais recente fica sempre, mesmo se antiga
+                kept += [entries[0]] + [e for e in entries[1:self.keep]
+                                        if now - e["built_at"] <= self.max_age_days * 86400]
+            manifest["entries"] = sorted(kept, key=lambda e: e["built_at"])
+            runs = sorted(manifest["runs"])
+            manifest["runs"] = {slot: manifest["runs"][slot] for slot in runs[-self.keep * 4:]}
+            self._save_manifest(manifest)
+
+            referenced = {entry["file"] for entry in kept}
+            removed = []
+            for name in os.listdir(self.directory):
+                if name.rsplit(".", 1)[-1] in ("xlsx", "pdf") and name not in referenced:
+                    os.remove(os.path.join(self.directory, name))
+                    removed.append(name)
+            return removed
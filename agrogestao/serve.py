@@ -0,0 +1,256 @@
+"""Execução com vários workers do Streamlit atrás de um balanceador local.
+
+Cada worker é um processo ``streamlit run app.py`` próprio (sem disputar
+o GIL com os demais) e todos compartilham as tabelas e os rateios pelo
+diretório de snapshots (``AGRO_SHARED_CACHE_DIR``). O balanceador é um
+proxy em asyncio: a conexão inteira (HTTP ou WebSocket da sessão) vai
+para um único worker, escolhido pelo cookie de afinidade
+(``agro_worker``) lido no cabeçalho da primeira requisição. Sem cookie,
+a estratégia (``least-conn``, ``round-robin`` ou ``ip-hash``) escolhe o
+worker e o cookie é incluído na resposta, de modo que as requisições
+seguintes do navegador (WebSocket da sessão, downloads em ``/media``,
+uploads) chegam ao worker que guarda os arquivos em memória da sessão.
+Se o worker cair, o navegador é realocado e recebe um cookie novo.
+
+Uso:
+    python -m agrogestao.serve --workers 4 --port 8501
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import signal
+import subprocess
+import sys
+
+from agrogestao.config import DATA_DIR
+
+logger = logging.getLogger("agrogestao.serve")
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+STRATEGIES = ("least-conn", "round-robin", "ip-hash")
+CONNECT_TIMEOUT = 2.0
+AFFINITY_COOKIE = "agro_worker"
+HEAD_TIMEOUT = 30.0
+MAX_HEAD = 64 * 1024
+
+
+async def _read_head(reader):
+    """Bytes lidos até o fim do cabeçalho HTTP (ou o que vier, se não for HTTP)"""
+    data = b""
+    while b"\r\n\r\n" not in data and len(data) < MAX_HEAD:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def affinity(head):
+    """Worker do cookie de afinidade no cabeçalho da requisição (``None`` sem cookie)"""
+    end = head.find(b"\r\n\r\n")
+    for line in head[:end if end >= 0 else len(head)].split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() != b"cookie":
+            continue
+        for part in value.decode("latin-1").split(";"):
+            key, _, worker = part.strip().partition("=")
+            if key == AFFINITY_COOKIE and worker.isdigit():
+                return int(worker)
+    return None
+
+
+def with_header(head, line):
+    """Cabeçalho HTTP com ``line`` incluída antes da linha em branco"""
+    end = head.find(b"\r\n\r\n")
+    if end < 0:
+        return head
+    return head[:end] + b"\r\n" + line + head[end:]
+
+
+class Balancer:
+    """Proxy que distribui conexões entre ``backends`` ((host, porta)) com afinidade por cookie"""
+
+    def __init__(self, backends, strategy="least-conn"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia inválida: {strategy!r} (use {', '.join(STRATEGIES)})")
+        self.backends = list(backends)
+        self.strategy = strategy
+        self.connections = [0] * len(self.backends)
+        self._counter = itertools.count()
+
+    def candidates(self, client_host, preferred=None):
+        """Ordem de tentativa dos backends: o escolhido e, se falhar, os seguintes"""
+        n = len(self.backends)
+        if preferred is not None and 0 <= preferred < n:
+            first = preferred
+        elif self.strategy == "ip-hash":
+            first = int(hashlib.md5(client_host.encode()).hexdigest(), 16) % n
+        elif self.strategy == "least-conn":
+            first = min(range(n), key=self.connections.__getitem__)
+        else:
+            first = next(self._counter) % n
+        return [(first + i) % n for i in range(n)]
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            head = await asyncio.wait_for(_read_head(reader), HEAD_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            writer.close()
+            return
+        preferred = affinity(head)
+        for index in self.candidates(peer[0], preferred):
+            try:
+                upstream = await asyncio.wait_for(asyncio.open_connection(*self.backends[index]),
+                                                  CONNECT_TIMEOUT)
+                break
+            except (OSError, asyncio.TimeoutError):
+                # Worker reiniciando ou fora do ar: tenta o próximo
+                continue
+        else:
+            logger.warning("Nenhum worker disponível para %s", peer[0])
+            writer.close()
+            return
+
+        up_reader, up_writer = upstream
+        # Navegador novo (ou realocado porque o worker caiu): grava a afinidade
+        cookie = None
+        if index != preferred:
+            cookie = f"Set-Cookie: {AFFINITY_COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax".encode()
+        self.connections[index] += 1
+        try:
+            up_writer.write(head)
+            await asyncio.gather(_pipe(reader, up_writer), _pipe_response(up_reader, writer, cookie))
+        finally:
+            self.connections[index] -= 1
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def _pipe_response(reader, writer, cookie=None):
+    """Repassa as respostas do worker, com ``cookie`` no cabeçalho da primeira"""
+    if cookie is not None:
+        try:
+            writer.write(with_header(await _read_head(reader), cookie))
+            await writer.drain()
+        except (ConnectionError, OSError):
+            writer.close()
+            return
+    await _pipe(reader, writer)
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        writer.close()
+
+
+class WorkerPool:
+    """Processos ``streamlit run`` em portas consecutivas, reiniciados se caírem"""
+
+    def __init__(self, count, base_port, shared_dir, app_path=APP_PATH, streamlit_args=()):
+        self.count = count
+        self.base_port = base_port
+        self.shared_dir = os.path.abspath(shared_dir)
+        self.app_path = app_path
+        self.streamlit_args = list(streamlit_args)
+        self.processes = [None] * count
+
+    @property
+    def backends(self):
+        return [("127.0.0.1", self.base_port + i) for i in range(self.count)]
+
+    def _spawn(self, index):
+        env = dict(os.environ, AGRO_WORKER_ID=str(index), AGRO_SHARED_CACHE_DIR=self.shared_dir)
+        command = [sys.executable, "-m", "streamlit", "run", self.app_path,
+                   "--server.port", str(self.base_port + index),
+                   "--server.address", "127.0.0.1",
+                   "--server.headless", "true"] + self.streamlit_args
+        self.processes[index] = subprocess.Popen(command, env=env)
+
+    def start(self):
+        os.makedirs(self.shared_dir, exist_ok=True)
+        for index in range(self.count):
+            self._spawn(index)
+        return self
+
+    async def supervise(self, interval=5.0):
+        while True:
+            await asyncio.sleep(interval)
+            for index, process in enumerate(self.processes):
+                if process is not None and process.poll() is not None:
+                    logger.warning("Worker %d saiu com código %s; reiniciando", index, process.returncode)
+                    self._spawn(index)
+
+    def stop(self, timeout=10):
+        for process in self.processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                try:
+                    process.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+async def run(args):
+    pool = WorkerPool(args.workers, args.worker_port, args.shared_dir,
+                      streamlit_args=args.streamlit_args).start()
+    balancer = Balancer(pool.backends, args.strategy)
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # Windows
+            pass
+    tasks = [asyncio.create_task(balancer.serve(args.host, args.port)),
+             asyncio.create_task(pool.supervise())]
+    logger.info("Balanceador em http://%s:%d -> %d workers (%s)", args.host, args.port,
+                args.workers, args.strategy)
+    try:
+        await stopping.wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+        pool.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AgroGestão com vários workers e cache compartilhado")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8501, help="porta do balanceador")
+    parser.add_argument("--worker-port", type=int, default=8510, help="porta do primeiro worker")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="least-conn",
+                        help="escolha do worker para navegadores sem cookie de afinidade")
+    parser.add_argument("--shared-dir", default=os.environ.get("AGRO_SHARED_CACHE_DIR")
+                        or os.path.join(DATA_DIR, "shared"))
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER,
+                        help="argumentos extras para o streamlit (após --)")
+    args = parser.parse_args(argv)
+    args.streamlit_args = [a for a in args.streamlit_args if a != "--"]
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Substitutos locais de serviços externos para testes e benchmarks"""
+from agrogestao.testing.supabase_server import StubSupabaseServer
+from agrogestao.testing.weather_server import StubWeatherServer
+
+__all__ = ["StubSupabaseServer", "StubWeatherServer"]
@@ -0,0 +1,349 @@
+"""Servidor HTTP local que imita o PostgREST do Supabase (subconjunto).
+
+Guarda as tabelas em memória e atende o que o app usa pelo cliente
+oficial: ``select`` com filtros (``eq``, ``neq``, ``gt``, ``gte``,
+``lt``, ``lte``, ``is``, ``in``, ``like``, ``ilike``, ``or``/``and``,
+``not.``), ``order`` com ``nullsfirst``/``nullslast``, ``limit`` e
+``offset``; ``insert``/``upsert`` com ``on_conflict`` e
+``resolution=ignore-duplicates``/``merge-duplicates``; e ``delete``
+com filtros. ``latency`` soma um atraso fixo a cada requisição, para
+simular a ida e volta da rede.
+
+Uso:
+    python -m agrogestao.testing.supabase_server --port 8766
+    SUPABASE_URL=http://127.0.0.1:8766 SUPABASE_KEY=stub streamlit run app.py
+"""
+import argparse
+import fnmatch
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+TABLES = ("productions", "inputs", "weather_observations")
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class QueryError(ValueError):
+    """Filtro ou parâmetro fora do subconjunto suportado (HTTP 400)"""
+
+
+def _split(text):
+    """Separa por vírgulas de nível zero (fora de parênteses e aspas)"""
+    parts, depth, quoted, current, i = [], 0, False, "", 0
+    while i < len(text):
+        char = text[i]
+        if char == "\\" and quoted:
+            current += text[i:i + 2]
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+        i += 1
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _compare(a, b):
+    """Compara como número quando os dois lados são numéricos; senão como texto"""
+    try:
+        a, b = float(a), float(b)
+    except (TypeError, ValueError):
+        a, b = str(a), str(b)
+    return (a > b) - (a < b)
+
+
+def _operator(op, value):
+    """Predicado de um valor da linha para ``op.value`` do PostgREST"""
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        return lambda x: x is expected if expected is None or isinstance(expected, bool) else x == expected
+    if op == "in":
+        if not (value.startswith("(") and value.endswith(")")):
+            raise QueryError(f"Lista inválida para in: {value!r}")
+        options = [_unquote(v) for v in _split(value[1:-1])]
+        return lambda x: x is not None and any(_compare(x, v) == 0 for v in options)
+    value = _unquote(value)
+    comparisons = {
+        "eq": lambda c: c == 0, "neq": lambda c: c != 0, "gt": lambda c: c > 0,
+        "gte": lambda c: c >= 0, "lt": lambda c: c < 0, "lte": lambda c: c <= 0,
+    }
+    if op in comparisons:
+        test = comparisons[op]
+        return lambda x: x is not None and test(_compare(x, value))
+    if op in ("like", "ilike"):
+        # PostgREST aceita * no lugar de % nos padrões
+        pattern = value.replace("%", "*")
+        if op == "ilike":
+            return lambda x: x is not None and fnmatch.fnmatchcase(str(x).lower(), pattern.lower())
+        return lambda x: x is not None and fnmatch.fnmatchcase(str(x), pattern)
+    raise QueryError(f"Operador não suportado: {op!r}")
+
+
+def _condition(column, expression):
+    """Predicado da linha para ``coluna=op.valor`` (com ``not.`` opcional)"""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition(".")
+    test = _operator(op, value)
+    if negate:
+        return lambda row: not test(row.get(column))
+    return lambda row: test(row.get(column))
+
+
+def _logic(name, text):
+    """Predicado de ``or=(...)``/``and=(...)``, com grupos aninhados"""
+    if not (text.startswith("(") and text.endswith(")")):
+        raise QueryError(f"Grupo inválido em {name}: {text!r}")
+    tests = []
+    for part in _split(text[1:-1]):
+        for group in ("or", "and", "not.or", "not.and"):
+            if part.startswith(group + "("):
+                inner = _logic(group.split(".")[-1], part[len(group):])
+                tests.append((lambda t: lambda row: not t(row))(inner) if group.startswith("not.") else inner)
+                break
+        else:
+            column, _, expression = part.partition(".")
+            tests.append(_condition(column, expression))
+    combine = any if name == "or" else all
+    return lambda row: combine(test(row) for test in tests)
+
+
+def _sort(rows, order):
+    """Ordena por ``col.desc.nullslast,col2`` (estável, da última chave para a primeira)"""
+    for term in reversed([t for t in order.split(",") if t]):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        # Padrão do Postgres: nulos por último em asc e primeiro em desc
+        nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: (isinstance(r[column], str), r[column]), reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "AgroSupabaseStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, code, message):
+        # Mesmo formato de erro do PostgREST (o cliente valida os quatro campos)
+        self._send(status, {"code": code, "message": message, "details": None, "hint": None})
+
+    def _request(self):
+        """(tabela, filtros, parâmetros) da URL ``/rest/v1/<tabela>?...``"""
+        url = urlparse(self.path)
+        prefix = "/rest/v1/"
+        if not url.path.startswith(prefix):
+            return None, None, None
+        table = url.path[len(prefix):].strip("/")
+        params, filters = {}, []
+        for key, value in parse_qsl(url.query, keep_blank_values=True):
+            if key in RESERVED_PARAMS:
+                params[key] = value
+            elif key in ("or", "and"):
+                filters.append(_logic(key, value))
+            elif key in ("not.or", "not.and"):
+                test = _logic(key[4:], value)
+                filters.append(lambda row, t=test: not t(row))
+            else:
+                filters.append(_condition(key, value))
+        return table, filters, params
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _handle(self, method):
+        stub = self.server.stub
+        if stub.latency:
+            time.sleep(stub.latency)
+        try:
+            # Lê o corpo sempre: a conexão é reaproveitada (keep-alive)
+            body = self._body()
+            table, filters, params = self._request()
+            if table is None:
+                return self._error(404, "PGRST125", "Invalid path specified in request URL")
+            stub.record(method, table)
+            if table not in stub.tables:
+                return self._error(404, "42P01", f'relation "public.{table}" does not exist')
+            prefer = self.headers.get("Prefer", "")
+            if method == "GET":
+                return self._send(200, stub.select(table, filters, params))
+            if method == "POST":
+                rows = body
+                rows = rows if isinstance(rows, list) else [rows]
+                written = stub.insert(table, rows, params.get("on_conflict"), prefer)
+                return self._send(201, written if "return=representation" in prefer else None)
+            if method == "DELETE":
+                removed = stub.delete(table, filters)
+                return self._send(200, removed if "return=representation" in prefer else None)
+            return self._error(405, "PGRST117", f"Método não suportado: {method}")
+        except (QueryError, ValueError) as e:
+            return self._error(400, "PGRST100", str(e))
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class StubSupabaseServer:
+    """Servidor stub em uma thread; use como context manager.
+
+    ``url`` vai em ``SUPABASE_URL`` (qualquer ``SUPABASE_KEY`` serve).
+    ``tables`` mapeia nome -> lista de registros iniciais; ``requests``
+    conta as chamadas recebidas por ``(método, tabela)``.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, tables=None, latency=0.0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.requests = {}
+        self.tables = {name: [] for name in TABLES}
+        self._next_id = {}
+        for name, rows in (tables or {}).items():
+            self.load(name, rows)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, method, table):
+        with self._lock:
+            key = (method, table)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def load(self, table, rows):
+        """Substitui o conteúdo de ``table`` por cópias de ``rows``"""
+        rows = [dict(row) for row in rows]
+        with self._lock:
+            self.tables[table] = rows
+            ids = [row["id"] for row in rows if isinstance(row.get("id"), int)]
+            self._next_id[table] = max(ids, default=0) + 1
+
+    def select(self, table, filters, params):
+        with self._lock:
+            rows = [row for row in self.tables[table] if all(test(row) for test in filters)]
+        if params.get("order"):
+            rows = _sort(rows, params["order"])
+        offset = int(params.get("offset") or 0)
+        limit = params.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+        columns = params.get("select", "*")
+        if columns != "*":
+            names = [c.strip() for c in columns.split(",")]
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return rows
+
+    def insert(self, table, rows, on_conflict=None, prefer=""):
+        """Grava ``rows``; com conflito na coluna ``on_conflict``, ignora ou mescla conforme o ``Prefer``"""
+        ignore = "resolution=ignore-duplicates" in prefer
+        merge = "resolution=merge-duplicates" in prefer
+        conflict = on_conflict or ("id" if ignore or merge else None)
+        written = []
+        with self._lock:
+            data = self.tables[table]
+            existing = {row.get(conflict): row for row in data if row.get(conflict) is not None} if conflict else {}
+            for row in rows:
+                row = dict(row)
+                current = existing.get(row.get(conflict)) if conflict else None
+                if current is not None:
+                    if merge:
+                        current.update(row)
+                        written.append(dict(current))
+                    elif not ignore:
+                        raise ValueError(f"duplicate key value violates unique constraint on {conflict}")
+                    continue
+                if row.get("id") is None:
+                    row["id"] = self._next_id.get(table, 1)
+                if isinstance(row["id"], int):
+                    self._next_id[table] = max(self._next_id.get(table, 1), row["id"] + 1)
+                data.append(row)
+                if conflict:
+                    existing[row.get(conflict)] = row
+                written.append(dict(row))
+        return written
+
+    def delete(self, table, filters):
+        with self._lock:
+            kept, removed = [], []
+            for row in self.tables[table]:
+                (removed if all(test(row) for test in filters) else kept).append(row)
+            self.tables[table] = kept
+        return removed
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="supabase-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub do PostgREST do Supabase")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="atraso por requisição")
+    args = parser.parse_args()
+    server = StubSupabaseServer(args.host, args.port, latency=args.latency_ms / 1000)
+    print(f"Stub do Supabase em {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
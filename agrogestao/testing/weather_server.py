@@ -0,0 +1,162 @@
+"""Servidor HTTP local que imita a API OpenWeather (atual e histórico).
+
+Os valores são sintéticos e determinísticos por (cidade, hora): ciclo
+diário e anual de temperatura, umidade inversa à temperatura e chuvas
+esparsas. Serve ``/data/2.5/weather`` e ``/data/2.5/history/city``.
+
+Uso:
+    python -m agrogestao.testing.weather_server --port 8765
+    AGRO_WEATHER_API_URL=http://127.0.0.1:8765 \\
+    AGRO_WEATHER_HISTORY_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+MAX_HISTORY_HOURS = 24 * 7
+
+
+def _city_seed(city):
+    return int(hashlib.md5(city.strip().lower().encode("utf-8")).hexdigest()[:8], 16)
+
+
+def synthetic_hours(city, hours):
+    """Temperatura, umidade e chuva sintéticas para horas desde a época (UTC)"""
+    hours = np.asarray(hours, dtype=np.int64)
+    seed = _city_seed(city)
+    offset = (seed % 600) / 100 - 3
+    local_hour = (hours - 3) % 24
+    day_of_year = (hours // 24) % 365
+    temperature = (22 + offset + 6 * np.sin(2 * np.pi * (local_hour - 9) / 24)
+                   + 4 * np.cos(2 * np.pi * (day_of_year - 15) / 365))
+    humidity = np.clip(70 - 2.5 * (temperature - 22), 20, 100)
+    # Hash inteiro por hora: chuva em ~6% das horas, sem estado entre chamadas
+    mix = (hours * 2654435761 + seed) % 1000
+    rain = np.where(mix < 60, (mix % 40) / 10, 0.0)
+    return temperature.round(2), humidity.round(0), rain.round(1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "AgroWeatherStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.stub.record(url.path)
+        city = params.get("q")
+        if not city:
+            return self._send(400, {"cod": "400", "message": "Nothing to geocode"})
+        if url.path == "/data/2.5/weather":
+            return self._send(200, self._current(city))
+        if url.path == "/data/2.5/history/city":
+            return self._send(200, self._history(city, params))
+        return self._send(404, {"cod": "404", "message": "Not found"})
+
+    def _current(self, city):
+        # A estação "mede" a cada 10 minutos, como na API real
+        dt = int(time.time()) // 600 * 600
+        temperature, humidity, rain = synthetic_hours(city, [dt // 3600])
+        data = {
+            "dt": dt,
+            "name": city,
+            "sys": {"country": "BR"},
+            "main": {"temp": float(temperature[0]), "humidity": float(humidity[0])},
+            "weather": [{"description": "chuva leve" if rain[0] else "céu limpo",
+                         "icon": "10d" if rain[0] else "01d"}],
+        }
+        if rain[0]:
+            data["rain"] = {"1h": float(rain[0])}
+        return data
+
+    def _history(self, city, params):
+        start = int(params.get("start", 0)) // 3600
+        end = int(params.get("end", start * 3600)) // 3600
+        end = min(end, start + MAX_HISTORY_HOURS - 1)
+        hours = np.arange(start, end + 1)
+        temperature, humidity, rain = synthetic_hours(city, hours)
+        items = []
+        for hour, temp, hum, mm in zip(hours.tolist(), temperature.tolist(),
+                                       humidity.tolist(), rain.tolist()):
+            item = {"dt": hour * 3600, "main": {"temp": temp, "humidity": hum}}
+            if mm:
+                item["rain"] = {"1h": mm}
+            items.append(item)
+        return {"cod": "200", "city_id": _city_seed(city), "cnt": len(items), "list": items}
+
+
+class StubWeatherServer:
+    """Servidor stub em uma thread; use como context manager.
+
+    ``url`` é a base para ``AGRO_WEATHER_API_URL``/``AGRO_WEATHER_HISTORY_URL``
+    (ou para o ``base_url`` do provedor) e ``requests`` conta as chamadas
+    recebidas por caminho.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self.requests = {}
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="weather-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub da API OpenWeather")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = StubWeatherServer(args.host, args.port)
+    print(f"Stub climático em {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
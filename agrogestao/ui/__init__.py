@@ -0,0 +1 @@
+"""Páginas Streamlit do AgroGestão"""
@@ -0,0 +1,138 @@
+"""Relatório de clima x produção"""
+import pandas as pd
+import streamlit as st
+
+from agrogestao.analytics.aggregations import filter_by_date
+from agrogestao.analytics.climate import (
+    DEFAULT_WINDOWS,
+    ClimateFeatureCache,
+    climate_correlations,
+    climate_regression,
+    feature_columns,
+    station_features,
+    with_station_features,
+)
+from agrogestao.config import TIMEZONE
+from agrogestao.integrations import city_for_location
+from agrogestao.ui.state import get_weather_backfill
+
+FEATURE_LABELS = {
+    'temperature_mean': 'Temperatura média',
+    'humidity_mean': 'Umidade média',
+    'rain_sum': 'Chuva acumulada',
+}
+TARGET_LABELS = {
+    'first_share': '1ª Qualidade (%)',
+    'total_boxes': 'Total de Caixas',
+}
+MAX_SCATTER_POINTS = 5000
+SOURCE_PRODUCTION = "Registrado nas produções"
+SOURCE_STATION = "Histórico horário da estação"
+
+
+@st.cache_resource(show_spinner=False)
+def get_climate_cache():
+    """Features de clima compartilhadas pelas sessões do processo"""
+    return ClimateFeatureCache()
+
+
+def feature_label(column):
+    name, window = column.rsplit('_', 1)
+    return f"{FEATURE_LABELS.get(name, name)} ({window.replace('d', ' dias')})"
+
+
+def station_history(selected, start_date, end_date):
+    """Features da estação para as linhas selecionadas, lidas só do histórico local"""
+    backfill = get_weather_backfill()
+    cities = sorted({city_for_location(local) for local in selected['local'].unique()})
+    # As janelas olham para trás: o histórico começa antes do período
+    history_start = pd.Timestamp(start_date) - pd.Timedelta(days=max(DEFAULT_WINDOWS))
+    daily = backfill.store.daily(cities, history_start, end_date)
+    
+    expected_hours = ((pd.Timestamp(end_date) - history_start).days + 1) * 24 * len(cities)
+    stored_hours = int(daily['hours'].sum()) if not daily.empty else 0
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        if st.button("📥 Completar histórico", disabled=backfill.running):
+            # Dias inteiros no fuso local, da primeira à última hora
+            backfill.start(cities, history_start.tz_localize(TIMEZONE),
+                           (pd.Timestamp(end_date) + pd.Timedelta(days=1)).tz_localize(TIMEZONE)
+                           - pd.Timedelta(hours=1))
+    with col1:
+        st.caption(f"Estações: {', '.join(cities)} · histórico local com "
+                   f"{stored_hours:,} de {expected_hours:,} horas do período")
+        if backfill.running:
+            st.caption("⏳ Baixando histórico climático em segundo plano; atualize a página em instantes.")
+        elif backfill.last_error:
+            st.caption(f"Última falha ao baixar histórico: {backfill.last_error}")
+    
+    station = station_features(daily)
+    if station.empty:
+        return pd.DataFrame()
+    return with_station_features(selected, station, city_for_location)
+
+
+def show_climate_report(productions_df, start_date, end_date, locations, products):
+    import plotly.express as px
+    
+    st.header("🌦️ Clima x Produção")
+    source = st.radio("Fonte do clima", [SOURCE_PRODUCTION, SOURCE_STATION], horizontal=True)
+    
+    # As janelas olham para trás: as features são calculadas sobre todo o
+    # histórico e só depois filtradas pelo período do relatório
+    features = get_climate_cache().update(productions_df)
+    if features.empty:
+        st.info("ℹ️ Nenhum dado climático disponível.")
+        return
+    
+    selected = filter_by_date(features, start_date, end_date, column='day')
+    if locations:
+        selected = selected[selected['local'].isin([str(x) for x in locations])]
+    if products:
+        selected = selected[selected['product'].isin([str(x) for x in products])]
+    
+    if source == SOURCE_STATION and not selected.empty:
+        selected = station_history(selected, start_date, end_date)
+    
+    columns = feature_columns(selected)
+    if selected.empty or not columns:
+        st.info("ℹ️ Nenhum dado climático para o período selecionado.")
+        return
+    
+    regression = climate_regression(selected, 'first_share')
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Dias analisados", f"{len(selected):,}")
+    with col2:
+        st.metric("Séries (local x cultura)", f"{len(selected[['local', 'product']].drop_duplicates())}")
+    with col3:
+        r2 = regression['r2']
+        st.metric("R² (1ª Qualidade)", "-" if pd.isna(r2) else f"{r2:.2f}")
+    
+    st.subheader("📈 Correlação com a Produção")
+    correlations = climate_correlations(selected)
+    table = correlations.pivot(index='feature', columns='target', values='correlation')
+    table = table.reindex(columns).rename(index=feature_label, columns=TARGET_LABELS)
+    st.dataframe(table.style.format("{:.2f}", na_rep="-"), use_container_width=True)
+    
+    st.subheader("🌡️ Clima x 1ª Qualidade")
+    x_col = st.selectbox("Variável climática", columns, format_func=feature_label)
+    points = selected.dropna(subset=[x_col, 'first_share'])
+    if len(points) > MAX_SCATTER_POINTS:
+        points = points.sample(MAX_SCATTER_POINTS, random_state=0)
+    fig = px.scatter(points, x=x_col, y='first_share', color='product', opacity=0.6,
+                     color_discrete_sequence=px.colors.qualitative.Set3)
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                      font=dict(color='white'), xaxis_title=feature_label(x_col),
+                      yaxis_title="1ª Qualidade (%)")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    if regression['coefficients']:
+        st.subheader("📐 Regressão Linear (1ª Qualidade)")
+        coefficients = pd.DataFrame({
+            'Variável': [feature_label(c) for c in regression['coefficients']],
+            'Coeficiente': list(regression['coefficients'].values()),
+        })
+        st.dataframe(coefficients, use_container_width=True, hide_index=True)
+        st.caption(f"Observações: {regression['n']:,} · Intercepto: {regression['intercept']:.2f}")
@@ -0,0 +1,249 @@
+"""Página do dashboard principal"""
+import pandas as pd
+import streamlit as st
+
+from agrogestao.analytics import (
+    boxes_by,
+    calculate_financials,
+    daily_production,
+    latest_period,
+    period_label,
+    prepare_dates,
+    quality_by_product,
+    revenue_by,
+    total_boxes,
+)
+from agrogestao.ui.state import (
+    allocate_input_costs,
+    index_productions,
+    kpi_totals,
+    load_inputs,
+    load_productions,
+)
+
+
+def _change(latest, column):
+    """Variação para o ``st.metric`` (``None`` sem período anterior para comparar)"""
+    if latest is None or pd.isna(latest[column]):
+        return None
+    return f"{latest[column]:+.1f}%"
+
+
+def show_dashboard():
+    import plotly.express as px
+    
+    st.title("📊 Dashboard AgroGestão")
+    
+    # Carregar dados
+    productions_df = load_productions()
+    inputs_df = load_inputs()
+    
+    # Filtros na sidebar
+    st.sidebar.header("Filtros")
+    
+    latest = None
+    if not productions_df.empty:
+        # Garantir que a coluna date existe e é datetime
+        if 'date' in productions_df.columns:
+            productions_df = prepare_dates(productions_df)
+            
+            if not productions_df.empty:
+                # Índice por data/local/cultura, reaproveitado enquanto os dados não mudam
+                index = index_productions(productions_df)
+                min_date, max_date = index.min_date, index.max_date
+                
+                date_range = st.sidebar.date_input(
+                    "Período",
+                    value=(min_date, max_date),
+                    min_value=min_date,
+                    max_value=max_date
+                )
+                
+                locations = st.sidebar.multiselect(
+                    "Locais",
+                    options=productions_df['local'].unique() if 'local' in productions_df.columns else [],
+                    default=productions_df['local'].unique()[:5] if 'local' in productions_df.columns else []
+                )
+                
+                products = st.sidebar.multiselect(
+                    "Culturas",
+                    options=productions_df['product'].unique() if 'product' in productions_df.columns else [],
+                    default=productions_df['product'].unique()[:5] if 'product' in productions_df.columns else []
+                )
+                
+                # Aplicar filtros
+                try:
+                    start_date, end_date = date_range
+                except:
+                    start_date, end_date = min_date, max_date
+                
+                filtered_df = index.filter(start_date, end_date, locations, products)
+                
+                # Último mês do período contra o anterior, lido das séries pré-calculadas
+                latest = latest_period(kpi_totals(productions_df, inputs_df, locations, products),
+                                       start_date, end_date)
+            else:
+                filtered_df = pd.DataFrame()
+        else:
+            filtered_df = productions_df
+            st.sidebar.warning("Coluna 'date' não encontrada nos dados")
+    else:
+        filtered_df = pd.DataFrame()
+    
+    # Calcular métricas financeiras
+    # Custos dos insumos rateados por local e período, para que o lucro
+    # acompanhe os filtros aplicados
+    allocated_costs, unallocated_costs = None, 0
+    if not productions_df.empty and 'date' in productions_df.columns:
+        allocated_costs, unallocated_costs = allocate_input_costs(productions_df, inputs_df)
+    
+    financials = calculate_financials(filtered_df if not filtered_df.empty else productions_df, inputs_df,
+                                      allocated_costs)
+    
+    # Métricas principais
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        boxes = total_boxes(filtered_df if not filtered_df.empty else productions_df)
+        st.metric("Total Produzido", f"{boxes:,.0f} cx", _change(latest, 'boxes_pop'))
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("Receita Total", f"R$ {financials['total_revenue']:,.2f}", _change(latest, 'revenue_pop'))
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("Custos Totais", f"R$ {financials['total_costs']:,.2f}", _change(latest, 'cost_pop'),
+                  delta_color="inverse")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        profit_color = "green" if financials['profit'] >= 0 else "red"
+        st.metric("Lucro Líquido", 
+                 f"R$ {financials['profit']:,.2f}", 
+                 f"{financials['profit_margin']:.1f}%")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    if latest is not None:
+        st.caption(f"Variações: {period_label(latest['period'])} contra o mês anterior.")
+    if unallocated_costs > 0:
+        st.caption(f"R$ {unallocated_costs:,.2f} em insumos de períodos sem produção não foram rateados.")
+    
+    # Preços médios
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("Preço Médio 1ª Qualidade", f"R$ {financials['avg_first_price']:,.2f}")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("Preço Médio 2ª Qualidade", f"R$ {financials['avg_second_price']:,.2f}")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Gráficos - Primeira linha
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("Produção por Cultura")
+        
+        if not filtered_df.empty and 'product' in filtered_df.columns:
+            production_by_product = boxes_by(filtered_df, 'product')
+            
+            if not production_by_product.empty:
+                fig = px.bar(production_by_product, x='product', y='total', 
+                            color='product', color_discrete_sequence=px.colors.qualitative.Set3)
+                fig.update_layout(showlegend=False, plot_bgcolor='rgba(0,0,0,0)', 
+                                paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'),
+                                xaxis_title="Cultura", yaxis_title="Total de Caixas")
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Nenhum dado disponível para o gráfico.")
+        else:
+            st.info("Nenhum dado de produção disponível.")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("Produção por Área/Local")
+        
+        if not filtered_df.empty and 'local' in filtered_df.columns:
+            production_by_location = boxes_by(filtered_df, 'local')
+            
+            if not production_by_location.empty:
+                fig = px.pie(production_by_location, values='total', names='local',
+                            color_discrete_sequence=px.colors.qualitative.Set3)
+                fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                font=dict(color='white'), showlegend=True)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Nenhum dado disponível para o gráfico.")
+        else:
+            st.info("Nenhum dado de produção disponível.")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Gráficos - Segunda linha
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("Receita por Cultura")
+        
+        if not filtered_df.empty and 'product' in filtered_df.columns:
+            revenue_by_product = revenue_by(filtered_df, 'product')
+            
+            if not revenue_by_product.empty:
+                fig = px.pie(revenue_by_product, values='total_revenue_item', names='product', 
+                            color_discrete_sequence=px.colors.qualitative.Set3)
+                fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                font=dict(color='white'), showlegend=True)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Nenhum dado de receita disponível.")
+        else:
+            st.info("Nenhum dado de produção disponível.")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("Análise de Qualidade por Cultura")
+        
+        if not filtered_df.empty and 'product' in filtered_df.columns:
+            quality_df = quality_by_product(filtered_df).rename(columns={
+                'first_percent': '1ª Qualidade',
+                'second_percent': '2ª Qualidade'
+            })
+            
+            if not quality_df.empty:
+                fig = px.bar(quality_df, x='product', y=['1ª Qualidade', '2ª Qualidade'], 
+                            barmode='stack', color_discrete_sequence=['#2ecc71', '#f1c40f'])
+                fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                font=dict(color='white'), yaxis_title="Percentual (%)",
+                                xaxis_title="Cultura", showlegend=True)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Nenhum dado de qualidade disponível.")
+        else:
+            st.info("Nenhum dado de produção disponível.")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Evolução temporal da produção
+    if not filtered_df.empty and 'date' in filtered_df.columns:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("Evolução Temporal da Produção")
+        
+        time_series = daily_production(filtered_df)
+        
+        fig = px.line(time_series, x='date', y=['first_quality', 'second_quality'],
+                     color_discrete_sequence=['#2ecc71', '#f1c40f'])
+        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                         font=dict(color='white'), yaxis_title="Caixas",
+                         xaxis_title="Data", showlegend=True)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,64 @@
+"""Relatórios prontos: downloads dos arquivos gerados pela agenda"""
+import pandas as pd
+import streamlit as st
+
+from agrogestao.config import REPORT_IN_APP, TIMEZONE
+from agrogestao.reports import REPORT_TYPES
+from agrogestao.ui.state import get_report_scheduler
+
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+SCHEDULE_LABELS = {"nightly": "todas as noites", "weekly": "toda segunda-feira", "off": "desativada"}
+
+
+def _when(timestamp):
+    return f"{pd.Timestamp(timestamp, unit='s', tz='UTC').tz_convert(TIMEZONE):%d/%m/%Y %H:%M}"
+
+
+def show_downloads_report(locations):
+    st.header("📥 Relatórios Prontos")
+
+    scheduler = get_report_scheduler()
+    store = scheduler.store
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.caption(f"Gerados {SCHEDULE_LABELS.get(scheduler.schedule, scheduler.schedule)} às "
+                   f"{scheduler.hour:02d}h, cobrindo os últimos {scheduler.days} dias de cada fazenda.")
+        if not REPORT_IN_APP:
+            st.caption("A agenda roda fora do app: `python -m agrogestao.reports.scheduler` (ou `--once` pelo cron).")
+        if scheduler.generating:
+            st.caption("⏳ Gerando relatórios em segundo plano; atualize a página em instantes.")
+        elif scheduler.last_error:
+            st.caption(f"Última falha na geração: {scheduler.last_error}")
+    with col2:
+        st.button("⚙️ Gerar agora", on_click=scheduler.generate_now, disabled=scheduler.generating,
+                  use_container_width=True)
+
+    entries = store.latest([str(x) for x in locations] if locations else None)
+    if not entries:
+        st.info("ℹ️ Nenhum relatório gerado ainda para as fazendas selecionadas.")
+        return
+
+    by_farm = {}
+    for entry in entries:
+        by_farm.setdefault(entry["farm"], {}).setdefault(entry["report"], {})[entry["format"]] = entry
+
+    for farm, reports in by_farm.items():
+        st.subheader(f"📍 {farm}")
+        for report, formats in reports.items():
+            col1, col2, col3 = st.columns([3, 1, 1])
+            any_entry = next(iter(formats.values()))
+            with col1:
+                st.markdown(f"**{REPORT_TYPES.get(report, report)}**")
+                st.caption(f"{pd.Timestamp(any_entry['start']):%d/%m/%Y} a {pd.Timestamp(any_entry['end']):%d/%m/%Y}"
+                           f" · gerado em {_when(any_entry['built_at'])}")
+            for column, fmt in zip((col2, col3), ("xlsx", "pdf")):
+                entry = formats.get(fmt)
+                if entry is None or not store.exists(entry["file"]):
+                    continue
+                with column:
+                    st.download_button(f"⬇️ {fmt.upper()}", data=store.read(entry), file_name=entry["file"],
+                                       mime=MIME_TYPES[fmt], key=f"download_{entry['file']}",
+                                       use_container_width=True)
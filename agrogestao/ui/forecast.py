@@ -0,0 +1,92 @@
+"""Relatório de previsão de produção"""
+import pandas as pd
+import streamlit as st
+
+from agrogestao.analytics.forecast import MAX_HORIZON, MIN_WEEKS, weekly_sums
+from agrogestao.data import VERSION_ATTR
+from agrogestao.ui.state import get_forecaster, index_productions
+
+HISTORY_WEEKS = 26
+TARGET_LABELS = {'boxes': 'Caixas', 'revenue': 'Receita (R$)'}
+
+
+def _selected(frame, locations, products):
+    if locations:
+        frame = frame[frame['local'].isin([str(x) for x in locations])]
+    if products:
+        frame = frame[frame['product'].isin([str(x) for x in products])]
+    return frame
+
+
+def show_forecast_report(productions_df, locations, products):
+    import plotly.express as px
+
+    st.header("🔮 Previsão de Produção")
+
+    # O cálculo roda em background a cada nova versão da tabela (ver load_productions)
+    forecaster = get_forecaster()
+    forecaster.submit(productions_df, productions_df.attrs.get(VERSION_ATTR))
+    forecast, version, computed_at = forecaster.result()
+
+    if forecast.empty:
+        if forecaster.pending:
+            st.info("⏳ Previsão sendo calculada em segundo plano; atualize a página em instantes.")
+        elif forecaster.last_error:
+            st.error(f"Erro ao calcular a previsão: {forecaster.last_error}")
+        else:
+            st.info(f"ℹ️ Histórico insuficiente: a previsão exige ao menos {MIN_WEEKS} semanas por série.")
+        return
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        horizon = st.slider("Semanas à frente", 1, MAX_HORIZON, min(8, MAX_HORIZON))
+    with col2:
+        target = st.radio("Variável", list(TARGET_LABELS), format_func=TARGET_LABELS.get, horizontal=True)
+
+    weeks = forecast['week'].drop_duplicates().sort_values().iloc[:horizon]
+    selected = _selected(forecast[forecast['week'].isin(weeks)], locations, products)
+    if selected.empty:
+        st.info("ℹ️ Nenhuma série com histórico suficiente para os filtros selecionados.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Caixas previstas", f"{selected['boxes'].sum():,.0f}")
+    with col2:
+        st.metric("Receita prevista", f"R$ {selected['revenue'].sum():,.2f}")
+    with col3:
+        st.metric("Séries (local x cultura)", f"{len(selected[['local', 'product']].drop_duplicates())}")
+
+    # Histórico recente das mesmas séries, semana a semana
+    index = index_productions(productions_df)
+    history = weekly_sums(index.filter(index.min_date, index.max_date, locations, products))
+    history = history.groupby('week')[target].sum().reset_index().tail(HISTORY_WEEKS)
+    predicted = selected.groupby('week')[[target, f'{target}_low', f'{target}_high']].sum().reset_index()
+
+    chart = pd.concat([history.assign(Série='Histórico'), predicted.assign(Série='Previsão')],
+                      ignore_index=True)
+    fig = px.line(chart, x='week', y=target, color='Série', markers=True,
+                  color_discrete_sequence=['#2ecc71', '#3498db'])
+    fig.add_scatter(x=predicted['week'], y=predicted[f'{target}_high'], mode='lines',
+                    line=dict(width=0), showlegend=False, hoverinfo='skip')
+    fig.add_scatter(x=predicted['week'], y=predicted[f'{target}_low'], mode='lines',
+                    line=dict(width=0), fill='tonexty', fillcolor='rgba(52,152,219,0.2)',
+                    name='Faixa de 90%')
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                      font=dict(color='white'), xaxis_title="Semana", yaxis_title=TARGET_LABELS[target])
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("📋 Previsão por Série")
+    table = (selected.groupby(['product', 'local'], observed=True)
+             .agg(boxes=('boxes', 'sum'), revenue=('revenue', 'sum'), weeks=('weeks_observed', 'max'))
+             .reset_index()
+             .sort_values('revenue', ascending=False))
+    table.columns = ['Cultura', 'Local', 'Caixas previstas', 'Receita prevista (R$)', 'Semanas de histórico']
+    st.dataframe(table.style.format({'Caixas previstas': '{:,.0f}', 'Receita prevista (R$)': 'R$ {:,.2f}'}),
+                 use_container_width=True, hide_index=True)
+
+    caption = (f"Regressão semanal por série (tendência, sazonalidade anual e clima), "
+               f"calculada em {pd.Timestamp(computed_at, unit='s'):%d/%m/%Y %H:%M} UTC.")
+    if version != productions_df.attrs.get(VERSION_ATTR):
+        caption += " ⏳ Dados novos em processamento; a previsão será atualizada em instantes."
+    st.caption(caption)
@@ -0,0 +1,122 @@
+"""Página de cadastro de insumos"""
+import io
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from agrogestao.data import IDEMPOTENCY_COLUMN, SYNC_COLUMN
+from agrogestao.ui.state import load_inputs, save_input
+
+
+def show_inputs_page():
+    st.title("💰 Cadastro de Insumos")
+    
+    with st.form("inputs_form", clear_on_submit=True):
+        st.markdown("### Informações do Insumo")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            date = st.date_input("📅 Data", value=datetime.now())
+            input_type = st.selectbox("📦 Tipo de Insumo", 
+                                     ["Semente", "Fertilizante", "Defensivo", "Mão de Obra", "Equipamento", "Outros"])
+            description = st.text_input("📝 Descrição", placeholder="Ex: Adubo NPK 10-10-10")
+        
+        with col2:
+            quantity = st.number_input("⚖️ Quantidade", min_value=0.0, step=0.1, value=1.0)
+            unit = st.selectbox("📏 Unidade", ["kg", "L", "un", "h", "sc", "outro"])
+            cost = st.number_input("💵 Custo (R$)", min_value=0.0, step=0.01, value=0.0)
+        
+        location = st.text_input("📍 Local aplicado", placeholder="Ex: Estufa A, Talhão 1")
+        
+        submitted = st.form_submit_button("💾 Salvar Insumo", type="primary")
+        
+        if submitted:
+            if not all([input_type, description.strip(), quantity > 0, cost > 0]):
+                st.error("❌ Preencha todos os campos obrigatórios.")
+            else:
+                success = save_input(
+                    date.isoformat(), 
+                    input_type, 
+                    description.strip(), 
+                    quantity, 
+                    unit, 
+                    cost, 
+                    location.strip()
+                )
+                if success:
+                    st.success("✅ Insumo registrado com sucesso!")
+                else:
+                    st.error("❌ Erro ao salvar insumo localmente. Verifique o espaço em disco.")
+    
+    # Mostrar dados recentes
+    st.markdown("---")
+    st.subheader("📋 Insumos Recentes")
+    
+    inputs_df = load_inputs()
+        
+    if not inputs_df.empty:
+        # Mostrar apenas colunas relevantes
+        display_cols = ['date', 'type', 'description', 'quantity', 'unit', 'cost', 'location', SYNC_COLUMN]
+        
+        # Garantir que as colunas existam
+        available_cols = [col for col in display_cols if col in inputs_df.columns]
+        
+        if available_cols:
+            display_df = inputs_df[available_cols].head(10)
+            st.dataframe(display_df, use_container_width=True)
+        
+        # Adicionar botão para baixar dados em Excel
+        st.markdown("---")
+        st.subheader("📤 Exportar Dados")
+        
+        if not inputs_df.empty:
+            # Colunas de controle da sincronização não vão para a planilha
+            export_df = inputs_df.drop(columns=[SYNC_COLUMN, IDEMPOTENCY_COLUMN], errors='ignore')
+            # O Excel não aceita datas com fuso horário
+            export_df = export_df.assign(**{
+                col: export_df[col].dt.tz_localize(None)
+                for col in export_df.columns
+                if isinstance(export_df[col].dtype, pd.DatetimeTZDtype)
+            })
+            
+            # Criar Excel em memória
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+                export_df.to_excel(writer, sheet_name='Insumos', index=False)
+                
+                # Adicionar formatação
+                workbook = writer.book
+                worksheet = writer.sheets['Insumos']
+                
+                # Formatar cabeçalhos
+                header_format = workbook.add_format({
+                    'bold': True,
+                    'text_wrap': True,
+                    'valign': 'top',
+                    'fg_color': '#2d5016',
+                    'font_color': 'white',
+                    'border': 1
+                })
+                
+                # Aplicar formatação aos cabeçalhos
+                for col_num, value in enumerate(export_df.columns.values):
+                    worksheet.write(0, col_num, value, header_format)
+                
+                # Ajustar largura das colunas
+                for idx, col in enumerate(export_df.columns):
+                    max_len = max(export_df[col].astype(str).fillna("").map(len).max(), len(col)) + 2
+                    worksheet.set_column(idx, idx, max_len)
+            
+            output.seek(0)
+            
+            # Botão de download
+            st.download_button(
+                label="📥 Baixar Dados em Excel",
+                data=output,
+                file_name=f"insumos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                type="primary"
+            )
+    else:
+        st.info("📭 Nenhum insumo registrado ainda.")
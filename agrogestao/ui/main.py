@@ -0,0 +1,95 @@
+"""Navegação entre as páginas"""
+import streamlit as st
+
+from agrogestao.config import REPORT_IN_APP
+from agrogestao.ui.dashboard import show_dashboard
+from agrogestao.ui.inputs import show_inputs_page
+from agrogestao.ui.production import show_production_page
+from agrogestao.ui.records import show_records_page
+from agrogestao.ui.reports import show_reports_page
+from agrogestao.ui.state import get_report_scheduler, get_service, init_db
+
+
+def show_memory_usage():
+    """Resumo do uso de memória das tabelas compartilhadas pelo processo"""
+    with st.expander("🧠 Uso de memória"):
+        report = get_service().memory_report()
+        if report.empty:
+            st.caption("Nenhuma tabela carregada.")
+            return
+        summary = report.groupby('table').agg(linhas=('rows', 'first'), bytes=('bytes', 'sum'))
+        for table, row in summary.iterrows():
+            st.caption(f"**{table}**: {row['linhas']:,} linhas · {row['bytes'] / 1024 ** 2:,.2f} MB")
+        results = get_service().results
+        st.caption(f"**relatórios em cache**: {len(results)} · {results.size / 1024 ** 2:,.2f} MB "
+                   f"({results.hits:,} acertos, {results.misses:,} cálculos)")
+        st.caption("Tabelas compartilhadas por todas as sessões deste processo.")
+
+
+PAGES = {
+    "dashboard": "📊 Dashboard",
+    "producao": "📝 Produção",
+    "insumos": "💰 Insumos",
+    "relatorios": "📋 Relatórios",
+    "registros": "🗂️ Registros",
+}
+
+
+def main():
+    from streamlit_option_menu import option_menu
+    
+    # Inicializar banco de dados
+    if not init_db():
+        st.error("❌ Falha na conexão com o banco de dados. Algumas funcionalidades podem não estar disponíveis.")
+    
+    # Agenda dos relatórios por fazenda dentro do app (opcional; o padrão é o cron)
+    if REPORT_IN_APP:
+        get_report_scheduler()
+    
+    # Menu lateral
+    with st.sidebar:
+        st.markdown("""
+            <div style='text-align: center; margin-bottom: 20px;'>
+                <h1 style='color: #2d5016;'>🌱 AgroGestão</h1>
+                <p style='color: #666;'>Sistema de Gestão Agrícola</p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        if st.button("🔄 Atualizar dados", use_container_width=True):
+            get_service().tables.invalidate()
+        
+        st.markdown("---")
+        
+        # Menu de navegação
+        menu_options = list(PAGES.values())
+        
+        # Página inicial pode vir da URL (?page=producao)
+        start_page = PAGES.get(st.query_params.get("page", ""), menu_options[0])
+        
+        selected = option_menu(
+            menu_title="Navegação",
+            options=menu_options,
+            icons=["speedometer2", "pencil", "cash-coin", "file-text", "table"],
+            menu_icon="cast",
+            default_index=menu_options.index(start_page),
+            styles={
+                "container": {"padding": "5px", "background-color": "#1a1a1a"},
+                "icon": {"color": "#2d5016", "font-size": "18px"},
+                "nav-link": {"font-size": "16px", "text-align": "left", "margin": "0px", "color": "white"},
+                "nav-link-selected": {"background-color": "#2d5016"},
+            }
+        )
+    
+        show_memory_usage()
+    
+    # Navegação entre páginas
+    if selected == "📊 Dashboard":
+        show_dashboard()
+    elif selected == "📝 Produção":
+        show_production_page()
+    elif selected == "💰 Insumos":
+        show_inputs_page()
+    elif selected == "📋 Relatórios":
+        show_reports_page()
+    elif selected == "🗂️ Registros":
+        show_records_page()
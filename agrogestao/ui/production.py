@@ -0,0 +1,137 @@
+"""Página de cadastro de produção"""
+from datetime import datetime
+
+import streamlit as st
+
+from agrogestao.config import DEFAULT_CITY
+from agrogestao.ui.state import get_service, get_weather_data, save_production
+
+
+def show_production_page():
+    st.title("📝 Cadastro de Produção")
+    
+    # Status da sincronização com o banco
+    service = get_service()
+    outbox, flusher = service.outbox, service.flusher
+    if len(outbox):
+        st.sidebar.info(f"📤 {len(outbox)} registro(s) aguardando sincronização")
+        if flusher.last_error:
+            st.sidebar.caption(f"Última falha de envio: {flusher.last_error}")
+    rejected = outbox.dead_letters()
+    if rejected:
+        st.sidebar.error(f"⛔ {len(rejected)} registro(s) recusado(s) pelo banco")
+        st.sidebar.caption(f"Erro: {rejected[-1]['error']}")
+        st.sidebar.button("🔁 Reenviar recusados", on_click=service.retry_rejected,
+                          use_container_width=True)
+
+    # Buscar dados climáticos automaticamente
+    weather_data = get_weather_data(DEFAULT_CITY)
+    
+    if weather_data:
+        st.sidebar.header("🌤️ Dados Climáticos Atuais")
+        st.sidebar.success("Dados climáticos carregados automaticamente!")
+        st.sidebar.write(f"**Cidade:** {weather_data['city']}")
+        st.sidebar.write(f"**Temperatura:** {weather_data['temperature']}°C")
+        st.sidebar.write(f"**Umidade:** {weather_data['humidity']}%")
+        st.sidebar.write(f"**Chuva:** {weather_data['rain']}mm")
+        st.sidebar.write(f"**Condição:** {weather_data['description'].title()}")
+    else:
+        st.sidebar.warning("⚠️ Não foi possível carregar dados climáticos")
+        # Dados padrão caso a API falhe
+        weather_data = {
+            'temperature': 25.0,
+            'humidity': 60.0,
+            'rain': 0.0
+        }
+
+    with st.form("production_form", clear_on_submit=True):
+        st.markdown("### Informações da Produção")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            date = st.date_input("📅 Data", value=datetime.now())
+            location = st.text_input("📍 Local/Estufa", placeholder="Ex: Estufa A, Talhão 1")
+            product = st.text_input("🌱 Produto", placeholder="Ex: Tomate, Alface, Morango")
+        
+        with col2:
+            first_quality = st.number_input("📦 Caixas 1ª Qualidade", min_value=0.0, step=0.5, value=0.0, format="%.1f")
+            second_quality = st.number_input("📦 Caixas 2ª Qualidade", min_value=0.0, step=0.5, value=0.0, format="%.1f")
+        
+        st.markdown("### Preços por Caixa")
+        col3, col4 = st.columns(2)
+        
+        with col3:
+            first_price = st.number_input("💰 Preço por caixa (1ª Qualidade)", 
+                                         min_value=0.0, step=0.5, value=10.0,
+                                         help="Preço de venda por caixa da 1ª qualidade",
+                                         format="%.2f")
+        
+        with col4:
+            second_price = st.number_input("💰 Preço por caixa (2ª Qualidade)", 
+                                          min_value=0.0, step=0.5, value=5.0,
+                                          help="Preço de venda por caixa da 2ª qualidade",
+                                          format="%.2f")
+        
+        st.markdown("### Dados Climáticos")
+        col5, col6, col7 = st.columns(3)
+        
+        # Usar dados da API automaticamente
+        with col5:
+            # Converter para float garantindo que seja um número
+            temp_value = float(weather_data.get('temperature', 25.0))
+            temperature = st.number_input("🌡️ Temperatura (°C)", 
+                                        value=temp_value, 
+                                        step=0.1,
+                                        format="%.1f")
+        
+        with col6:
+            # Converter para float garantindo que seja um número
+            humidity_value = float(weather_data.get('humidity', 60.0))
+            humidity = st.number_input("💧 Umidade (%)", 
+                                      value=humidity_value,
+                                      min_value=0.0, 
+                                      max_value=100.0, 
+                                      step=1.0,
+                                      format="%.0f")
+        
+        with col7:
+            # Converter para float garantindo que seja um número
+            rain_value = float(weather_data.get('rain', 0.0))
+            rain = st.number_input("🌧️ Chuva (mm)", 
+                                  value=rain_value,
+                                  min_value=0.0, 
+                                  step=0.1,
+                                  format="%.1f")
+        
+        # Cálculo automático da receita
+        total_revenue = (first_quality * first_price) + (second_quality * second_price)
+        
+        st.markdown("---")
+        st.markdown(f"**💰 Receita total estimada: R$ {total_revenue:,.2f}**")
+        
+        # CORREÇÃO AQUI: Usar st.form_submit_button() em vez de st.button()
+        submitted = st.form_submit_button("💾 Salvar Produção", type="primary")
+        
+        if submitted:
+            if not all([location.strip(), product.strip()]):
+                st.error("❌ Preencha todos os campos obrigatórios (Local e Produto).")
+            elif first_quality == 0 and second_quality == 0:
+                st.error("❌ Informe pelo menos uma quantidade de caixas.")
+            else:
+                success = save_production(
+                    date.isoformat(), 
+                    location.strip(), 
+                    product.strip(), 
+                    first_quality, 
+                    second_quality,
+                    first_price,
+                    second_price,
+                    temperature, 
+                    humidity, 
+                    rain,
+                    weather_data
+                )
+                if success:
+                    st.success("✅ Produção registrada com sucesso!")
+                else:
+                    st.error("❌ Erro ao salvar produção localmente. Verifique o espaço em disco.")
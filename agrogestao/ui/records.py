@@ -0,0 +1,112 @@
+"""Página de registros: navegação paginada no banco e exclusão em lote"""
+import streamlit as st
+
+from agrogestao.data.repository import SORT_COLUMNS
+from agrogestao.ui.state import delete_records, load_page
+
+TABLES = {"productions": "🌱 Produções", "inputs": "💰 Insumos"}
+DISPLAY_COLUMNS = {
+    "productions": ['id', 'date', 'local', 'product', 'first_quality', 'second_quality',
+                    'first_price', 'second_price', 'created_at'],
+    "inputs": ['id', 'date', 'type', 'description', 'quantity', 'unit', 'cost', 'location', 'created_at'],
+}
+SORT_LABELS = {
+    'created_at': 'Data de cadastro', 'date': 'Data', 'local': 'Local', 'product': 'Cultura',
+    'type': 'Tipo', 'cost': 'Custo',
+}
+PAGE_SIZES = [25, 50, 100, 200]
+SELECT_COLUMN = "Selecionar"
+
+
+def _browser():
+    # Cursores das páginas já visitadas (para voltar) e ids selecionados
+    return st.session_state.setdefault("records_browser", {
+        "query": None, "cursors": [None], "selected": set(), "message": None,
+    })
+
+
+def _next_page(cursor):
+    _browser()["cursors"].append(cursor)
+
+
+def _previous_page():
+    cursors = _browser()["cursors"]
+    if len(cursors) > 1:
+        cursors.pop()
+
+
+def _delete_selected(table):
+    browser = _browser()
+    ids = sorted(browser["selected"])
+    if delete_records(table, ids):
+        browser["message"] = f"✅ {len(ids)} registro(s) excluído(s)."
+        browser["selected"] = set()
+        browser["cursors"] = [None]
+
+
+def show_records_page():
+    st.title("🗂️ Registros")
+
+    col1, col2, col3, col4, col5 = st.columns([2, 3, 2, 1, 1])
+    with col1:
+        table = st.selectbox("Tabela", list(TABLES), format_func=TABLES.get)
+    with col2:
+        search = st.text_input("🔍 Buscar", placeholder="Local, cultura, tipo, descrição...").strip()
+    with col3:
+        sort = st.selectbox("Ordenar por", SORT_COLUMNS[table], format_func=lambda c: SORT_LABELS.get(c, c))
+    with col4:
+        desc = st.toggle("Decrescente", value=True)
+    with col5:
+        limit = st.selectbox("Por página", PAGE_SIZES, index=1)
+
+    # Mudou a consulta: volta à primeira página e limpa a seleção
+    browser = _browser()
+    query = (table, search, sort, desc, limit)
+    if browser["query"] != query:
+        browser.update(query=query, cursors=[None], selected=set())
+
+    if browser["message"]:
+        st.success(browser["message"])
+        browser["message"] = None
+
+    cursors = browser["cursors"]
+    df, next_cursor = load_page(table, sort, desc, search or None, cursors[-1], limit)
+
+    if df.empty:
+        st.info("ℹ️ Nenhum registro encontrado.")
+    else:
+        columns = [col for col in DISPLAY_COLUMNS[table] if col in df.columns]
+        page_df = df[columns]
+        page_df.insert(0, SELECT_COLUMN, page_df['id'].isin(browser["selected"]))
+
+        # Só a página atual é enviada ao navegador
+        edited = st.data_editor(
+            page_df,
+            key=f"records_editor_{table}_{len(cursors)}_{cursors[-1]}",
+            hide_index=True,
+            disabled=columns,
+            column_config={SELECT_COLUMN: st.column_config.CheckboxColumn(SELECT_COLUMN, width="small")},
+            use_container_width=True,
+        )
+        page_ids = set(page_df['id'])
+        browser["selected"] = (browser["selected"] - page_ids) | set(edited.loc[edited[SELECT_COLUMN], 'id'])
+
+    nav1, nav2, nav3 = st.columns([1, 2, 1])
+    with nav1:
+        st.button("◀ Anterior", on_click=_previous_page, disabled=len(cursors) == 1,
+                  use_container_width=True)
+    with nav2:
+        st.caption(f"Página {len(cursors)} · {len(df)} registro(s) nesta página")
+    with nav3:
+        st.button("Próxima ▶", on_click=_next_page, args=(next_cursor,), disabled=next_cursor is None,
+                  use_container_width=True)
+
+    st.caption("Registros ainda aguardando sincronização aparecem aqui após o envio ao banco.")
+
+    selected = browser["selected"]
+    if selected:
+        st.markdown("---")
+        st.warning(f"⚠️ {len(selected)} registro(s) selecionado(s) para exclusão (em todas as páginas).")
+        confirm = st.checkbox("Confirmo a exclusão definitiva dos registros selecionados")
+        st.button("🗑️ Excluir selecionados", type="primary", disabled=not confirm,
+                  on_click=_delete_selected, args=(table,))
@@ -0,0 +1,334 @@
+"""Página de relatórios"""
+import pandas as pd
+import streamlit as st
+
+from agrogestao.analytics import (
+    AllocationRules,
+    calculate_financials,
+    filter_by_date,
+    period_label,
+    prepare_dates,
+    profit_by,
+    quality_by_product,
+)
+from agrogestao.ui.climate import show_climate_report
+from agrogestao.ui.downloads import show_downloads_report
+from agrogestao.ui.forecast import show_forecast_report
+from agrogestao.ui.state import (
+    allocate_input_costs,
+    cached_report,
+    index_productions,
+    kpi_totals,
+    load_inputs,
+    load_productions,
+)
+
+# Linhas exibidas no relatório detalhado; o histórico completo fica na página Registros
+MAX_TABLE_ROWS = 1000
+ALLOCATION_PERIODS = {"M": "Mensal", "W": "Semanal"}
+ALLOCATION_BASES = {"revenue": "Receita", "boxes": "Caixas", "rows": "Lançamentos"}
+PERIOD_COLUMNS = {
+    'label': 'Período', 'revenue': 'Receita (R$)', 'revenue_pop': 'Receita Δ% ant.',
+    'revenue_yoy': 'Receita Δ% ano', 'cost': 'Custo Rateado (R$)', 'profit': 'Lucro (R$)',
+    'profit_pop': 'Lucro Δ% ant.', 'profit_yoy': 'Lucro Δ% ano', 'margin': 'Margem (%)',
+    'margin_pop': 'Margem Δ p.p.', 'first_share': '1ª Qualidade (%)', 'first_share_yoy': '1ª Qualidade Δ p.p. ano',
+}
+
+
+def _detailed_report(filtered_prod, columns):
+    # O índice entrega em ordem de data; a tabela mostra as mais recentes primeiro
+    report_df = filtered_prod[columns].iloc[::-1]
+    
+    # Calcular totais
+    if 'first_quality' in report_df.columns and 'second_quality' in report_df.columns:
+        report_df = report_df.assign(
+            total_quality=report_df['first_quality'] + report_df['second_quality'])
+    
+    # Calcular receita por item
+    if all(col in report_df.columns for col in ['first_quality', 'second_quality', 'first_price', 'second_price']):
+        report_df = report_df.assign(
+            revenue=(report_df['first_quality'] * report_df['first_price'] +
+                     report_df['second_quality'] * report_df['second_price']))
+    return report_df
+
+
+def _financial_summary(productions_df, inputs_df, rules, filtered_prod, filtered_inputs):
+    """Lucro por local e cultura e os totais financeiros do período, com o valor não rateado"""
+    allocated_costs, unallocated_costs = allocate_input_costs(productions_df, inputs_df, rules)
+    breakdown = profit_by(filtered_prod, allocated_costs, ['local', 'product'])
+    financials = calculate_financials(filtered_prod, filtered_inputs, allocated_costs)
+    return breakdown, dict(financials, unallocated=unallocated_costs)
+
+
+def show_reports_page():
+    import plotly.express as px
+    
+    st.title("📋 Relatórios")
+    
+    productions_df = load_productions()
+    inputs_df = load_inputs()
+    
+    if productions_df.empty:
+        st.warning("⚠️ Nenhum dado disponível para gerar relatórios.")
+        return
+    
+    # Filtros para relatórios
+    st.sidebar.header("🔍 Filtros do Relatório")
+    
+    if not productions_df.empty:
+        # Garantir que a coluna date existe e é datetime
+        if 'date' in productions_df.columns:
+            productions_df = prepare_dates(productions_df)
+            
+            if not productions_df.empty:
+                # Índice por data/local/cultura, reaproveitado enquanto os dados não mudam
+                index = index_productions(productions_df)
+                min_date, max_date = index.min_date, index.max_date
+                
+                report_date_range = st.sidebar.date_input(
+                    "📅 Período do Relatório",
+                    value=(min_date, max_date),
+                    min_value=min_date,
+                    max_value=max_date
+                )
+                
+                # Filtro por local
+                all_locations = productions_df['local'].unique().tolist() if 'local' in productions_df.columns else []
+                selected_locations = st.sidebar.multiselect(
+                    "📍 Filtrar por Local",
+                    options=all_locations,
+                    default=all_locations[:5] if all_locations else []
+                )
+                
+                # Filtro por cultura
+                all_products = productions_df['product'].unique().tolist() if 'product' in productions_df.columns else []
+                selected_products = st.sidebar.multiselect(
+                    "🌱 Filtrar por Cultura",
+                    options=all_products,
+                    default=all_products[:5] if all_products else []
+                )
+                
+                # Tipo de relatório
+                report_type = st.sidebar.selectbox(
+                    "📊 Tipo de Relatório",
+                    ["Produção Detalhada", "Resumo Financeiro", "Análise de Qualidade", "Custos e Insumos",
+                     "Clima x Produção", "Previsão de Produção", "Relatórios Prontos"]
+                )
+                
+                try:
+                    start_date, end_date = report_date_range
+                except:
+                    start_date, end_date = min_date, max_date
+                
+                # Mesmos filtros em outra sessão: o resultado vem do cache compartilhado,
+                # e a filtragem só roda dentro dos cálculos (nada é refeito num acerto)
+                filters = {"start": start_date, "end": end_date,
+                           "locations": frozenset(selected_locations), "products": frozenset(selected_products)}
+                period_filter = {"start": start_date, "end": end_date}
+                
+                def productions_in_range():
+                    return index.filter(start_date, end_date, selected_locations, selected_products)
+                
+                def inputs_in_range():
+                    if inputs_df.empty or 'date' not in inputs_df.columns:
+                        return pd.DataFrame()
+                    return filter_by_date(prepare_dates(inputs_df), start_date, end_date)
+                
+                # Gerar relatório selecionado
+                if report_type == "Produção Detalhada":
+                    st.header("📊 Relatório de Produção Detalhada")
+                    
+                    # Preparar dados para exibição
+                    report_cols = ['date', 'product', 'local', 'first_quality', 'second_quality', 
+                                 'first_price', 'second_price', 'temperature', 'humidity']
+                    
+                    # Garantir que as colunas existem
+                    available_cols = [col for col in report_cols if col in productions_df.columns]
+                    
+                    report_df = pd.DataFrame()
+                    if available_cols:
+                        report_df = cached_report("producao_detalhada", filters, (productions_df,),
+                                                  lambda: _detailed_report(productions_in_range(), available_cols))
+                    
+                    if report_df.empty:
+                        st.warning("ℹ️ Nenhum dado encontrado para o período selecionado.")
+                    else:
+                        st.dataframe(report_df.head(MAX_TABLE_ROWS), use_container_width=True)
+                        if len(report_df) > MAX_TABLE_ROWS:
+                            st.caption(f"Exibindo as {MAX_TABLE_ROWS:,} linhas mais recentes de {len(report_df):,}. "
+                                       "Use a página 🗂️ Registros para navegar por todo o histórico.")
+                        
+                        # Resumo
+                        st.subheader("📈 Resumo")
+                        col1, col2, col3 = st.columns(3)
+                        
+                        with col1:
+                            if 'first_quality' in report_df.columns and 'second_quality' in report_df.columns:
+                                total_boxes = report_df['first_quality'].sum() + report_df['second_quality'].sum()
+                                st.metric("Total de Caixas", f"{total_boxes:,.0f}")
+                        
+                        with col2:
+                            if 'revenue' in report_df.columns:
+                                total_revenue = report_df['revenue'].sum()
+                                st.metric("Receita Total", f"R$ {total_revenue:,.2f}")
+                        
+                        with col3:
+                            if 'product' in report_df.columns:
+                                num_products = report_df['product'].nunique()
+                                st.metric("Culturas", f"{num_products}")
+                    
+                elif report_type == "Resumo Financeiro":
+                    st.header("💰 Relatório Financeiro")
+                    
+                    # Regras de rateio dos insumos entre as produções
+                    rule_col1, rule_col2 = st.columns(2)
+                    with rule_col1:
+                        period = st.selectbox("🗓️ Janela de rateio", list(ALLOCATION_PERIODS),
+                                              format_func=ALLOCATION_PERIODS.get)
+                    with rule_col2:
+                        basis = st.selectbox("⚖️ Base de rateio", list(ALLOCATION_BASES),
+                                             format_func=ALLOCATION_BASES.get)
+                    rules = AllocationRules(period=period, basis=basis)
+                    
+                    breakdown, financials = cached_report(
+                        "resumo_financeiro", dict(filters, rules=rules), (productions_df, inputs_df),
+                        lambda: _financial_summary(productions_df, inputs_df, rules,
+                                                   productions_in_range(), inputs_in_range()))
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Receita Total", f"R$ {financials['total_revenue']:,.2f}")
+                    with col2:
+                        st.metric("Custos Totais", f"R$ {financials['total_costs']:,.2f}")
+                    with col3:
+                        profit_color = "green" if financials['profit'] >= 0 else "red"
+                        st.metric("Lucro Líquido", f"R$ {financials['profit']:,.2f}")
+                    with col4:
+                        st.metric("Margem de Lucro", f"{financials['profit_margin']:.1f}%")
+                    
+                    # Gráfico de receita vs custos
+                    st.subheader("📊 Receita vs Custos")
+                    
+                    comparison_data = pd.DataFrame({
+                        'Categoria': ['Receita', 'Custos', 'Lucro'],
+                        'Valor (R$)': [financials['total_revenue'], financials['total_costs'], financials['profit']]
+                    })
+                    
+                    fig = px.bar(comparison_data, x='Categoria', y='Valor (R$)', 
+                                color='Categoria', color_discrete_sequence=['#2ecc71', '#e74c3c', '#3498db'])
+                    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                    font=dict(color='white'), showlegend=False)
+                    st.plotly_chart(fig, use_container_width=True)
+                    
+                    # Lucro por estufa/local e cultura com o custo rateado
+                    st.subheader("🏷️ Lucro por Local e Cultura")
+                    breakdown = breakdown.rename(columns={
+                        'local': 'Local', 'product': 'Cultura', 'revenue': 'Receita (R$)',
+                        'cost': 'Custo Rateado (R$)', 'profit': 'Lucro (R$)', 'margin': 'Margem (%)'
+                    })
+                    st.dataframe(breakdown.style.format({
+                        'Receita (R$)': "{:,.2f}", 'Custo Rateado (R$)': "{:,.2f}",
+                        'Lucro (R$)': "{:,.2f}", 'Margem (%)': "{:.1f}"
+                    }, na_rep="-"), use_container_width=True, hide_index=True)
+                    if financials['unallocated'] > 0:
+                        st.caption(f"R$ {financials['unallocated']:,.2f} em insumos de períodos sem produção não foram rateados.")
+                    
+                    # Séries por período (na janela de rateio escolhida), com variação
+                    # sobre o período anterior e sobre o mesmo período do ano anterior
+                    st.subheader(f"📅 Evolução {ALLOCATION_PERIODS[period]}")
+                    series = kpi_totals(productions_df, inputs_df, selected_locations, selected_products, rules)
+                    if not series.empty:
+                        series = series[(series['period'].dt.end_time >= pd.Timestamp(start_date))
+                                        & (series['period'].dt.start_time <= pd.Timestamp(end_date))]
+                    if series.empty:
+                        st.info("ℹ️ Nenhum período com produção na seleção.")
+                    else:
+                        series = series.assign(label=series['period'].map(period_label))
+                        chart = series.melt(id_vars=['label'], value_vars=['revenue', 'cost', 'profit'],
+                                            var_name='Indicador', value_name='Valor (R$)')
+                        chart['Indicador'] = chart['Indicador'].map(
+                            {'revenue': 'Receita', 'cost': 'Custos', 'profit': 'Lucro'})
+                        fig = px.line(chart, x='label', y='Valor (R$)', color='Indicador', markers=True,
+                                      color_discrete_sequence=['#2ecc71', '#e74c3c', '#3498db'])
+                        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                          font=dict(color='white'), xaxis_title="Período")
+                        st.plotly_chart(fig, use_container_width=True)
+                        
+                        table = series.iloc[::-1][list(PERIOD_COLUMNS)].rename(columns=PERIOD_COLUMNS)
+                        money = ['Receita (R$)', 'Custo Rateado (R$)', 'Lucro (R$)']
+                        st.dataframe(table.style.format(
+                            {**{c: "{:,.2f}" for c in money},
+                             **{c: "{:+.1f}" for c in table.columns if 'Δ' in c},
+                             'Margem (%)': "{:.1f}", '1ª Qualidade (%)': "{:.1f}"}, na_rep="-"),
+                            use_container_width=True, hide_index=True)
+                        
+                elif report_type == "Análise de Qualidade":
+                    st.header("🔍 Análise de Qualidade")
+                    
+                    quality = cached_report("qualidade", filters, (productions_df,),
+                                            lambda: quality_by_product(productions_in_range()))
+                    
+                    if not quality.empty:
+                        quality_df = pd.DataFrame({
+                            'Produto': quality['product'],
+                            'Total Caixas': quality['total'],
+                            '1ª Qualidade': quality['first_quality'],
+                            '2ª Qualidade': quality['second_quality'],
+                            '1ª Qualidade (%)': quality['first_percent'].map("{:.1f}%".format),
+                            '2ª Qualidade (%)': quality['second_percent'].map("{:.1f}%".format)
+                        }).reset_index(drop=True)
+                        st.dataframe(quality_df, use_container_width=True)
+                        
+                        # Gráfico de qualidade
+                        st.subheader("📊 Distribuição de Qualidade")
+                        
+                        melted_df = quality_df.melt(id_vars=['Produto'], 
+                                                   value_vars=['1ª Qualidade', '2ª Qualidade'],
+                                                   var_name='Qualidade', value_name='Caixas')
+                        
+                        fig = px.bar(melted_df, x='Produto', y='Caixas', color='Qualidade',
+                                    barmode='group', color_discrete_sequence=['#2ecc71', '#f1c40f'])
+                        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                        font=dict(color='white'), yaxis_title="Número de Caixas")
+                        st.plotly_chart(fig, use_container_width=True)
+                    else:
+                        st.info("ℹ️ Nenhum dado de qualidade disponível.")
+                    
+                elif report_type == "Custos e Insumos":
+                    st.header("💸 Análise de Custos e Insumos")
+                    
+                    filtered_inputs = cached_report("insumos_periodo", period_filter, (inputs_df,), inputs_in_range)
+                    
+                    if not filtered_inputs.empty:
+                        st.subheader("📋 Detalhamento de Insumos")
+                        st.dataframe(filtered_inputs, use_container_width=True)
+                        
+                        # Análise por tipo de insumo
+                        st.subheader("📊 Distribuição por Tipo de Insumo")
+                        
+                        if 'type' in filtered_inputs.columns and 'cost' in filtered_inputs.columns:
+                            cost_by_type = cached_report(
+                                "custos_por_tipo", period_filter, (inputs_df,),
+                                lambda: filtered_inputs.groupby('type', observed=True)['cost'].sum().reset_index())
+                            
+                            fig = px.pie(cost_by_type, values='cost', names='type',
+                                        color_discrete_sequence=px.colors.qualitative.Set3)
+                            fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                            font=dict(color='white'), showlegend=True)
+                            st.plotly_chart(fig, use_container_width=True)
+                    else:
+                        st.info("ℹ️ Nenhum dado de insumos/custos para o período selecionado.")
+                
+                elif report_type == "Clima x Produção":
+                    show_climate_report(productions_df, start_date, end_date,
+                                        selected_locations, selected_products)
+                
+                elif report_type == "Previsão de Produção":
+                    show_forecast_report(productions_df, selected_locations, selected_products)
+                
+                elif report_type == "Relatórios Prontos":
+                    show_downloads_report(selected_locations)
+            else:
+                st.warning("⚠️ Dados de produção não contêm informações de data válidas.")
+        else:
+            st.warning("⚠️ Coluna 'date' não encontrada nos dados de produção.")
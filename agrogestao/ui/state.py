@@ -0,0 +1,192 @@
+"""Recursos compartilhados entre as páginas e tratamento de erros para a interface"""
+import pandas as pd
+import streamlit as st
+
+from agrogestao.analytics import (
+    AllocationRules,
+    BackgroundForecaster,
+    CostAllocator,
+    FrameIndexCache,
+    IndexedFrame,
+    KpiSeries,
+    allocate_costs,
+)
+from agrogestao.config import REPORT_IN_APP
+from agrogestao.data import VERSION_ATTR, DataService, WeatherBackfill, WeatherStore
+from agrogestao.integrations import OpenWeatherHistoryProvider, WeatherError
+from agrogestao.integrations import get_weather_data as fetch_weather
+from agrogestao.reports import ArtifactStore, ReportScheduler
+
+
+@st.cache_resource(show_spinner=False)
+def get_service():
+    """Serviço de dados do processo (outbox, flusher e cache das tabelas)"""
+    return DataService().start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_weather_backfill():
+    """Histórico climático local (``.store``) e seu preenchimento em background"""
+    return WeatherBackfill(WeatherStore(), OpenWeatherHistoryProvider())
+
+
+@st.cache_resource(show_spinner=False)
+def get_cost_allocator():
+    """Rateio de custos com cache compartilhado pelas sessões (e workers, se houver)"""
+    return CostAllocator(backend=get_service().snapshots)
+
+
+def allocate_input_costs(productions_df, inputs_df, rules=None):
+    """Custo dos insumos rateado por linha de produção (e o total não rateado)"""
+    allocator = get_cost_allocator()
+    version = (productions_df.attrs.get(VERSION_ATTR), inputs_df.attrs.get(VERSION_ATTR))
+    if None in version:
+        return allocate_costs(productions_df, inputs_df, rules or allocator.rules)
+    return allocator.allocate(productions_df, inputs_df, version, rules)
+
+
+@st.cache_resource(show_spinner=False)
+def get_index_cache():
+    """Índices de data/local/cultura compartilhados pelas sessões do processo"""
+    return FrameIndexCache()
+
+
+def index_productions(productions_df):
+    """``IndexedFrame`` das produções, construído uma vez por versão da tabela"""
+    version = productions_df.attrs.get(VERSION_ATTR)
+    if version is None:
+        return IndexedFrame(productions_df)
+    return get_index_cache().get(productions_df, version)
+
+
+@st.cache_resource(show_spinner=False)
+def get_kpi_series(period="M", basis="revenue"):
+    """Séries de KPI por período compartilhadas pelas sessões do processo"""
+    return KpiSeries(AllocationRules(period=period, basis=basis))
+
+
+def kpi_totals(productions_df, inputs_df, locations=None, products=None, rules=None):
+    """KPIs por período da seleção, com variações; as séries só recalculam os períodos alterados"""
+    rules = rules or get_cost_allocator().rules
+    series = get_kpi_series(rules.period, rules.basis)
+    series.update(productions_df, inputs_df)
+    return series.totals(locations, products)
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_scheduler():
+    """Relatórios por fazenda; a agenda só roda no processo com AGRO_REPORT_IN_APP"""
+    service = get_service()
+    scheduler = ReportScheduler(lambda: (service.load("productions"), service.load("inputs")),
+                                store=ArtifactStore())
+    if REPORT_IN_APP:
+        scheduler.start()
+    return scheduler
+
+
+@st.cache_resource(show_spinner=False)
+def get_forecaster():
+    """Previsão de produção calculada em uma thread própria, fora da renderização"""
+    forecaster = BackgroundForecaster()
+    forecaster.start()
+    return forecaster
+
+
+def cached_report(name, params, frames, compute):
+    """Resultado de ``compute()`` compartilhado pelas sessões enquanto as tabelas de ``frames`` não mudam.
+
+    ``params`` são os filtros que definem o resultado (seleções em que a
+    ordem não importa vão como ``frozenset``); o valor devolvido não deve
+    ser alterado.
+    """
+    versions = [df.attrs.get(VERSION_ATTR) for df in frames]
+    if None in versions:
+        return compute()
+    return get_service().results.get_or_compute(name, params, versions, compute)
+
+
+def init_db():
+    """Verifica a conexão com o Supabase"""
+    try:
+        return get_service().check_connection()
+    except Exception as e:
+        st.error(f"❌ Erro ao conectar com o banco de dados: {str(e)}")
+        return False
+
+
+def load_productions():
+    try:
+        df = get_service().load("productions")
+        # Nova versão da tabela: a previsão é refeita em background
+        get_forecaster().submit(df, df.attrs.get(VERSION_ATTR))
+        return df
+    except Exception as e:
+        st.error(f"Erro ao carregar produções: {str(e)}")
+        return pd.DataFrame()
+
+
+def load_inputs():
+    try:
+        return get_service().load("inputs")
+    except Exception as e:
+        st.error(f"Erro ao carregar insumos: {str(e)}")
+        return pd.DataFrame()
+
+
+def save_production(date, local, product, first_quality, second_quality,
+                    first_price, second_price, temperature, humidity, rain, weather_data):
+    """Grava a produção no outbox local; o envio ao banco é feito em background.
+
+    ``weather_data`` é o dicionário de ``get_weather_data``: a observação
+    vai para a tabela ``weather_observations`` e a produção guarda só o id.
+    """
+    try:
+        get_service().save_production(date, local, product, first_quality, second_quality,
+                                      first_price, second_price, temperature, humidity,
+                                      rain, weather_data)
+        return True
+    except Exception as e:
+        st.error(f"Erro ao salvar produção: {str(e)}")
+        return False
+
+
+def save_input(date, input_type, description, quantity, unit, cost, location):
+    """Grava o insumo no outbox local; o envio ao banco é feito em background"""
+    try:
+        get_service().save_input(date, input_type, description, quantity, unit, cost, location)
+        return True
+    except Exception as e:
+        st.error(f"Erro ao salvar insumo: {str(e)}")
+        return False
+
+
+def delete_production(production_id):
+    return delete_records("productions", [production_id])
+
+
+def delete_records(table, ids):
+    """Exclui registros no banco (em lotes) e recarrega a tabela em cache"""
+    try:
+        get_service().delete(table, ids)
+        return True
+    except Exception as e:
+        st.error(f"Erro ao excluir registros: {str(e)}")
+        return False
+
+
+def load_page(table, sort, desc, search, cursor, limit):
+    """Página de registros do banco; em caso de erro, frame vazio e sem próxima página"""
+    try:
+        return get_service().page(table, sort, desc, search, cursor, limit)
+    except Exception as e:
+        st.error(f"Erro ao carregar registros: {str(e)}")
+        return pd.DataFrame(), None
+
+
+def get_weather_data(city):
+    """Busca dados climáticos, exibindo o erro na página em caso de falha"""
+    try:
+        return fetch_weather(city)
+    except WeatherError as e:
+        st.error(str(e))
+        return None
@@ -0,0 +1,53 @@
+"""Tema visual do app"""
+import streamlit as st
+
+
+def apply_dark_theme():
+    st.markdown("""
+    <style>
+    .main {
+        background-color: #0E1117;
+        color: #FAFAFA;
+    }
+    .stButton>button {
+        background-color: #2d5016;
+        color: white;
+        border-radius: 8px;
+        padding: 10px 24px;
+        border: none;
+        font-weight: 600;
+    }
+    .stButton>button:hover {
+        background-color: #3a6520;
+        color: white;
+    }
+    .card {
+        background-color: #1a1a1a;
+        border-radius: 12px;
+        padding: 20px;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        margin-bottom: 20px;
+    }
+    .metric-card {
+        background-color: #1a1a1a;
+        border-radius: 12px;
+        padding: 15px;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        border-left: 4px solid #2d5016;
+    }
+    h1, h2, h3, h4, h5, h6 {
+        color: #FAFAFA;
+    }
+    .error {
+        color: #ff4b4b;
+    }
+    .success {
+        color: #2ecc71;
+    }
+    .stForm {
+        background-color: #1a1a1a;
+        border-radius: 10px;
+        padding: 20px;
+    }
+    </style>
+    """, unsafe_allow_html=True)
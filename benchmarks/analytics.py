@@ -0,0 +1,102 @@
+"""Benchmark da camada de análise (sem Streamlit).
+
+Mede filtros, agregações e ``calculate_financials`` sobre dados
+sintéticos de tamanhos crescentes.
+
+Uso:
+    python benchmarks/analytics.py --rows 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agrogestao.analytics import (  # noqa: E402
+    ClimateFeatureCache,
+    CostAllocator,
+    ForecastEngine,
+    IndexedFrame,
+    KpiSeries,
+    allocate_costs,
+    boxes_by,
+    calculate_financials,
+    climate_correlations,
+    daily_production,
+    filter_productions,
+    prepare_dates,
+    quality_by_product,
+    revenue_by,
+    rolling_features,
+)
+from agrogestao.analytics.climate import daily_sums  # noqa: E402
+from synthetic import LOCATIONS, PRODUCTS, make_inputs, make_productions  # noqa: E402
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"  {label:<28} {seconds * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        productions = prepare_dates(make_productions(rows))
+        inputs = prepare_dates(make_inputs(rows // 10))
+        start, end = date(2022, 3, 1), date(2023, 9, 30)
+        filtered = filter_productions(productions, start, end, LOCATIONS[:3], PRODUCTS[:3])
+
+        print(f"{rows} linhas de produção, {len(inputs)} de insumos")
+        bench("filter_productions", lambda: filter_productions(
+            productions, start, end, LOCATIONS[:3], PRODUCTS[:3]), args.number)
+        bench("IndexedFrame (construção)", lambda: IndexedFrame(productions), args.number)
+        index = IndexedFrame(productions)
+        bench("IndexedFrame.filter", lambda: index.filter(
+            start, end, LOCATIONS[:3], PRODUCTS[:3]), args.number)
+        bench("calculate_financials", lambda: calculate_financials(filtered, inputs), args.number)
+        bench("boxes_by(product)", lambda: boxes_by(filtered, "product"), args.number)
+        bench("revenue_by(product)", lambda: revenue_by(filtered, "product"), args.number)
+        bench("quality_by_product", lambda: quality_by_product(filtered), args.number)
+        bench("daily_production", lambda: daily_production(filtered), args.number)
+
+        bench("rateio de custos", lambda: allocate_costs(productions, inputs), args.number)
+        allocator = CostAllocator()
+        allocator.allocate(productions, inputs, version=1)
+        bench("rateio de custos (cache)", lambda: allocator.allocate(productions, inputs, version=1), args.number)
+
+        features = rolling_features(daily_sums(productions))
+        bench("clima: janelas móveis", lambda: rolling_features(daily_sums(productions)), args.number)
+        bench("clima: correlações", lambda: climate_correlations(features), args.number)
+        cache = ClimateFeatureCache()
+        cache.update(productions)
+        latest = productions.head(1).assign(created_at="9999-12-31T00:00:00")
+        grown = pd.concat([productions, latest], ignore_index=True)
+        start_time = time.perf_counter()
+        cache.update(grown)
+        print(f"  {'clima: +1 linha (incremental)':<28} {(time.perf_counter() - start_time) * 1000:9.2f} ms")
+
+        bench("KPIs por mês (completo)", lambda: KpiSeries().update(productions, inputs), args.number)
+        kpis = KpiSeries()
+        kpis.update(productions, inputs)
+        bench("KPIs por mês (seleção)", lambda: kpis.totals(LOCATIONS[:3], PRODUCTS[:3]), args.number)
+
+        bench("previsão (ajuste completo)", lambda: ForecastEngine().update(productions), args.number)
+        engine = ForecastEngine()
+        engine.update(productions)
+        start_time = time.perf_counter()
+        engine.update(grown)
+        print(f"  {'previsão: +1 linha (incr.)':<28} {(time.perf_counter() - start_time) * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
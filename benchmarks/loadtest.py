@@ -0,0 +1,292 @@
+"""Teste de carga: usuários simultâneos em uma instância do app.
+
+Sobe um Supabase falso (``StubSupabaseServer``) com dados sintéticos e o
+stub climático, e para cada combinação de ``--rows`` e ``--users`` roda
+um processo novo com uma instância do app. Cada usuário é uma sessão do
+``AppTest`` que abre páginas (``?page=``) e interage com elas (filtros
+do dashboard, tipo de relatório, gravação de produções e insumos),
+com tempos de pensamento exponenciais de média ``--think`` segundos.
+
+Mede a vazão (reruns/s), a latência dos reruns (p50/p95/p99, por
+página com ``--by-page``), o RSS do processo e a memória por sessão:
+depois da carga, sessões novas visitam todas as páginas sob o
+``tracemalloc`` e o heap retido é dividido pelo número delas (o RSS
+oscila demais para separar sessões de poucos MB). As sessões
+compartilham o processo e os ``st.cache_resource``, como no servidor do
+Streamlit; como o ``AppTest`` troca estado global do Streamlit a cada
+execução, os reruns de um processo rodam um por vez, e a latência
+inclui a espera na fila (coluna ``fila``), que é o que o usuário sente
+quando a instância satura.
+
+Uso:
+    python benchmarks/loadtest.py --rows 10000 100000 --users 1 5 10 --duration 60
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Probabilidade de cada página ao navegar (``?page=``)
+PAGE_WEIGHTS = {"dashboard": 0.4, "producao": 0.2, "insumos": 0.1, "relatorios": 0.3}
+# Chance de trocar de página em vez de interagir com a atual
+NAVIGATE_PROBABILITY = 0.3
+REPORT_LABEL = "📊 Tipo de Relatório"
+
+# AppTest troca ``Runtime._instance`` e opções globais a cada execução
+_RUN_LOCK = threading.Lock()
+
+
+def _rss_mb():
+    """Memória residente atual do processo (pico, fora do Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        return _peak_mb()
+
+
+def _peak_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _widget(widgets, label):
+    return next((w for w in widgets if w.label == label), None)
+
+
+class Session(threading.Thread):
+    """Um usuário: navega e interage até ``deadline``, registrando cada rerun em ``samples``"""
+
+    def __init__(self, number, deadline, think, seed, samples):
+        super().__init__(name=f"user-{number}", daemon=True)
+        self.rng = random.Random(seed * 1000 + number)
+        self.deadline = deadline
+        self.think = think
+        self.samples = samples
+        self.page = None
+        self.app = None
+
+    def _timed(self, action, step):
+        queued = time.perf_counter()
+        with _RUN_LOCK:
+            started = time.perf_counter()
+            step()
+            finished = time.perf_counter()
+        errors = [e.message for e in self.app.exception]
+        self.samples.append({
+            "page": self.page, "action": action, "wait": started - queued,
+            "run": finished - started, "error": errors[0] if errors else None,
+        })
+
+    def navigate(self):
+        self.page = self.rng.choices(list(PAGE_WEIGHTS), weights=list(PAGE_WEIGHTS.values()))[0]
+        self.app.query_params["page"] = self.page
+        self._timed("abrir", self.app.run)
+
+    def interact(self):
+        at, rng = self.app, self.rng
+        if self.page == "dashboard":
+            widget = _widget(at.sidebar.multiselect, "Locais")
+            if widget is not None and widget.options:
+                choice = rng.sample(widget.options, rng.randint(1, len(widget.options)))
+                return self._timed("filtrar", widget.set_value(choice).run)
+        elif self.page == "relatorios":
+            widget = _widget(at.sidebar.selectbox, REPORT_LABEL)
+            if widget is not None:
+                return self._timed("relatório", widget.set_value(rng.choice(widget.options)).run)
+        elif self.page == "producao":
+            fields = [_widget(at.text_input, "📍 Local/Estufa"), _widget(at.text_input, "🌱 Produto"),
+                      _widget(at.number_input, "📦 Caixas 1ª Qualidade"), _widget(at.button, "💾 Salvar Produção")]
+            if None not in fields:
+                location, product, boxes, submit = fields
+                location.set_value(rng.choice(["Estufa A", "Estufa B", "Talhão 1"]))
+                product.set_value(rng.choice(["Tomate", "Alface", "Morango"]))
+                boxes.set_value(float(rng.randint(1, 60)))
+                return self._timed("salvar", submit.click().run)
+        elif self.page == "insumos":
+            fields = [_widget(at.text_input, "📝 Descrição"), _widget(at.number_input, "💵 Custo (R$)"),
+                      _widget(at.button, "💾 Salvar Insumo")]
+            if None not in fields:
+                description, cost, submit = fields
+                description.set_value(rng.choice(["Adubo NPK 10-10-10", "Calcário", "Diária"]))
+                cost.set_value(round(rng.uniform(10, 500), 2))
+                return self._timed("salvar", submit.click().run)
+        # Página sem o widget esperado (ex.: sem dados): só reexecuta
+        return self._timed("rerun", at.run)
+
+    def run(self):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP_PATH, default_timeout=300)
+        # Chegadas espalhadas: ninguém abre o app no mesmo instante
+        time.sleep(self.rng.uniform(0, self.think))
+        while time.perf_counter() < self.deadline:
+            if self.page is None or self.rng.random() < NAVIGATE_PROBABILITY:
+                self.navigate()
+            else:
+                self.interact()
+            time.sleep(min(self.rng.expovariate(1 / self.think) if self.think else 0,
+                           max(self.deadline - time.perf_counter(), 0)))
+
+
+def _visit_all(app):
+    for page in PAGE_WEIGHTS:
+        app.query_params["page"] = page
+        started = time.perf_counter()
+        app.run()
+        yield time.perf_counter() - started
+
+
+def session_footprint(count=3):
+    """Bytes do heap Python retidos por sessão que visitou todas as páginas"""
+    from streamlit.testing.v1 import AppTest
+
+    gc.collect()
+    tracemalloc.start()
+    apps = []
+    for _ in range(count):
+        app = AppTest.from_file(APP_PATH, default_timeout=300)
+        list(_visit_all(app))
+        apps.append(app)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained / count
+
+
+def run_sessions(users, duration, think, seed):
+    """Executa ``users`` sessões por ``duration`` segundos neste processo; devolve as medições"""
+    from streamlit.testing.v1 import AppTest
+
+    rss_start = _rss_mb()
+    # Aquecimento: uma sessão visita todas as páginas (carga das tabelas e caches do processo)
+    cold = list(_visit_all(AppTest.from_file(APP_PATH, default_timeout=300)))
+    rss_warm = _rss_mb()
+
+    samples = []
+    started = time.perf_counter()
+    sessions = [Session(i, started + duration, think, seed, samples) for i in range(users)]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    elapsed = time.perf_counter() - started
+    rss_end = _rss_mb()
+    return {
+        "samples": samples, "elapsed": elapsed, "cold_s": cold,
+        "rss_start_mb": rss_start, "rss_warm_mb": rss_warm, "rss_end_mb": rss_end,
+        "rss_peak_mb": _peak_mb(), "mb_per_session": session_footprint() / 1024 ** 2,
+    }
+
+
+def _child(config):
+    result = run_sessions(config["users"], config["duration"], config["think"], config["seed"])
+    print(json.dumps(result))
+
+
+def run_process(rows, users, args, env):
+    """Uma medição em um processo novo, contra os stubs já no ar"""
+    config = {"users": users, "duration": args.duration, "think": args.think, "seed": args.seed}
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(config)],
+                         capture_output=True, text=True, env=env, cwd=ROOT)
+    if out.returncode != 0:
+        raise RuntimeError(f"Falha com {rows} linhas e {users} usuários:\n{out.stderr[-2000:]}")
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result.update(rows=rows, users=users)
+    return result
+
+
+def summarize(samples, elapsed):
+    if not samples:
+        return {"reruns": 0, "per_s": 0.0, "p50": np.nan, "p95": np.nan, "p99": np.nan,
+                "run_ms": np.nan, "wait_ms": np.nan, "errors": 0}
+    total = np.array([s["wait"] + s["run"] for s in samples]) * 1000
+    p50, p95, p99 = np.percentile(total, [50, 95, 99])
+    return {
+        "reruns": len(samples), "per_s": len(samples) / elapsed, "p50": p50, "p95": p95, "p99": p99,
+        "run_ms": np.mean([s["run"] for s in samples]) * 1000,
+        "wait_ms": np.mean([s["wait"] for s in samples]) * 1000,
+        "errors": sum(s["error"] is not None for s in samples),
+    }
+
+
+def print_results(results, by_page):
+    print(f"{'linhas':>8} {'usuários':>8} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'fila ms':>8} {'erros':>6} {'RSS MB':>8} {'pico MB':>8} {'MB/sessão':>10}")
+    for r in results:
+        s = summarize(r["samples"], r["elapsed"])
+        print(f"{r['rows']:>8,} {r['users']:>8} {s['per_s']:>9.2f} {s['p50']:>8.0f} {s['p95']:>8.0f} "
+              f"{s['p99']:>8.0f} {s['wait_ms']:>8.0f} {s['errors']:>6} {r['rss_end_mb']:>8.0f} "
+              f"{r['rss_peak_mb']:>8.0f} {r['mb_per_session']:>10.2f}")
+    if by_page:
+        for r in results:
+            print(f"\n{r['rows']:,} linhas, {r['users']} usuários "
+                  f"(primeira execução: {sum(r['cold_s']):.1f} s para as {len(r['cold_s'])} páginas)")
+            groups = {}
+            for sample in r["samples"]:
+                groups.setdefault((sample["page"], sample["action"]), []).append(sample)
+            for (page, action), samples in sorted(groups.items()):
+                s = summarize(samples, r["elapsed"])
+                print(f"  {page:<11} {action:<10} {s['reruns']:>5} reruns  p50 {s['p50']:7.0f} ms  "
+                      f"p95 {s['p95']:7.0f} ms  p99 {s['p99']:7.0f} ms")
+    errors = {s["error"] for r in results for s in r["samples"] if s["error"]}
+    for message in sorted(errors)[:5]:
+        print(f"erro: {message}")
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        return _child(json.loads(sys.argv[2]))
+
+    from agrogestao.testing import StubSupabaseServer, StubWeatherServer
+    from synthetic import make_inputs, make_productions
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="produções no banco")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--duration", type=float, default=60, help="segundos medidos por combinação")
+    parser.add_argument("--think", type=float, default=5, help="tempo médio de pensamento (s)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="ida e volta até o Supabase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--by-page", action="store_true", help="detalha a latência por página e ação")
+    parser.add_argument("--json", help="grava as medições brutas neste arquivo")
+    args = parser.parse_args()
+
+    results = []
+    with StubSupabaseServer(latency=args.latency_ms / 1000) as supabase, StubWeatherServer() as weather:
+        for rows in args.rows:
+            for users in args.users:
+                # Banco e diretório de dados novos a cada medição (as gravações não se acumulam)
+                supabase.load("productions", make_productions(rows).to_dict("records"))
+                supabase.load("inputs", make_inputs(max(rows // 10, 1)).to_dict("records"))
+                supabase.load("weather_observations", [])
+                with tempfile.TemporaryDirectory() as data_dir:
+                    env = dict(os.environ, SUPABASE_URL=supabase.url, SUPABASE_KEY="stub",
+                               AGRO_WEATHER_API_URL=weather.url, AGRO_WEATHER_HISTORY_URL=weather.url,
+                               AGRO_DATA_DIR=data_dir, AGRO_REPORT_SCHEDULE="off", AGRO_SHARED_CACHE_DIR="")
+                    results.append(run_process(rows, users, args, env))
+                print(f"... {rows:,} linhas, {users} usuários", file=sys.stderr)
+
+    print_results(results, args.by_page)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark de memória: frames como vêm do Supabase x representação compacta.
+
+Uso:
+    python benchmarks/memory.py --rows 100000
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agrogestao.data.compact import compact_frame, memory_report  # noqa: E402
+from synthetic import make_inputs, make_productions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--by-column", action="store_true", help="detalha por coluna")
+    args = parser.parse_args()
+
+    # Como o Supabase entrega: datas e textos como objetos Python
+    raw = {
+        "productions": make_productions(args.rows).astype({"local": object, "product": object,
+                                                           "date": object, "created_at": object,
+                                                           "weather_data": object}),
+        "inputs": make_inputs(args.rows // 10).astype({"type": object, "description": object,
+                                                       "unit": object, "location": object,
+                                                       "date": object, "created_at": object}),
+    }
+    compact = {table: compact_frame(table, df) for table, df in raw.items()}
+
+    before = memory_report(raw)
+    after = memory_report(compact)
+    for table in raw:
+        b = before[before['table'] == table]['bytes'].sum()
+        a = after[after['table'] == table]['bytes'].sum()
+        print(f"{table:<12} {b / 1024 ** 2:9.2f} MB -> {a / 1024 ** 2:8.2f} MB  ({b / a:4.1f}x menor)")
+    if args.by_column:
+        merged = before.merge(after, on=['table', 'column'], how='left', suffixes=('_antes', '_depois'))
+        print(merged[['table', 'column', 'dtype_antes', 'bytes_antes', 'dtype_depois', 'bytes_depois']]
+              .to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark de inicialização do app.py.
+
+Mede, em um processo novo, o tempo até a primeira execução completa do
+script (cold start) e o tempo médio das execuções seguintes (rerun),
+usando a interface de testes do Streamlit (``AppTest``).
+
+Por padrão o Supabase aponta para uma porta local fechada, para que o
+benchmark não dependa da rede nem toque no banco de produção; use
+``--supabase-url``/``SUPABASE_URL`` para medir contra um projeto real.
+
+Uso:
+    python benchmarks/startup.py --page dashboard --reruns 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+if sys.argv[2]:
+    at.query_params["page"] = sys.argv[2]
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+reruns = []
+for _ in range(int(sys.argv[3])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({
+    "import_streamlit_s": t1 - t0,
+    "first_run_s": t2 - t1,
+    "reruns_s": reruns,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(page, reruns, env):
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, APP_PATH, page, str(reruns)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", default="", help="página inicial (?page=...)")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3, help="processos novos medidos")
+    parser.add_argument("--supabase-url", default=os.environ.get("SUPABASE_URL", "http://127.0.0.1:9"))
+    args = parser.parse_args()
+
+    env = dict(os.environ, SUPABASE_URL=args.supabase_url)
+    results = [run_once(args.page, args.reruns, env) for _ in range(args.repeat)]
+
+    first = sorted(r["first_run_s"] for r in results)
+    reruns = sorted(t for r in results for t in r["reruns_s"])
+    print(f"página:            {args.page or '(padrão)'}")
+    print(f"primeira execução: {first[len(first) // 2] * 1000:8.1f} ms (mediana de {len(first)})")
+    if reruns:
+        print(f"rerun:             {reruns[len(reruns) // 2] * 1000:8.1f} ms (mediana de {len(reruns)})")
+    print(f"módulos carregados: {results[-1]['modules']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Geração de dados sintéticos de produção e insumos para benchmarks"""
+import numpy as np
+import pandas as pd
+
+LOCATIONS = ["Estufa A", "Estufa B", "Estufa C", "Talhão 1", "Talhão 2", "Talhão 3"]
+PRODUCTS = ["Tomate", "Alface", "Morango", "Pimentão", "Pepino"]
+INPUT_TYPES = ["Semente", "Fertilizante", "Defensivo", "Mão de Obra", "Equipamento", "Outros"]
+
+
+def make_productions(n, days=3 * 365, seed=0):
+    """Frame no formato de ``productions`` com ``n`` linhas em ``days`` dias"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, days, n), unit="D")
+    day_of_year = dates.dayofyear.to_numpy()
+    temperature = 22 + 6 * np.sin(2 * np.pi * day_of_year / 365) + rng.normal(0, 2, n)
+    first = np.maximum(rng.normal(30, 10, n) + (temperature - 22), 0).round(1)
+    second = np.maximum(rng.normal(10, 4, n), 0).round(1)
+    df = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "date": dates.strftime("%Y-%m-%d"),
+        "local": rng.choice(LOCATIONS, n),
+        "product": rng.choice(PRODUCTS, n),
+        "first_quality": first,
+        "second_quality": second,
+        "first_price": rng.choice([8.0, 10.0, 12.0], n),
+        "second_price": rng.choice([4.0, 5.0, 6.0], n),
+        "temperature": temperature.round(1),
+        "humidity": np.clip(rng.normal(65, 12, n), 20, 100).round(0),
+        "rain": np.maximum(rng.gamma(0.6, 4, n) - 1, 0).round(1),
+        "weather_data": '{"description": "céu limpo", "city": "Londrina", "country": "BR"}',
+    })
+    df["created_at"] = df["date"] + "T12:00:00"
+    return df.sort_values("created_at", ascending=False, ignore_index=True)
+
+
+def make_inputs(n, days=3 * 365, seed=1):
+    """Frame no formato de ``inputs`` com ``n`` linhas em ``days`` dias"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, days, n), unit="D")
+    df = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "date": dates.strftime("%Y-%m-%d"),
+        "type": rng.choice(INPUT_TYPES, n),
+        "description": rng.choice(["Adubo NPK 10-10-10", "Calcário", "Diária", "Fungicida"], n),
+        "quantity": rng.integers(1, 50, n).astype(float),
+        "unit": rng.choice(["kg", "L", "un", "h"], n),
+        "cost": rng.gamma(2, 80, n).round(2),
+        "location": rng.choice(LOCATIONS + [""], n),
+    })
+    df["created_at"] = df["date"] + "T08:00:00"
+    return df.sort_values("created_at", ascending=False, ignore_index=True)
+
+
+def split_by_created(df, cutoff, backdated=0):
+    """Divide ``df`` pela data de criação: devolve ``(anteriores, completo)``.
+
+    ``completo`` tem também as linhas criadas após ``cutoff`` e, com
+    ``backdated``, cópias de linhas antigas lançadas depois (datas passadas),
+    simulando uma carga incremental.
+    """
+    created = pd.to_datetime(df["created_at"])
+    before = df[created < pd.Timestamp(cutoff)]
+    late = before.sample(backdated, random_state=0).assign(
+        id=lambda x: x["id"] + 10 ** 6, created_at="2030-01-01T00:00:00")
+    return before, pd.concat([late, df], ignore_index=True)
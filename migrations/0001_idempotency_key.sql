@@ -0,0 +1,10 @@
+-- Chave de idempotência usada pelo outbox local (outbox.py).
+-- O flusher faz upsert com on_conflict=idempotency_key e ignore_duplicates,
+-- então reenvios após falha de rede não duplicam registros.
+alter table productions add column if not exists idempotency_key text;
+create unique index if not exists productions_idempotency_key_idx
+    on productions (idempotency_key);
+
+alter table inputs add column if not exists idempotency_key text;
+create unique index if not exists inputs_idempotency_key_idx
+    on inputs (idempotency_key);
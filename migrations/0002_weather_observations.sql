@@ -0,0 +1,63 @@
+-- Observações climáticas normalizadas (antes: JSON em productions.weather_data).
+-- Uma linha por (cidade, instante da medição); várias produções registradas
+-- com a mesma leitura apontam para a mesma observação via weather_id.
+
+-- Id determinístico: deve coincidir com repository.weather_observation_id,
+-- que o calcula no cliente para gravar produções offline já com a referência.
+create or replace function weather_observation_id(city text, observed_at timestamptz)
+returns uuid language sql immutable as $$
+    select md5(lower(trim(city)) || '|'
+               || to_char(observed_at at time zone 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS"+00:00"'))::uuid
+$$;
+
+create table if not exists weather_observations (
+    id uuid primary key,
+    city text not null,
+    observed_at timestamptz not null,
+    temperature real,
+    humidity real,
+    rain real,
+    description text,
+    country text,
+    icon text,
+    -- Igual ao id; permite o mesmo upsert idempotente do outbox usado nas demais tabelas
+    idempotency_key text unique,
+    created_at timestamptz not null default now()
+);
+create unique index if not exists weather_observations_city_observed_at_idx
+    on weather_observations (city, observed_at);
+
+alter table productions add column if not exists weather_id uuid
+    references weather_observations (id);
+create index if not exists productions_weather_id_idx on productions (weather_id);
+
+-- Migração dos blobs existentes. Eles não têm o horário da medição, então a
+-- hora de criação da produção (truncada) faz esse papel.
+create temporary table weather_backfill on commit drop as
+select p.id as production_id,
+       p.weather_data::jsonb as w,
+       weather_observation_id(p.weather_data::jsonb->>'city',
+                              date_trunc('hour', p.created_at::timestamptz)) as weather_id,
+       date_trunc('hour', p.created_at::timestamptz) as observed_at
+from productions p
+where p.weather_id is null
+  and p.weather_data is not null
+  and p.weather_data not in ('', '{}')
+  and p.weather_data::jsonb ? 'city';
+
+insert into weather_observations (id, city, observed_at, temperature, humidity, rain,
+                                  description, country, icon, idempotency_key)
+select distinct on (weather_id)
+       weather_id, w->>'city', observed_at,
+       (w->>'temperature')::real, (w->>'humidity')::real, (w->>'rain')::real,
+       w->>'description', w->>'country', w->>'icon', weather_id::text
+from weather_backfill
+on conflict do nothing;
+
+update productions p
+set weather_id = b.weather_id
+from weather_backfill b
+where p.id = b.production_id;
+
+-- Depois de conferir a migração, o blob pode ser removido:
+-- alter table productions drop column weather_data;
@@ -0,0 +1,20 @@
+-- Índices do navegador de registros (ui/records.py, repository.fetch_page).
+-- A paginação é por cursor: "order by <coluna>, id ... where (<coluna>, id) < (v, i)",
+-- então cada ordenação oferecida tem um índice (coluna, id).
+create index if not exists productions_created_at_id_idx on productions (created_at, id);
+create index if not exists productions_date_id_idx on productions (date, id);
+create index if not exists productions_local_id_idx on productions (local, id);
+create index if not exists productions_product_id_idx on productions (product, id);
+
+create index if not exists inputs_created_at_id_idx on inputs (created_at, id);
+create index if not exists inputs_date_id_idx on inputs (date, id);
+create index if not exists inputs_type_id_idx on inputs (type, id);
+create index if not exists inputs_cost_id_idx on inputs (cost, id);
+
+-- Busca por trecho (ilike '%termo%') usa índices de trigramas
+create extension if not exists pg_trgm;
+create index if not exists productions_local_trgm_idx on productions using gin (local gin_trgm_ops);
+create index if not exists productions_product_trgm_idx on productions using gin (product gin_trgm_ops);
+create index if not exists inputs_type_trgm_idx on inputs using gin (type gin_trgm_ops);
+create index if not exists inputs_description_trgm_idx on inputs using gin (description gin_trgm_ops);
+create index if not exists inputs_location_trgm_idx on inputs using gin (location gin_trgm_ops);
@@ -0,0 +1,41 @@
+"""Fixtures compartilhadas: servidores stub do Supabase e da API climática"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agrogestao.analytics import prepare_dates  # noqa: E402
+from agrogestao.testing import StubSupabaseServer, StubWeatherServer  # noqa: E402
+from benchmarks.synthetic import make_inputs, make_productions  # noqa: E402
+
+
+@pytest.fixture
+def supabase_stub():
+    with StubSupabaseServer() as server:
+        yield server
+
+
+@pytest.fixture
+def weather_stub():
+    with StubWeatherServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(supabase_stub):
+    """Cliente oficial do Supabase apontado para o stub"""
+    from supabase import create_client
+    return create_client(supabase_stub.url, "stub")
+
+
+@pytest.fixture
+def productions():
+    """Produções sintéticas (3 anos) com datas convertidas"""
+    return prepare_dates(make_productions(3000))
+
+
+@pytest.fixture
+def inputs():
+    return prepare_dates(make_inputs(400))
@@ -0,0 +1,65 @@
+"""Agregações, cálculos financeiros e montagem/leitura dos registros"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import (
+    boxes_by,
+    calculate_financials,
+    filter_productions,
+    prepare_dates,
+    quality_by_product,
+    revenue_by,
+    total_boxes,
+)
+from agrogestao.data import repository
+
+
+def test_prepare_dates_drops_invalid():
+    df = prepare_dates(pd.DataFrame({"date": ["2024-01-01", "não é data", None]}))
+    assert list(df["date"]) == [pd.Timestamp("2024-01-01")]
+
+
+def test_filter_productions_is_inclusive(productions):
+    start, end = date(2022, 3, 1), date(2022, 3, 31)
+    filtered = filter_productions(productions, start, end, ["Estufa A"], ["Tomate"])
+    expected = productions[(productions["date"] >= "2022-03-01") & (productions["date"] <= "2022-03-31")
+                           & (productions["local"] == "Estufa A") & (productions["product"] == "Tomate")]
+    assert not filtered.empty
+    pd.testing.assert_frame_equal(filtered, expected)
+
+
+def test_aggregations_match_totals(productions):
+    boxes = boxes_by(productions, "local")
+    assert boxes["total"].sum() == pytest.approx(total_boxes(productions))
+    revenue = revenue_by(productions, "product")
+    financials = calculate_financials(productions, pd.DataFrame())
+    assert revenue["total_revenue_item"].sum() == pytest.approx(financials["total_revenue"])
+    quality = quality_by_product(productions)
+    assert (quality["first_percent"] + quality["second_percent"]).round(6).eq(100).all()
+
+
+def test_calculate_financials():
+    productions = pd.DataFrame({"first_quality": [10.0, 5.0], "second_quality": [2.0, 0.0],
+                                "first_price": [10.0, 12.0], "second_price": [5.0, 5.0]})
+    inputs = pd.DataFrame({"cost": [50.0, 30.0]})
+    result = calculate_financials(productions, inputs)
+    assert result["total_revenue"] == pytest.approx(170.0)
+    assert result["first_quality_revenue"] == pytest.approx(160.0)
+    assert result["total_costs"] == pytest.approx(80.0)
+    assert result["profit"] == pytest.approx(90.0)
+    assert result["profit_margin"] == pytest.approx(90 / 170 * 100)
+    assert calculate_financials(pd.DataFrame(), inputs)["total_revenue"] == 0
+
+
+def test_production_row_and_fetch_table(client, supabase_stub):
+    row = repository.production_row("2024-01-05", "Estufa A", "Tomate", "3", 1, 10, 5, 25.5, 0, None)
+    assert row["first_quality"] == 3.0 and row["humidity"] is None and row["rain"] is None
+    older = dict(row, created_at="2024-01-01T00:00:00")
+    supabase_stub.load("productions", [dict(older, id=1), dict(row, id=2, first_quality="7")])
+
+    df = repository.fetch_table(client, "productions")
+    assert list(df["id"]) == [2, 1]
+    assert df["first_quality"].dtype.kind == "f"
+
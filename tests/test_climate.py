@@ -0,0 +1,105 @@
+"""Clima x produção: janelas móveis, correlação, regressão e cache incremental"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import (ClimateFeatureCache, climate_correlations, climate_regression,
+                                  rolling_features)
+from agrogestao.analytics.climate import GROUP_KEYS, daily_sums, feature_columns
+from benchmarks.synthetic import make_productions, split_by_created
+
+
+def _sorted(features):
+    return features.sort_values(GROUP_KEYS + ["day"]).reset_index(drop=True)
+
+
+@pytest.fixture
+def daily():
+    df = make_productions(900)
+    # Leituras ausentes não entram nas médias
+    df.loc[df.index % 7 == 0, "temperature"] = np.nan
+    df.loc[df.index % 11 == 0, "rain"] = np.nan
+    return daily_sums(df)
+
+
+def test_rolling_features_match_pandas_calendar_windows(daily):
+    features = _sorted(rolling_features(daily))
+    local, product = daily.iloc[0][GROUP_KEYS]
+    series = daily[(daily["local"] == local) & (daily["product"] == product)].set_index("day").sort_index()
+    series = series.drop(columns=GROUP_KEYS)
+    # A série tem dias sem registro: a janela é por calendário, não por linhas
+    assert (series.index.to_series().diff().dt.days > 1).any()
+    ours = features[(features["local"] == local) & (features["product"] == product)].set_index("day")
+
+    for window in (7, 14, 30):
+        rolled = series.rolling(f"{window}D").sum()
+        for col in ["temperature", "humidity"]:
+            expected = rolled[f"{col}_sum"] / rolled[f"{col}_n"].where(rolled[f"{col}_n"] > 0)
+            np.testing.assert_allclose(ours[f"{col}_mean_{window}d"], expected, rtol=1e-9)
+        expected_rain = rolled["rain_sum"].where(rolled["rain_n"] > 0)
+        np.testing.assert_allclose(ours[f"rain_sum_{window}d"], expected_rain, rtol=1e-9)
+
+
+def test_correlations_match_corrcoef(daily):
+    features = rolling_features(daily)
+    table = climate_correlations(features).set_index(["feature", "target"])
+    for col in feature_columns(features):
+        frame = features[[col, "first_share"]].dropna()
+        expected = np.corrcoef(frame[col], frame["first_share"])[0, 1]
+        assert table.loc[(col, "first_share"), "correlation"] == pytest.approx(expected, rel=1e-6)
+        assert table.loc[(col, "first_share"), "n"] == len(frame)
+
+    by_local = climate_correlations(features, by=["local"]).set_index(["local", "feature", "target"])
+    local = features["local"].iloc[0]
+    frame = features.loc[features["local"] == local, ["temperature_mean_7d", "total_boxes"]].dropna()
+    expected = np.corrcoef(frame["temperature_mean_7d"], frame["total_boxes"])[0, 1]
+    row = by_local.loc[(local, "temperature_mean_7d", "total_boxes")]
+    assert row["correlation"] == pytest.approx(expected, rel=1e-6)
+
+
+def test_regression_matches_lstsq(daily):
+    features = rolling_features(daily)
+    cols = ["temperature_mean_7d", "humidity_mean_14d", "rain_sum_30d"]
+    result = climate_regression(features, "first_share", cols)
+
+    frame = features[cols + ["first_share"]].dropna()
+    X = np.column_stack([np.ones(len(frame)), frame[cols].to_numpy()])
+    y = frame["first_share"].to_numpy()
+    beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+    residual = y - X @ beta
+    r2 = 1 - (residual ** 2).sum() / ((y - y.mean()) ** 2).sum()
+
+    assert result["n"] == len(frame)
+    assert result["intercept"] == pytest.approx(beta[0])
+    assert [result["coefficients"][c] for c in cols] == pytest.approx(list(beta[1:]))
+    assert result["r2"] == pytest.approx(r2)
+
+
+def test_regression_without_enough_rows():
+    features = rolling_features(daily_sums(make_productions(3)))
+    result = climate_regression(features, "first_share")
+    assert result["coefficients"] == {} and np.isnan(result["r2"])
+
+
+def test_feature_cache_update_matches_rebuild(monkeypatch):
+    before, full = split_by_created(make_productions(2000), "2024-06-01", backdated=25)
+    cache = ClimateFeatureCache()
+    cache.update(before)
+
+    applied = []
+    apply_new_rows = cache._apply_new_rows
+    monkeypatch.setattr(cache, "_apply_new_rows", lambda rows: applied.append(len(rows)) or apply_new_rows(rows))
+    incremental = cache.update(full)
+
+    # Só as linhas novas (inclusive as lançadas com data passada) foram incorporadas
+    assert applied == [len(full) - len(before)]
+    rebuilt = ClimateFeatureCache().update(full)
+    pd.testing.assert_frame_equal(_sorted(incremental), _sorted(rebuilt), rtol=1e-9)
+
+
+def test_feature_cache_rebuilds_after_delete():
+    df = make_productions(800)
+    cache = ClimateFeatureCache()
+    cache.update(df)
+    shrunk = cache.update(df.iloc[50:])
+    pd.testing.assert_frame_equal(_sorted(shrunk), _sorted(rolling_features(daily_sums(df.iloc[50:]))))
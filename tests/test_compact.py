@@ -0,0 +1,52 @@
+"""Frames compactos: tipos, valores preservados e concatenação de categorias"""
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import calculate_financials, revenue_by
+from agrogestao.data.compact import compact_frame, concat_compact, memory_report
+from benchmarks.synthetic import make_productions
+
+
+@pytest.fixture
+def raw():
+    return make_productions(2000)
+
+
+def test_compact_frame_types_and_memory(raw):
+    compact = compact_frame("productions", raw)
+    assert "weather_data" not in compact.columns
+    assert isinstance(compact["local"].dtype, pd.CategoricalDtype)
+    assert compact["first_quality"].dtype == "float32"
+    assert compact["first_price"].dtype == "float64"
+    assert pd.api.types.is_datetime64_any_dtype(compact["date"])
+    assert str(compact["created_at"].dt.tz) == "UTC"
+    assert compact.memory_usage(deep=True).sum() < raw.memory_usage(deep=True).sum() / 3
+    assert "weather_data" in raw.columns
+
+
+def test_compact_frame_keeps_results(raw):
+    compact = compact_frame("productions", raw)
+    original = calculate_financials(raw, pd.DataFrame())
+    result = calculate_financials(compact, pd.DataFrame())
+    assert result["total_revenue"] == pytest.approx(original["total_revenue"], rel=1e-6)
+    by_local = dict(revenue_by(compact, "local").astype({"local": str}).values)
+    expected = dict(revenue_by(raw, "local").values)
+    assert by_local == pytest.approx(expected, rel=1e-6)
+
+
+def test_concat_compact_unifies_categories(raw):
+    compact = compact_frame("productions", raw)
+    new_row = compact_frame("productions", pd.DataFrame([{"local": "Estufa Nova", "product": "Tomate",
+                                                           "first_quality": 1, "second_quality": 0}]))
+    merged = concat_compact([new_row, compact])
+    assert isinstance(merged["local"].dtype, pd.CategoricalDtype)
+    assert merged["local"].iloc[0] == "Estufa Nova"
+    assert list(merged["local"].iloc[1:]) == list(compact["local"])
+    assert len(merged) == len(compact) + 1
+
+
+def test_memory_report(raw):
+    report = memory_report({"productions": compact_frame("productions", raw)})
+    assert set(report["table"]) == {"productions"}
+    assert {"local", "Index"} <= set(report["column"])
+    assert (report["rows"] == len(raw)).all()
@@ -0,0 +1,68 @@
+"""Rateio de custos: conservação do custo total, regras e cache por versão"""
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import AllocationRules, CostAllocator, allocate_costs, profit_by
+
+
+@pytest.mark.parametrize("period", ["M", "W"])
+@pytest.mark.parametrize("basis", ["revenue", "boxes", "rows"])
+@pytest.mark.parametrize("unmatched_as_shared", [True, False])
+def test_allocation_conserves_total_cost(productions, inputs, period, basis, unmatched_as_shared):
+    rules = AllocationRules(period=period, basis=basis, unmatched_as_shared=unmatched_as_shared)
+    allocated, unallocated = allocate_costs(productions, inputs, rules)
+    assert allocated.index.equals(productions.index)
+    assert (allocated >= 0).all()
+    assert allocated.sum() + unallocated == pytest.approx(inputs["cost"].sum())
+
+
+def test_direct_and_shared_costs():
+    productions = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-05", "2024-01-20", "2024-01-10", "2024-02-01"]),
+        "local": ["Estufa A", "Estufa A", "Estufa B", "Estufa B"],
+        "first_quality": [10.0, 30.0, 10.0, 0.0],
+        "second_quality": [0.0, 0.0, 0.0, 0.0],
+    })
+    inputs = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-02", "2024-01-15", "2024-03-01"]),
+        "location": ["Estufa A", "Geral", "Estufa A"],
+        "cost": [100.0, 50.0, 70.0],
+    })
+    allocated, unallocated = allocate_costs(productions, inputs, AllocationRules(basis="boxes"))
+    # Janeiro: 100 direto para a Estufa A (10:30) e 50 geral para as três linhas (10:30:10)
+    assert list(allocated.round(6)) == [25 + 10, 75 + 30, 10, 0]
+    # Março não tem produção: o custo fica sem rateio
+    assert unallocated == pytest.approx(70.0)
+
+
+def test_zero_basis_splits_by_row():
+    productions = pd.DataFrame({"date": pd.to_datetime(["2024-01-05", "2024-01-06"]),
+                                "local": ["Estufa A", "Estufa A"],
+                                "first_quality": [0.0, 0.0], "second_quality": [0.0, 0.0]})
+    inputs = pd.DataFrame({"date": pd.to_datetime(["2024-01-01"]), "location": ["Estufa A"], "cost": [40.0]})
+    allocated, unallocated = allocate_costs(productions, inputs, AllocationRules(basis="boxes"))
+    assert list(allocated) == [20.0, 20.0] and unallocated == 0
+
+
+def test_profit_by_matches_allocation(productions, inputs):
+    allocated, _ = allocate_costs(productions, inputs)
+    grouped = profit_by(productions, allocated, ["local"])
+    assert grouped["cost"].sum() == pytest.approx(allocated.sum())
+    assert (grouped["profit"] == grouped["revenue"] - grouped["cost"]).all()
+
+
+def test_allocator_caches_by_version_and_rules(productions, inputs):
+    allocator = CostAllocator(max_entries=2)
+    first = allocator.allocate(productions, inputs, version=1)
+    assert allocator.allocate(productions, inputs, version=1) is first
+    weekly = allocator.allocate(productions, inputs, version=1, rules=AllocationRules(period="W"))
+    assert weekly is not first
+    changed = allocator.allocate(productions.iloc[1:], inputs, version=2)
+    assert len(changed[0]) == len(productions) - 1
+    # Só as duas combinações mais recentes ficam em cache
+    assert allocator.allocate(productions, inputs, version=1) is not first
+
+
+def test_invalid_basis():
+    with pytest.raises(ValueError):
+        AllocationRules(basis="area")
@@ -0,0 +1,56 @@
+"""Previsão: atualização incremental equivalente à reconstrução"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import ForecastEngine
+from agrogestao.analytics.forecast import SERIES_KEYS, ForecastModel, weekly_sums
+from benchmarks.synthetic import make_productions, split_by_created
+
+
+@pytest.fixture
+def tables():
+    return split_by_created(make_productions(3000), "2024-06-01", backdated=40)
+
+
+def _sorted(weekly):
+    return weekly.sort_values(SERIES_KEYS + ["week"]).reset_index(drop=True)
+
+
+def test_add_rows_matches_full_fit(tables):
+    before, full = tables
+    incremental = ForecastModel(weekly_sums(before))
+    incremental.add_rows(full.iloc[:len(full) - len(before)])
+    rebuilt = ForecastModel(weekly_sums(full))
+
+    pd.testing.assert_frame_equal(_sorted(incremental.weekly), _sorted(rebuilt.weekly))
+    order = incremental.series.get_indexer(rebuilt.series)
+    np.testing.assert_allclose(incremental.xtx[order], rebuilt.xtx, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(incremental.coefficients()[0][order], rebuilt.coefficients()[0],
+                               rtol=1e-6, atol=1e-6)
+
+
+def test_engine_updates_incrementally(tables):
+    before, full = tables
+    engine = ForecastEngine(horizon=4)
+    engine.update(before)
+    model = engine.model
+    forecast = engine.update(full)
+    assert engine.model is model
+
+    expected = ForecastEngine(horizon=4).update(full)
+    keys = SERIES_KEYS + ["week"]
+    pd.testing.assert_frame_equal(forecast.sort_values(keys).reset_index(drop=True),
+                                  expected.sort_values(keys).reset_index(drop=True), rtol=1e-6)
+    assert len(forecast) == 4 * forecast.groupby(SERIES_KEYS).ngroups
+    assert (forecast["boxes_low"] <= forecast["boxes"]).all()
+    assert (forecast["boxes"] <= forecast["boxes_high"]).all()
+
+
+def test_engine_rebuilds_after_delete(tables):
+    _, full = tables
+    engine = ForecastEngine()
+    engine.update(full)
+    model = engine.model
+    engine.update(full.iloc[1:])
+    assert engine.model is not model
@@ -0,0 +1,53 @@
+"""IndexedFrame: mesmo resultado de ``filter_productions`` por busca binária"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import FrameIndexCache, IndexedFrame, filter_productions
+from agrogestao.data.compact import compact_frame
+from benchmarks.synthetic import LOCATIONS, PRODUCTS, make_productions
+
+CASES = [
+    (date(2022, 1, 1), date(2024, 12, 31), None, None),
+    (date(2022, 3, 1), date(2022, 3, 1), None, None),
+    (date(2022, 3, 1), date(2023, 9, 30), LOCATIONS[:3], None),
+    (date(2022, 3, 1), date(2023, 9, 30), None, PRODUCTS[1:2]),
+    (date(2023, 2, 1), date(2023, 2, 28), LOCATIONS[2:], PRODUCTS[:3]),
+    (date(2023, 2, 1), date(2023, 2, 28), ["Estufa Inexistente"], None),
+    (date(2030, 1, 1), date(2030, 12, 31), None, None),
+]
+
+
+@pytest.fixture(params=["raw", "compact"])
+def frame(request, productions):
+    if request.param == "compact":
+        return compact_frame("productions", make_productions(3000))
+    return productions
+
+
+@pytest.mark.parametrize("start, end, locations, products", CASES)
+def test_filter_matches_filter_productions(frame, start, end, locations, products):
+    indexed = IndexedFrame(frame)
+    expected = filter_productions(frame, start, end, locations, products)
+    result = indexed.filter(start, end, locations, products)
+    # Mesmas linhas (pelos rótulos originais), na ordem das datas
+    assert sorted(result.index) == sorted(expected.index)
+    assert result["date"].is_monotonic_increasing
+
+
+def test_rows_without_date_are_dropped():
+    df = pd.DataFrame({"date": ["2024-01-02", None, "2024-01-01"], "local": ["A", "B", "A"],
+                       "product": ["Tomate", "Tomate", "Alface"]}, index=[10, 11, 12])
+    indexed = IndexedFrame(df)
+    assert len(indexed) == 2
+    assert (indexed.min_date, indexed.max_date) == (date(2024, 1, 1), date(2024, 1, 2))
+    assert list(indexed.select(local=["A"]).index) == [12, 10]
+
+
+def test_cache_reuses_index_per_version(productions):
+    cache = FrameIndexCache(max_entries=1)
+    index = cache.get(productions, version=("productions", 1))
+    assert cache.get(productions, version=("productions", 1)) is index
+    assert cache.get(productions, version=("productions", 2)) is not index
+    assert cache.get(productions, version=("productions", 1)) is not index
@@ -0,0 +1,62 @@
+"""Séries de KPI: atualização incremental equivalente à reconstrução"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import AllocationRules, KpiSeries, latest_period, period_label
+from agrogestao.analytics.kpis import KEYS, period_sums, with_deltas
+from benchmarks.synthetic import make_inputs, make_productions, split_by_created
+
+
+def _sorted(frame):
+    return frame.sort_values(KEYS + ["period"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("period", ["M", "W"])
+def test_incremental_update_matches_rebuild(period):
+    productions_before, productions = split_by_created(make_productions(3000), "2024-06-01", backdated=30)
+    inputs_before, inputs = split_by_created(make_inputs(400), "2024-09-01", backdated=5)
+    rules = AllocationRules(period=period)
+
+    series = KpiSeries(rules)
+    series.update(productions_before, inputs_before)
+    incremental = series.update(productions, inputs)
+    rebuilt = KpiSeries(rules).update(productions, inputs)
+
+    pd.testing.assert_frame_equal(_sorted(incremental), _sorted(rebuilt), rtol=1e-9)
+    total = series.totals()
+    assert total["cost"].sum() == pytest.approx(period_sums(productions, inputs, rules)["cost"].sum())
+
+
+def test_delete_forces_rebuild(productions, inputs):
+    series = KpiSeries()
+    series.update(productions, inputs)
+    shrunk = series.update(productions.iloc[100:], inputs)
+    pd.testing.assert_frame_equal(_sorted(shrunk), _sorted(KpiSeries().update(productions.iloc[100:], inputs)))
+
+
+def test_deltas_use_previous_period_and_year():
+    sums = pd.DataFrame({
+        "local": "Estufa A", "product": "Tomate",
+        "period": pd.PeriodIndex(["2023-01", "2023-03", "2024-01"], freq="M"),
+        "revenue": [100.0, 120.0, 150.0], "cost": [50.0, 60.0, 30.0],
+        "boxes": [10.0, 12.0, 15.0], "first_boxes": [5.0, 6.0, 12.0], "rows": [1, 1, 1],
+    })
+    frame = with_deltas(sums, KEYS, "M")
+    # Fevereiro não existe: março não tem período anterior
+    assert np.isnan(frame["revenue_pop"].iloc[1])
+    assert frame["revenue_yoy"].iloc[2] == pytest.approx(50.0)
+    assert frame["margin"].iloc[2] == pytest.approx(80.0)
+    assert frame["margin_yoy"].iloc[2] == pytest.approx(30.0)
+    assert frame["first_share_yoy"].iloc[2] == pytest.approx(30.0)
+
+
+def test_latest_period_and_label(productions, inputs):
+    kpis = KpiSeries()
+    kpis.update(productions, inputs)
+    series = kpis.totals()
+    row = latest_period(series, "2023-01-01", "2023-03-15")
+    assert row["period"] == pd.Period("2023-03", freq="M")
+    assert period_label(row["period"]) == "03/2023"
+    assert period_label(pd.Period("2024-03-04", freq="W")) == "sem. 04/03/2024"
+    assert latest_period(series, "2040-01-01", "2040-02-01") is None
@@ -0,0 +1,167 @@
+"""Outbox: journal, reprodução, compactação, rejeitados e reenvio idempotente"""
+import json
+import socket
+
+import pytest
+from supabase import create_client
+
+from agrogestao.data import repository
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN, Outbox, OutboxFlusher, PermanentError
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "outbox.jsonl")
+
+
+def _row(n):
+    return {"local": f"Estufa {n}", "product": "Tomate", "first_quality": float(n)}
+
+
+def test_replay_restores_pending_in_order(path):
+    outbox = Outbox(path, fsync=False)
+    keys = [outbox.put("productions", _row(n)) for n in range(3)]
+    outbox.ack([keys[1]])
+    outbox.close()
+
+    reopened = Outbox(path, fsync=False)
+    assert [e["key"] for e in reopened.pending()] == [keys[0], keys[2]]
+    assert reopened.pending()[0]["row"][IDEMPOTENCY_COLUMN] == keys[0]
+    assert keys[1] not in reopened
+
+
+def test_replay_skips_truncated_last_line(path):
+    outbox = Outbox(path, fsync=False)
+    key = outbox.put("productions", _row(1))
+    outbox.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "key": "trunc')
+
+    assert [e["key"] for e in Outbox(path, fsync=False).pending()] == [key]
+
+
+def test_same_key_keeps_single_pending(path):
+    outbox = Outbox(path, fsync=False)
+    outbox.put("weather_observations", {"city": "Londrina"}, key="obs-1")
+    outbox.put("weather_observations", {"city": "Londrina"}, key="obs-1")
+    assert len(outbox) == 1
+
+
+def test_journal_compacted_when_queue_drains(path):
+    outbox = Outbox(path, fsync=False)
+    keys = [outbox.put("productions", _row(n)) for n in range(5)]
+    outbox.ack(keys[:4])
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 9
+    outbox.ack(keys[4:])
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == ""
+    # O journal continua utilizável depois de truncado
+    key = outbox.put("productions", _row(9))
+    outbox.close()
+    assert [e["key"] for e in Outbox(path, fsync=False).pending()] == [key]
+
+
+def test_rejected_survive_replay_and_requeue(path):
+    outbox = Outbox(path, fsync=False)
+    good, bad = outbox.put("productions", _row(1)), outbox.put("productions", _row(2))
+    outbox.reject({bad: "coluna inexistente"})
+    outbox.close()
+
+    reopened = Outbox(path, fsync=False)
+    assert [e["key"] for e in reopened.pending()] == [good]
+    [dead] = reopened.dead_letters()
+    assert dead["key"] == bad and dead["error"] == "coluna inexistente"
+
+    assert reopened.requeue_dead() == 1
+    assert [e["key"] for e in reopened.pending()] == [good, bad]
+    assert reopened.dead_letters() == []
+    reopened.close()
+    assert len(Outbox(path, fsync=False)) == 2
+
+
+def test_rejected_copy_wins_over_missing_journal_mark(path):
+    # Queda entre gravar o rejeitado e marcá-lo no journal
+    outbox = Outbox(path, fsync=False)
+    key = outbox.put("productions", _row(1))
+    outbox.close()
+    entry = dict(Outbox(path, fsync=False).pending()[0], error="recusado")
+    with open(f"{path[:-len('.jsonl')]}.dead.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    reopened = Outbox(path, fsync=False)
+    assert len(reopened) == 0
+    assert [e["key"] for e in reopened.dead_letters()] == [key]
+
+
+def test_flush_isolates_permanently_rejected_rows(path):
+    outbox = Outbox(path, fsync=False)
+    keys = [outbox.put("productions", _row(n)) for n in range(6)]
+    sent, rejected, flushed = [], [], []
+
+    def send_batch(table, rows):
+        if any(row["first_quality"] == 3.0 for row in rows):
+            raise PermanentError("valor inválido")
+        sent.extend(row[IDEMPOTENCY_COLUMN] for row in rows)
+
+    flusher = OutboxFlusher(outbox, send_batch, on_flushed=lambda t, k: flushed.extend(k),
+                            on_rejected=lambda t, k: rejected.extend(k))
+    assert flusher.flush_once() == 5
+    assert sorted(sent) == sorted(flushed) == sorted(keys[:3] + keys[4:])
+    assert rejected == [keys[3]]
+    assert len(outbox) == 0
+    assert [e["key"] for e in outbox.dead_letters()] == [keys[3]]
+
+
+def test_flush_keeps_batch_on_transient_error(path):
+    outbox = Outbox(path, fsync=False)
+    outbox.put("productions", _row(1))
+
+    def send_batch(table, rows):
+        raise ConnectionError("sem rede")
+
+    with pytest.raises(ConnectionError):
+        OutboxFlusher(outbox, send_batch).flush_once()
+    assert len(outbox) == 1
+    assert outbox.dead_letters() == []
+
+
+def test_flush_sends_ordered_tables_first(path):
+    outbox = Outbox(path, fsync=False)
+    outbox.put("productions", _row(1))
+    outbox.put("weather_observations", {"city": "Londrina"}, key="obs-1")
+    tables = []
+    OutboxFlusher(outbox, lambda table, rows: tables.append(table),
+                  table_order=("weather_observations",)).flush_once()
+    assert tables == ["weather_observations", "productions"]
+
+
+def test_retry_after_lost_ack_does_not_duplicate(path, client, supabase_stub):
+    outbox = Outbox(path, fsync=False)
+    for n in range(3):
+        outbox.put("productions", _row(n))
+    rows = [e["row"] for e in outbox.pending()]
+    # Envio concluído, mas o processo cai antes do ack: o lote volta no replay
+    repository.upsert_batch(client, "productions", rows)
+    outbox.close()
+
+    reopened = Outbox(path, fsync=False)
+    flusher = OutboxFlusher(reopened, lambda table, batch: repository.upsert_batch(client, table, batch))
+    assert flusher.flush_once() == 3
+    assert len(supabase_stub.tables["productions"]) == 3
+    assert len(reopened) == 0
+
+
+def test_upsert_batch_classifies_errors(client):
+    # Tabela inexistente (42P01 -> 404): recusa definitiva
+    with pytest.raises(PermanentError):
+        repository.upsert_batch(client, "tabela_inexistente", [_row(1)])
+
+    # Sem servidor: falha de rede, transitória
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    offline = create_client(f"http://127.0.0.1:{port}", "stub")
+    with pytest.raises(Exception) as raised:
+        repository.upsert_batch(offline, "productions", [_row(1)])
+    assert not isinstance(raised.value, PermanentError)
@@ -0,0 +1,61 @@
+"""Paginação por cursor (keyset) e exclusão em lote contra o PostgREST stub"""
+import pytest
+
+from agrogestao.data import repository
+
+LOCALS = ["Estufa A", "Estufa B", "Talhão 1", None, 'Estufa "C", fundos (norte)']
+
+
+@pytest.fixture
+def rows(supabase_stub):
+    rows = [{"id": i, "local": LOCALS[i % len(LOCALS)], "product": ["Tomate", "Alface"][i % 2],
+             "date": f"2024-01-{i % 28 + 1:02d}", "created_at": f"2024-02-01T00:{i // 60:02d}:{i % 60:02d}",
+             "first_quality": i, "second_quality": 0}
+            for i in range(1, 138)]
+    supabase_stub.load("productions", rows)
+    return rows
+
+
+def _all_pages(client, limit, **kwargs):
+    seen, cursor, pages = [], None, 0
+    while True:
+        df, cursor = repository.fetch_page(client, "productions", cursor=cursor, limit=limit, **kwargs)
+        seen.extend(df["id"].tolist() if not df.empty else [])
+        pages += 1
+        if cursor is None:
+            return seen, pages
+
+
+def _expected(rows, sort, desc):
+    present = sorted((r for r in rows if r[sort] is not None), key=lambda r: (r[sort], r["id"]), reverse=desc)
+    missing = sorted((r for r in rows if r[sort] is None), key=lambda r: r["id"], reverse=desc)
+    # Nulos no fim nas duas direções
+    return [r["id"] for r in present + missing]
+
+
+@pytest.mark.parametrize("sort", ["created_at", "date", "local", "product"])
+@pytest.mark.parametrize("desc", [True, False])
+def test_pages_cover_every_row_once_in_order(client, rows, sort, desc):
+    seen, pages = _all_pages(client, 20, sort=sort, desc=desc)
+    assert seen == _expected(rows, sort, desc)
+    assert pages == 7
+
+
+def test_search_with_special_characters(client, rows):
+    seen, _ = _all_pages(client, 5, sort="local", search='"C", fundos (')
+    assert seen == [r["id"] for r in sorted(rows, key=lambda r: -r["id"]) if r["local"] == LOCALS[4]]
+    df, cursor = repository.fetch_page(client, "productions", search="alface", limit=1000)
+    assert set(df["product"]) == {"Alface"} and cursor is None
+
+
+def test_page_numeric_columns_and_invalid_sort(client, rows):
+    df, _ = repository.fetch_page(client, "productions", limit=3)
+    assert df["first_quality"].dtype.kind in "if"
+    with pytest.raises(ValueError):
+        repository.fetch_page(client, "productions", sort="id; drop table")
+
+
+def test_delete_rows_in_batches(client, rows, supabase_stub):
+    repository.delete_rows(client, "productions", list(range(1, 101)), batch_size=30)
+    assert [r["id"] for r in supabase_stub.tables["productions"]] == list(range(101, 138))
+    assert supabase_stub.requests[("DELETE", "productions")] == 4
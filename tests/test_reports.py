@@ -0,0 +1,82 @@
+"""Relatórios agendados: horários, uma execução por horário e reaproveitamento por hash"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from agrogestao.reports import ArtifactStore, ReportScheduler
+from agrogestao.reports import scheduler as scheduler_module
+from benchmarks.synthetic import make_inputs, make_productions
+
+TZ = "America/Sao_Paulo"
+
+
+def _recent(df):
+    """Datas deslocadas para os últimos 25 dias (a janela termina ontem)"""
+    days = pd.to_timedelta(np.arange(len(df)) % 25 + 1, unit="D")
+    dates = (pd.Timestamp.now(tz=TZ).tz_localize(None).normalize() - days).strftime("%Y-%m-%d")
+    return df.assign(date=dates, created_at=dates + "T12:00:00")
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    productions = _recent(make_productions(400)).assign(local=lambda df: df["local"].where(
+        df["local"].isin(["Estufa A", "Estufa B"]), "Estufa A"))
+    inputs = _recent(make_inputs(40))
+    return ReportScheduler(lambda: (productions, inputs), store=ArtifactStore(str(tmp_path)),
+                           days=30, workers=0, formats=("xlsx",))
+
+
+def test_slots():
+    nightly = ReportScheduler(lambda: None, schedule="nightly", hour=2, store=object())
+    assert nightly.slot(pd.Timestamp("2024-03-05 01:00", tz=TZ)) == pd.Timestamp("2024-03-04 02:00", tz=TZ)
+    assert nightly.slot(pd.Timestamp("2024-03-05 02:00", tz=TZ)) == pd.Timestamp("2024-03-05 02:00", tz=TZ)
+    assert nightly.next_run(pd.Timestamp("2024-03-05 01:00", tz=TZ)) == pd.Timestamp("2024-03-05 02:00", tz=TZ)
+    weekly = ReportScheduler(lambda: None, schedule="weekly", hour=2, store=object())
+    # Semanal: segunda-feira (2024-03-04)
+    assert weekly.slot(pd.Timestamp("2024-03-07 10:00", tz=TZ)) == pd.Timestamp("2024-03-04 02:00", tz=TZ)
+    with pytest.raises(ValueError):
+        ReportScheduler(lambda: None, schedule="hourly", store=object())
+
+
+def test_run_pending_once_per_slot(scheduler):
+    now = scheduler.slot() + pd.Timedelta(minutes=5)
+    assert scheduler.run_pending(now) is True
+    entries = scheduler.store.latest()
+    assert {e["farm"] for e in entries} == {"Estufa A", "Estufa B"}
+    assert scheduler.run_pending(now + pd.Timedelta(hours=5)) is False
+    assert len(scheduler.store.manifest()["runs"]) == 1
+
+
+def test_same_content_reuses_files(scheduler, monkeypatch):
+    first = scheduler.run_once()
+    assert first
+    rendered = []
+    monkeypatch.setattr(scheduler_module, "_render_job", lambda job: rendered.append(job) or b"")
+    second = scheduler.run_once()
+    assert rendered == []
+    assert sorted(e["file"] for e in first) == sorted(e["file"] for e in second)
+
+
+def test_run_forever_waits_for_first_slot(scheduler, monkeypatch):
+    class Slept(Exception):
+        pass
+
+    def sleep(seconds):
+        raise Slept(seconds)
+
+    monkeypatch.setattr(scheduler_module.time, "sleep", sleep)
+    with pytest.raises(Slept):
+        scheduler.run_forever()
+    assert scheduler.store.manifest()["entries"] == []
+
+
+def test_server_tables_skip_the_outbox(client, supabase_stub, monkeypatch):
+    from agrogestao.data import SYNC_COLUMN, SYNC_CONFIRMED, Outbox
+
+    supabase_stub.load("productions", make_productions(30).to_dict("records"))
+    supabase_stub.load("inputs", make_inputs(5).to_dict("records"))
+    # Nenhum outbox é aberto: pendências do app não entram nos relatórios
+    monkeypatch.setattr(Outbox, "__init__", lambda *a, **k: pytest.fail("outbox aberto pelo agendador"))
+    productions, inputs = scheduler_module.server_tables(lambda: client)()
+    assert len(productions) == 30 and len(inputs) == 5
+    assert (productions[SYNC_COLUMN] == SYNC_CONFIRMED).all()
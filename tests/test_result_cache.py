@@ -0,0 +1,124 @@
+"""Cache de resultados: chaves canônicas, versões, invalidação e limite de memória"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agrogestao.analytics import AllocationRules
+from agrogestao.data import VERSION_ATTR, DataService, ResultCache, canonical_key
+from agrogestao.data.shared_cache import SnapshotStore
+
+
+def test_key_ignores_set_order_and_date_types():
+    a = canonical_key("financeiro", {"start": datetime.date(2024, 1, 1), "locations": frozenset(["B", "A"]),
+                                     "rules": AllocationRules(period="W")})
+    b = canonical_key("financeiro", {"locations": frozenset(["A", "B"]), "start": datetime.datetime(2024, 1, 1),
+                                     "rules": AllocationRules(period="W")})
+    assert a == b
+    assert canonical_key("financeiro", {"n": np.int64(3)}) == canonical_key("financeiro", {"n": 3})
+    assert a != canonical_key("financeiro", {"start": datetime.date(2024, 1, 2), "locations": frozenset(["A", "B"]),
+                                             "rules": AllocationRules(period="W")})
+    assert a != canonical_key("qualidade", {"start": datetime.date(2024, 1, 1), "locations": frozenset(["A", "B"]),
+                                            "rules": AllocationRules(period="W")})
+
+
+def test_key_keeps_sequence_order():
+    start, end = datetime.date(2024, 1, 1), datetime.date(2024, 3, 1)
+    assert canonical_key("r", {"range": (start, end)}) != canonical_key("r", {"range": (end, start)})
+    assert canonical_key("r", {"top": [3, 1]}) != canonical_key("r", {"top": [1, 3]})
+    assert canonical_key("r", {"columns": ["a", "b"]}) == canonical_key("r", {"columns": ("a", "b")})
+    # Conjunto e lista com os mesmos itens não se confundem
+    assert canonical_key("r", {"x": frozenset([1])}) != canonical_key("r", {"x": [1]})
+
+
+class Counter:
+    def __init__(self, value=None):
+        self.calls = 0
+        self.value = value
+
+    def __call__(self):
+        self.calls += 1
+        return self.value if self.value is not None else self.calls
+
+
+def test_hits_until_version_changes():
+    cache = ResultCache()
+    compute = Counter()
+    versions = [("productions", 1), ("inputs", 1)]
+    assert cache.get_or_compute("r", {"locations": {"A", "B"}}, versions, compute) == 1
+    assert cache.get_or_compute("r", {"locations": {"B", "A"}}, versions[::-1], compute) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert cache.get_or_compute("r", {"locations": {"A", "B"}}, [("productions", 2), ("inputs", 1)], compute) == 2
+    # A versão antiga foi descartada e não volta ao cache
+    assert len(cache) == 1
+    assert cache.get_or_compute("r", {"locations": {"A", "B"}}, versions, compute) == 3
+    assert len(cache) == 1
+
+
+def test_invalidate_drops_only_dependent_entries():
+    cache = ResultCache()
+    cache.get_or_compute("prod", {}, [("productions", 1)], Counter())
+    cache.get_or_compute("custos", {}, [("inputs", 1)], Counter())
+    cache.invalidate("inputs")
+    assert len(cache) == 1
+    compute = Counter()
+    cache.get_or_compute("prod", {}, [("productions", 1)], compute)
+    assert compute.calls == 0
+    cache.invalidate()
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_lru_bounded_by_bytes():
+    frame = pd.DataFrame({"x": np.arange(1000, dtype=np.float64)})
+    size = int(frame.memory_usage(deep=True, index=True).sum())
+    cache = ResultCache(max_bytes=size * 4 + size // 2)
+    for n in range(6):
+        cache.get_or_compute("r", {"n": n}, [("productions", 1)], Counter(frame))
+    assert len(cache) == 4 and cache.size <= cache.max_bytes
+    compute = Counter(frame)
+    cache.get_or_compute("r", {"n": 5}, [("productions", 1)], compute)
+    cache.get_or_compute("r", {"n": 0}, [("productions", 1)], compute)
+    assert compute.calls == 1
+
+    # Maior que um quarto do limite: devolvido, mas não guardado
+    big = pd.DataFrame({"x": np.arange(10 * 1000, dtype=np.float64)})
+    assert cache.get_or_compute("big", {}, [("productions", 1)], Counter(big)) is big
+    assert len(cache) == 4
+
+
+def test_backend_shares_frames_between_workers(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    frame = pd.DataFrame({"local": ["A", "B"], "receita": [10.0, 20.0]})
+    first, second = ResultCache(backend=store), ResultCache(backend=store)
+    first.get_or_compute("r", {"p": 1}, [("productions", 3)], Counter((frame, {"total": np.float64(30)})))
+
+    compute = Counter()
+    shared, extra = second.get_or_compute("r", {"p": 1}, [("productions", 3)], compute)
+    assert compute.calls == 0
+    pd.testing.assert_frame_equal(shared, frame)
+    assert extra == {"total": 30.0}
+
+
+@pytest.mark.parametrize("value", [42, {"total": 1.0}])
+def test_backend_keeps_non_frames_local(tmp_path, value):
+    store = SnapshotStore(str(tmp_path))
+    ResultCache(backend=store).get_or_compute("r", {}, [("productions", 1)], Counter(value))
+    compute = Counter(value)
+    assert ResultCache(backend=store).get_or_compute("r", {}, [("productions", 1)], compute) == value
+    assert compute.calls == 1
+
+
+def test_service_write_invalidates_table_results(tmp_path, client):
+    service = DataService(client_factory=lambda: client, outbox_path=str(tmp_path / "outbox.jsonl"), shared_dir="")
+    productions = service.load("productions")
+    versions = [productions.attrs[VERSION_ATTR]]
+    service.results.get_or_compute("prod", {}, versions, Counter())
+    service.results.get_or_compute("insumos", {}, [("inputs", 1)], Counter())
+
+    service.save_input("2024-01-01", "Semente", "Tomate", 1, "kg", 10.0, "Estufa A")
+    compute = Counter()
+    service.results.get_or_compute("prod", {}, versions, compute)
+    service.results.get_or_compute("insumos", {}, [("inputs", 1)], compute)
+    assert compute.calls == 1
@@ -0,0 +1,92 @@
+"""Balanceador: afinidade por cookie entre os workers"""
+import asyncio
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agrogestao.serve import Balancer, affinity, with_header
+
+BACKENDS = [("127.0.0.1", 8510), ("127.0.0.1", 8511), ("127.0.0.1", 8512)]
+
+
+def test_affinity_reads_cookie():
+    head = b"GET /media/a.pdf HTTP/1.1\r\nHost: x\r\nCookie: tema=escuro; agro_worker=2\r\n\r\n"
+    assert affinity(head) == 2
+    assert affinity(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n") is None
+    assert affinity(b"GET / HTTP/1.1\r\ncookie: agro_worker=abc\r\n\r\n") is None
+
+
+def test_with_header_inserts_before_blank_line():
+    head = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+    assert with_header(head, b"Set-Cookie: agro_worker=1") == \
+        b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nSet-Cookie: agro_worker=1\r\n\r\nok"
+    assert with_header(b"\x16\x03binario", b"Set-Cookie: x") == b"\x16\x03binario"
+
+
+@pytest.mark.parametrize("strategy", ["least-conn", "round-robin", "ip-hash"])
+def test_cookie_wins_over_strategy(strategy):
+    balancer = Balancer(BACKENDS, strategy)
+    for _ in range(5):
+        assert balancer.candidates("10.0.0.1", preferred=1) == [1, 2, 0]
+    # Cookie de um worker que não existe mais: a estratégia decide
+    assert len(balancer.candidates("10.0.0.1", preferred=7)) == 3
+
+
+def test_round_robin_spreads_new_browsers():
+    balancer = Balancer(BACKENDS, "round-robin")
+    assert [balancer.candidates("10.0.0.1")[0] for _ in range(3)] == [0, 1, 2]
+
+
+def _worker(n):
+    """Worker HTTP que responde o próprio número"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = str(n).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def proxy():
+    workers = [_worker(n) for n in range(3)]
+    balancer = Balancer([w.server_address for w in workers], "round-robin")
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(balancer.handle, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    for worker in workers:
+        worker.shutdown()
+        worker.server_close()
+
+
+def _get(port, path, cookie=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.request("GET", path, headers={"Cookie": cookie} if cookie else {})
+    response = connection.getresponse()
+    body, set_cookie = response.read(), response.getheader("Set-Cookie")
+    connection.close()
+    return int(body), set_cookie
+
+
+def test_browser_sticks_to_its_worker(proxy):
+    worker, set_cookie = _get(proxy, "/")
+    assert set_cookie.startswith(f"agro_worker={worker};")
+    cookie = set_cookie.split(";")[0]
+    # Downloads e uploads da sessão chegam ao mesmo worker, mesmo em round-robin
+    assert {_get(proxy, "/media/relatorio.pdf", cookie) for _ in range(6)} == {(worker, None)}
+    # Navegadores novos continuam distribuídos
+    assert len({_get(proxy, "/")[0] for _ in range(3)}) == 3
@@ -0,0 +1,111 @@
+"""SharedTableCache: gravações de um worker vistas pelos demais via delta do snapshot"""
+import os
+
+import pandas as pd
+import pytest
+
+from agrogestao.data.compact import compact_frame
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN, Outbox
+from agrogestao.data.shared_cache import SharedTableCache, SnapshotStore
+from agrogestao.data.table_cache import SYNC_COLUMN, SYNC_CONFIRMED, SYNC_PENDING, VERSION_ATTR
+from benchmarks.synthetic import make_productions
+
+SERVER = make_productions(500).assign(**{IDEMPOTENCY_COLUMN: lambda df: "srv-" + df["id"].astype(str)})
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def workers(tmp_path, loads):
+    """Dois "workers": cache e outbox próprios sobre o mesmo diretório de snapshots"""
+    def loader(table):
+        loads.append(table)
+        return SERVER
+
+    def worker(n):
+        outbox = Outbox(str(tmp_path / f"outbox-{n}.jsonl"), fsync=False)
+        cache = SharedTableCache(loader, SnapshotStore(str(tmp_path / "shared")), outbox=outbox,
+                                 ttl=3600, prepare=compact_frame, compact_every=8)
+        return cache, outbox
+
+    return worker(1), worker(2)
+
+
+def _write(cache, outbox, n):
+    row = {"date": "2024-01-01", "local": "Estufa A", "product": "Tomate", "first_quality": float(n),
+           "second_quality": 0.0, "created_at": f"2024-01-01T00:00:{n:02d}"}
+    key = outbox.put("productions", row)
+    cache.apply_local("productions", outbox.pending()[-1]["row"])
+    return key
+
+
+def _revision(cache):
+    return cache.snapshots.manifest("productions")["revision"]
+
+
+def test_write_in_one_worker_is_seen_by_the_other(workers, loads):
+    (a, outbox_a), (b, _) = workers
+    a.get("productions")
+    b.get("productions")
+    revision = _revision(a)
+
+    key = _write(a, outbox_a, 1)
+    df = b.get("productions")
+    assert df[IDEMPOTENCY_COLUMN].iloc[0] == key
+    assert df[SYNC_COLUMN].iloc[0] == SYNC_PENDING
+    assert df.attrs[VERSION_ATTR] == a.get("productions").attrs[VERSION_ATTR]
+    # Uma carga do banco para os dois workers e nenhum snapshot novo na gravação
+    assert loads == ["productions"]
+    assert _revision(a) == revision
+
+    outbox_a.ack([key])
+    version = b.version("productions")
+    a.confirm("productions", [key])
+    df = b.get("productions")
+    assert (df[SYNC_COLUMN] == SYNC_CONFIRMED).all()
+    assert b.version("productions") == version
+
+    a.discard("productions", [key])
+    assert key not in set(b.get("productions")[IDEMPOTENCY_COLUMN])
+    assert b.version("productions") == version + 1
+
+
+def test_delta_is_compacted_into_a_new_snapshot(workers):
+    (a, outbox_a), (b, outbox_b) = workers
+    b.get("productions")
+    revision = _revision(a)
+    keys = [_write(a if n % 2 else b, outbox_a if n % 2 else outbox_b, n) for n in range(10)]
+
+    manifest = a.snapshots.manifest("productions")
+    assert manifest["revision"] == revision + 1
+    assert manifest["delta_ops"] == 10 - 8
+    assert os.path.getsize(os.path.join(a.snapshots.directory, manifest["delta"])) == manifest["delta_bytes"]
+
+    df_a, df_b = a.get("productions"), b.get("productions")
+    assert list(df_a[IDEMPOTENCY_COLUMN][:10]) == keys[::-1]
+    pd.testing.assert_frame_equal(df_a, df_b)
+    assert len(df_a) == len(SERVER) + 10
+
+
+def test_reload_keeps_rows_pending_elsewhere(workers, loads):
+    (a, outbox_a), (b, _) = workers
+    a.get("productions")
+    key = _write(a, outbox_a, 1)
+    b.invalidate("productions")
+
+    df = b.get("productions")
+    assert loads == ["productions", "productions"]
+    assert df[IDEMPOTENCY_COLUMN].iloc[0] == key
+    assert df[SYNC_COLUMN].iloc[0] == SYNC_PENDING
+
+
+def test_results_roundtrip(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    key = (("productions", 3), "M")
+    assert store.load_result("allocation", key) is None
+    store.save_result("allocation", key, pd.DataFrame({"allocated_cost": [1.0, 2.0]}), {"unallocated": 5.0})
+    frame, metadata = store.load_result("allocation", key)
+    assert list(frame["allocated_cost"]) == [1.0, 2.0] and metadata == {"unallocated": 5.0}
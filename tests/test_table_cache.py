@@ -0,0 +1,119 @@
+"""TableCache: atualização otimista, confirmação e versões"""
+import pandas as pd
+import pytest
+
+from agrogestao.data import DataService
+from agrogestao.data.outbox import IDEMPOTENCY_COLUMN, Outbox
+from agrogestao.data.table_cache import SYNC_COLUMN, SYNC_CONFIRMED, SYNC_PENDING, VERSION_ATTR, TableCache
+
+SERVER_ROWS = [
+    {"id": 2, "local": "Estufa B", "product": "Alface", IDEMPOTENCY_COLUMN: "k2", "created_at": "2024-01-02"},
+    {"id": 1, "local": "Estufa A", "product": "Tomate", IDEMPOTENCY_COLUMN: "k1", "created_at": "2024-01-01"},
+]
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path / "outbox.jsonl"), fsync=False)
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def cache(outbox, loads):
+    def loader(table):
+        loads.append(table)
+        return pd.DataFrame(SERVER_ROWS)
+    return TableCache(loader, outbox=outbox, ttl=3600)
+
+
+def test_apply_local_prepends_pending_row_without_reload(cache, outbox, loads):
+    cache.get("productions")
+    before = cache.version("productions")
+    key = outbox.put("productions", {"local": "Estufa C", "product": "Morango"})
+    cache.apply_local("productions", outbox.pending()[0]["row"])
+
+    df = cache.get("productions")
+    assert loads == ["productions"]
+    assert list(df[IDEMPOTENCY_COLUMN]) == [key, "k2", "k1"]
+    assert list(df[SYNC_COLUMN]) == [SYNC_PENDING, SYNC_CONFIRMED, SYNC_CONFIRMED]
+    assert df.attrs[VERSION_ATTR] == ("productions", before + 1)
+
+
+def test_confirm_marks_synced(cache, outbox):
+    cache.get("productions")
+    key = outbox.put("productions", {"local": "Estufa C", "product": "Morango"})
+    cache.apply_local("productions", outbox.pending()[0]["row"])
+    outbox.ack([key])
+    cache.confirm("productions", [key])
+
+    df = cache.get("productions")
+    assert (df[SYNC_COLUMN] == SYNC_CONFIRMED).all()
+    assert len(df) == 3
+
+
+def test_apply_local_skips_known_key(cache):
+    cache.get("productions")
+    version = cache.version("productions")
+    cache.apply_local("productions", dict(SERVER_ROWS[0]))
+    assert len(cache.get("productions")) == 2
+    assert cache.version("productions") == version
+
+
+def test_apply_local_before_first_load_comes_from_outbox(cache, outbox):
+    key = outbox.put("productions", {"local": "Estufa C", "product": "Morango"})
+    cache.apply_local("productions", outbox.pending()[0]["row"])
+
+    df = cache.get("productions")
+    assert df[IDEMPOTENCY_COLUMN].iloc[0] == key
+    assert df[SYNC_COLUMN].iloc[0] == SYNC_PENDING
+
+
+def test_discard_removes_rejected_row(cache, outbox):
+    cache.get("productions")
+    key = outbox.put("productions", {"local": "Estufa C", "product": "Morango"})
+    cache.apply_local("productions", outbox.pending()[0]["row"])
+    cache.discard("productions", [key])
+    assert list(cache.get("productions")[IDEMPOTENCY_COLUMN]) == ["k2", "k1"]
+
+
+def test_get_returns_copy_safe_for_new_columns(cache):
+    df = cache.get("productions")
+    df["extra"] = 1
+    assert "extra" not in cache.get("productions").columns
+
+
+def test_loader_failure_is_not_cached(outbox):
+    calls = []
+
+    def loader(table):
+        calls.append(table)
+        if len(calls) == 1:
+            raise ConnectionError("sem rede")
+        return pd.DataFrame(SERVER_ROWS)
+
+    cache = TableCache(loader, outbox=outbox)
+    with pytest.raises(ConnectionError):
+        cache.get("productions")
+    assert len(cache.get("productions")) == 2
+
+
+def test_service_write_is_visible_then_confirmed(tmp_path, client, supabase_stub):
+    supabase_stub.load("productions", SERVER_ROWS)
+    service = DataService(client_factory=lambda: client, outbox_path=str(tmp_path / "outbox.jsonl"),
+                          shared_dir="")
+    assert len(service.load("productions")) == 2
+
+    key = service.save_production("2024-01-03", "Estufa C", "Morango", 3, 1, 10, 5, 25, 60, 0)
+    df = service.load("productions")
+    assert df[IDEMPOTENCY_COLUMN].iloc[0] == key
+    assert df[SYNC_COLUMN].iloc[0] == SYNC_PENDING
+
+    assert service.flusher.flush_once() == 1
+    df = service.load("productions")
+    assert len(df) == 3 and (df[SYNC_COLUMN] == SYNC_CONFIRMED).all()
+    assert supabase_stub.requests[("GET", "productions")] == 1
+    assert [r[IDEMPOTENCY_COLUMN] for r in supabase_stub.tables["productions"]][-1] == key
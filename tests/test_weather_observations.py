@@ -0,0 +1,49 @@
+"""Observações climáticas: id igual ao da migração 0002 e gravação antes das produções"""
+import pytest
+
+from agrogestao.data import DataService, repository
+
+READING = {"city": "Londrina", "country": "BR", "observed_at": "2024-05-01T12:30:15+00:00",
+           "temperature": 24.5, "humidity": 70, "rain": 0.0, "description": "céu limpo"}
+
+
+@pytest.mark.parametrize("city, instant, expected", [
+    # md5('londrina|2024-05-01T12:30:15+00:00')::uuid, como na função SQL weather_observation_id
+    (" Londrina  ", "2024-05-01T09:30:15-03:00", "172a1516-7bff-e130-4ff2-fcfe253bf529"),
+    ("LONDRINA", "2024-05-01 12:30:15.900", "172a1516-7bff-e130-4ff2-fcfe253bf529"),
+    # trim() só remove espaços: a tabulação entra na chave
+    ("\tLondrina", "2024-05-01T12:30:15Z", "6e3e1b4d-f9e8-51b0-3f22-80aa9b382347"),
+])
+def test_observation_id_matches_sql(city, instant, expected):
+    assert repository.weather_observation_id(city, instant) == expected
+
+
+@pytest.fixture
+def service(tmp_path, client):
+    return DataService(client_factory=lambda: client, outbox_path=str(tmp_path / "outbox.jsonl"), shared_dir="")
+
+
+def test_same_reading_queues_one_observation(service):
+    service.save_production("2024-05-01", "Estufa A", "Tomate", 3, 1, 10, 5, 24.5, 70, 0, READING)
+    service.save_production("2024-05-01", "Estufa B", "Alface", 2, 2, 8, 4, 24.5, 70, 0, dict(READING))
+    pending = service.outbox.pending()
+    observations = [e for e in pending if e["table"] == repository.WEATHER_TABLE]
+    productions = [e for e in pending if e["table"] == "productions"]
+    assert len(observations) == 1 and len(productions) == 2
+    assert {e["row"]["weather_id"] for e in productions} == {observations[0]["row"]["id"]}
+
+
+def test_observations_flush_before_productions(service, supabase_stub, monkeypatch):
+    sent = []
+    upsert_batch = repository.upsert_batch
+    monkeypatch.setattr(repository, "upsert_batch",
+                        lambda client, table, rows: sent.append(table) or upsert_batch(client, table, rows))
+    # A produção é enfileirada primeiro; a observação que ela referencia vai antes mesmo assim
+    service.queue("productions", repository.production_row(
+        "2024-05-01", "Estufa A", "Tomate", 3, 1, 10, 5, 24.5, 70, 0, repository.weather_row(READING)["id"]))
+    service.save_production("2024-05-01", "Estufa B", "Alface", 2, 2, 8, 4, 24.5, 70, 0, READING)
+
+    assert service.flusher.flush_once() == 3
+    assert sent == [repository.WEATHER_TABLE, "productions"]
+    assert len(supabase_stub.tables[repository.WEATHER_TABLE]) == 1
+    assert len(supabase_stub.tables["productions"]) == 2
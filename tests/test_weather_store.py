@@ -0,0 +1,78 @@
+"""Histórico climático local: gravação, consultas por intervalo e preenchimento"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agrogestao.data import WeatherBackfill, WeatherStore
+from agrogestao.integrations import OpenWeatherHistoryProvider
+from agrogestao.testing.weather_server import synthetic_hours
+
+
+def _hourly(start, hours, temperature=20.0):
+    times = pd.date_range(start, periods=hours, freq="h", tz="UTC")
+    return pd.DataFrame({"time": times, "temperature": temperature, "humidity": 60.0, "rain": 0.0})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WeatherStore(str(tmp_path / "weather"))
+
+
+def test_write_and_range(store):
+    store.write("Londrina", _hourly("2024-01-01", 48))
+    store.write("Londrina", _hourly("2024-01-02", 24, temperature=30.0))
+
+    frame = store.range("Londrina", "2024-01-01T12:00Z", "2024-01-02T01:00Z")
+    assert len(frame) == 14
+    assert list(frame["temperature"]) == [20.0] * 12 + [30.0] * 2
+    assert store.coverage("Londrina") == (pd.Timestamp("2024-01-01", tz="UTC"),
+                                          pd.Timestamp("2024-01-02T23:00", tz="UTC"))
+    assert store.cities() == ["Londrina"]
+    assert store.range("Cambé", "2024-01-01", "2024-01-02").empty
+
+
+def test_missing_ranges(store):
+    store.write("Londrina", _hourly("2024-01-01T05:00", 5))
+    gaps = store.missing_ranges("Londrina", "2024-01-01T00:00Z", "2024-01-01T12:00Z")
+    assert gaps == [(pd.Timestamp("2024-01-01T00:00", tz="UTC"), pd.Timestamp("2024-01-01T04:00", tz="UTC")),
+                    (pd.Timestamp("2024-01-01T10:00", tz="UTC"), pd.Timestamp("2024-01-01T12:00", tz="UTC"))]
+
+
+def test_daily_uses_local_days(store):
+    store.write("Londrina", _hourly("2024-01-01T03:00", 24))
+    daily = store.daily(["Londrina"], "2024-01-01", "2024-01-01", tz="America/Sao_Paulo")
+    assert list(daily["hours"]) == [24]
+    assert daily["day"].iloc[0] == pd.Timestamp("2024-01-01")
+
+
+def test_concurrent_writers_keep_every_hour(tmp_path):
+    directory = str(tmp_path / "weather")
+
+    def write(day):
+        WeatherStore(directory).write("Londrina", _hourly(pd.Timestamp("2024-01-01") + pd.Timedelta(days=day), 24))
+
+    threads = [threading.Thread(target=write, args=(day,)) for day in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(WeatherStore(directory).range("Londrina", "2024-01-01", "2024-01-21")) == 20 * 24
+
+
+def test_backfill_requests_only_missing_hours(store, weather_stub):
+    backfill = WeatherBackfill(store, OpenWeatherHistoryProvider(api_key="stub", base_url=weather_stub.url))
+    start, end = pd.Timestamp("2024-01-01", tz="UTC"), pd.Timestamp("2024-01-10T23:00", tz="UTC")
+
+    assert backfill.backfill("Londrina", start, end) == 240
+    # Dez dias em blocos de até uma semana
+    assert weather_stub.requests["/data/2.5/history/city"] == 2
+    frame = store.range("Londrina", start, end)
+    hours = (frame["time"] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(hours=1)
+    temperature, _, rain = synthetic_hours("Londrina", hours.to_numpy())
+    np.testing.assert_allclose(frame["temperature"], temperature, rtol=1e-5)
+    np.testing.assert_allclose(frame["rain"], rain, rtol=1e-5)
+
+    assert backfill.backfill("Londrina", start, end) == 0
+    assert weather_stub.requests["/data/2.5/history/city"] == 2